@@ -0,0 +1,1223 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Kernel extension for MxKernel.
+
+MxShellWidget sends the source of this module to MxKernel and executes
+it there, and :func:`register` adds the ``mx_*`` functions below to
+the comm call handlers of the kernel, in addition to the ones MxKernel
+defines. The Spyder process only imports a few helpers shared with
+the frontend, such as :func:`_decode_value`.
+
+Each handler takes the kernel as its first argument.
+Only the standard library may be imported at the module level,
+other modules are imported in the functions that use them.
+"""
+
+import ast
+import bisect
+import functools
+import hashlib
+import heapq
+import itertools
+import re
+import uuid
+
+# Handlers registered by register, bound to the kernel
+_ext_handlers = {}
+
+# Token to tell revisions of this kernel from others
+_token = uuid.uuid4().hex
+
+# Explorer tree states by model id. Each state maps the ids of the objects
+# in the model to pairs of their subtree digests and the revisions
+# when the subtrees last changed.
+_tree_states = {}
+_tree_revision = 0
+_name_indexes = {}
+
+# Values sent in chunks by request ids. See mx_send_value
+_streams = {}
+
+# Values kept in the kernel and shown in windows by handle ids.
+# See mx_send_value
+_handles = {}
+
+# Number of item spaces in a page of MxExplorer
+ITEMSPACE_PAGE = 500
+
+# Thread sending the numbers of values in cells. See mx_watch_counts
+_count_watcher = None
+
+# Bytes of the values in cells by model ids. See _set_memory
+_memory_sizes = {}
+
+# Cells with more values are sampled to estimate their bytes
+MEMORY_SAMPLE = 1000
+
+# Profiler of formulas. See mx_start_profile
+_profiler = None
+
+# Rows of DataFrame columns reduced at once. See _column_max_min
+MAX_MIN_CHUNK = 100000
+
+
+def _errmsg(err):
+    return err.__class__.__name__ + ": " + str(err)
+
+
+def mx_call(kernel, name, args, kwargs):
+    """Call a handler and return a dict of its result
+
+    The frontend is not notified of errors in non-blocking calls,
+    so non-blocking calls are made through this function.
+    ``name`` is the name of a handler in this module or a method of
+    the kernel.
+
+    The returned dict has the cloudpickled value in ``data``,
+    the error message in ``error`` and the time taken by the handler
+    in ``time``. The value is pickled here so that the frontend can
+    measure its size and the time to unpickle it.
+    """
+    import time
+    import cloudpickle
+
+    start = time.perf_counter()
+    try:
+        if name in _ext_handlers:
+            handler = _ext_handlers[name]
+        else:
+            handler = getattr(kernel, name)
+        value = handler(*args, **kwargs)
+        return {"data": cloudpickle.dumps(value), "error": None,
+                "time": time.perf_counter() - start}
+    except Exception as e:
+        return {"data": None, "error": _errmsg(e),
+                "time": time.perf_counter() - start}
+
+
+def _send_buffers(kernel, mx_msgtype, content, buffers):
+    """Publish a message with buffers to the frontend
+
+    Same as MxKernel.send_mx_msg except that ``buffers`` are sent as is.
+    """
+    import ipykernel
+    if ipykernel.version_info > (6,):
+        parent = kernel.get_parent(channel="shell")
+    else:
+        parent = kernel._parent_header
+
+    content['mx_msgtype'] = mx_msgtype
+    kernel.session.send(
+        kernel.iopub_socket,
+        'modelx_msg',
+        content=content,
+        buffers=buffers,
+        parent=parent)
+
+
+def _encode_value(value, formats):
+    """Returns the format name and buffers to send a value
+
+    DataFrames are encoded in the Arrow IPC format if ``formats``
+    has ``"arrow"`` and pyarrow is available. Other pandas and numpy
+    objects are pickled with protocol 5 if ``formats`` has ``"pickle5"``,
+    so that their data are sent as raw buffers without being copied.
+    Other values are cloudpickled.
+    """
+    import pickle
+    import sys
+
+    pd = sys.modules.get("pandas")
+    np = sys.modules.get("numpy")
+
+    if pd and isinstance(value, pd.DataFrame) and "arrow" in formats:
+        try:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(value)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return "arrow", [sink.getvalue()]
+        except Exception:   # pyarrow not available or unsupported data
+            pass
+
+    is_array = ((pd and isinstance(value, (pd.DataFrame, pd.Series, pd.Index)))
+                or (np and isinstance(value, np.ndarray)))
+
+    if (is_array and "pickle5" in formats
+            and pickle.HIGHEST_PROTOCOL >= 5):
+        buffers = []
+        header = pickle.dumps(value, protocol=5,
+                              buffer_callback=buffers.append)
+        return "pickle5", [header] + [b.raw() for b in buffers]
+
+    import cloudpickle
+    return "cloudpickle", [cloudpickle.dumps(value)]
+
+
+def _decode_value(fmt, buffers):
+    """Rebuild a value encoded by _encode_value in the frontend
+
+    The data of arrays are not copied from the message buffers,
+    so they are read-only. Copy the value to edit it.
+    """
+    import pickle
+    import cloudpickle
+
+    if fmt == "arrow":
+        import pyarrow as pa
+        table = pa.ipc.open_stream(pa.py_buffer(buffers[0])).read_all()
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    elif fmt == "pickle5":
+        return pickle.loads(buffers[0], buffers=buffers[1:])
+    else:
+        return cloudpickle.loads(buffers[0])
+
+
+def _is_streamable(value, chunk_rows):
+    import sys
+    pd = sys.modules.get("pandas")
+    return (chunk_rows and pd
+            and isinstance(value, (pd.DataFrame, pd.Series))
+            and len(value) > chunk_rows)
+
+
+def _jsonable_label(label):
+    """Returns label as is if it can be sent in JSON, or its string"""
+    if isinstance(label, tuple):
+        return [_jsonable_label(l) for l in label]
+    elif label is None or isinstance(label, (str, int, float, bool)):
+        return label
+    else:
+        return str(label)
+
+
+def _get_handle_info(value, min_size):
+    """Returns the information of a value to be kept in the kernel
+
+    Returns None if the value is not a DataFrame, Series or
+    numeric array with ``min_size`` elements or more.
+    Arrays with more than 2 dimensions are shown by 2 dimensional slabs,
+    and ``ndshape`` in the information is set to their shapes.
+    The first slab is of the last 2 axes at index 0 of the other axes.
+    """
+    import sys
+    pd = sys.modules.get("pandas")
+    np = sys.modules.get("numpy")
+
+    if not min_size:
+        return None
+
+    if pd and isinstance(value, (pd.DataFrame, pd.Series)):
+        if value.size < min_size:
+            return None
+        df = value.to_frame() if isinstance(value, pd.Series) else value
+        return {
+            "type": value.__class__.__name__,
+            "shape": df.shape,
+            "columns": [_jsonable_label(c) for c in df.columns],
+            "column_names": [_jsonable_label(n) for n in df.columns.names],
+            "index_names": [_jsonable_label(n) for n in df.index.names],
+            "dtypes": [str(t) for t in df.dtypes]
+        }
+    elif (np and isinstance(value, np.ndarray)
+          and value.ndim > 0 and value.size >= min_size
+          and value.dtype.kind in "biufc"):
+        if value.ndim > 2:
+            shape = value.shape[-2:]
+        else:
+            shape = value.shape if value.ndim == 2 else (value.shape[0], 1)
+        info = {"type": "ndarray", "shape": shape, "dtype": value.dtype.str}
+        if value.ndim > 2:
+            info["ndshape"] = value.shape
+        try:
+            color = np.abs(value) if value.dtype.kind == "c" else value.real
+            info["vmin"] = float(np.nanmin(color))
+            info["vmax"] = float(np.nanmax(color))
+        except (TypeError, ValueError):
+            info["vmin"] = info["vmax"] = None
+        info["has_inf"] = (value.dtype.kind in "fc"
+                           and bool(np.isinf(value).any()))
+        return info
+    else:
+        return None
+
+
+def mx_send_value(kernel, reqid, msgtype, fullname, argstr, calc, formats,
+                  chunk_rows=None, handle_size=None):
+    """Send the value of a modelx object as a ``value`` message
+
+    The value is encoded by _encode_value and sent in the buffers
+    of the message, instead of being returned as the reply to the call.
+    ``reqid`` is set in the message content to identify the request,
+    and ``time`` to the time taken to get and encode the value.
+
+    If ``chunk_rows`` is given and the value is a DataFrame or Series
+    longer than ``chunk_rows``, only its first ``chunk_rows`` rows are
+    sent and ``nrows`` in the content is set to the length of the value.
+    The value is kept until :func:`mx_close_stream` is called,
+    and the other rows are sent by :func:`mx_send_chunk`.
+
+    If ``handle_size`` is given and the value is a DataFrame, Series or
+    numeric array with ``handle_size`` elements or more, or a numeric
+    array with more than 2 dimensions, the value is kept in the kernel
+    instead, and ``handle`` in the content is set to
+    the information of the value and its id for :func:`mx_get_window`.
+    The value is kept until :func:`mx_close_handle` is called.
+    """
+    import time
+
+    start = time.perf_counter()
+    content = {"reqid": reqid, "error": None, "nrows": None, "handle": None}
+    try:
+        value, content["is_calculated"] = kernel.mx_get_value(
+            msgtype, fullname, argstr, calc)
+        info = _get_handle_info(value, handle_size)
+        if info:
+            info["id"] = reqid
+            _handles[reqid] = value
+            content["handle"] = info
+            value = None
+        elif _is_streamable(value, chunk_rows):
+            _streams[reqid] = value
+            content["nrows"] = len(value)
+            value = value.iloc[:chunk_rows]
+        content["format"], buffers = _encode_value(value, formats)
+    except Exception as e:
+        content["error"] = _errmsg(e)
+        buffers = []
+    content["time"] = time.perf_counter() - start
+
+    _send_buffers(kernel, "value", content, buffers)
+
+
+def mx_send_chunk(kernel, reqid, start, stop, formats):
+    """Send rows from ``start`` to ``stop`` of a value as a ``chunk`` message
+
+    The frontend requests the next chunk after receiving one,
+    so that it can stop the transfer at any time.
+    """
+    content = {"reqid": reqid, "error": None, "start": start, "stop": stop}
+    try:
+        value = _streams[reqid].iloc[start:stop]
+        content["format"], buffers = _encode_value(value, formats)
+    except Exception as e:
+        content["error"] = _errmsg(e)
+        buffers = []
+
+    _send_buffers(kernel, "chunk", content, buffers)
+
+
+def mx_close_stream(kernel, reqid):
+    """Release the value of a request kept for mx_send_chunk"""
+    _streams.pop(reqid, None)
+
+
+def mx_get_window(kernel, handle, row0, row1, col0, col1, slab=None):
+    """Get a window of a value kept by mx_send_value
+
+    Returns the rows from ``row0`` to ``row1`` and the columns from
+    ``col0`` to ``col1`` of the value as a DataFrame for DataFrames
+    and Series, or as a 2 dimensional array for arrays.
+
+    For arrays with more than 2 dimensions, ``slab`` is
+    ``[row_axis, col_axis, index]``, where ``index`` is a list of
+    the indexes of all the axes. The window is taken from the slab of
+    ``row_axis`` and ``col_axis`` at ``index`` of the other axes.
+    """
+    value = _handles[handle]
+    if slab is not None:
+        row_axis, col_axis, index = slab
+        key = list(index)
+        key[row_axis] = slice(row0, row1)
+        key[col_axis] = slice(col0, col1)
+        window = value[tuple(key)]
+        return window.T if row_axis > col_axis else window
+    if hasattr(value, "to_frame"):  # Series
+        value = value.to_frame()
+    if hasattr(value, "iloc"):
+        return value.iloc[row0:row1, col0:col1]
+    elif value.ndim == 1:
+        return value[row0:row1].reshape(-1, 1)
+    else:
+        return value[row0:row1, col0:col1]
+
+
+def mx_close_handle(kernel, handle):
+    """Release a value kept by mx_send_value"""
+    _handles.pop(handle, None)
+
+
+def _column_max_min(df, chunk_rows=MAX_MIN_CHUNK):
+    """Returns the maximums and minimums of the columns of a DataFrame
+
+    The result is the same as ``max_min_col`` of DataFrameModel, that is
+    a list whose k-th entry is [vmax, vmin] of the k-th column ignoring
+    NaN, or None if the column is not numeric, or None if there are no
+    rows. Complex columns are measured by their absolute values.
+    The columns are reduced by ``chunk_rows`` rows at a time,
+    so that the arrays of absolute values are kept small.
+    This function is also used by DataFrameModel in the frontend.
+    """
+    import numpy as np
+
+    if df.shape[0] == 0:
+        return None
+
+    # Same as REAL_NUMBER_TYPES and COMPLEX_NUMBER_TYPES of DataFrameModel
+    number_types = (float, int, np.int64, np.int32,
+                    complex, np.complex64, np.complex128)
+    result = []
+    for j in range(df.shape[1]):
+        col = df.iloc[:, j]
+        if col.dtype not in number_types:
+            result.append(None)
+            continue
+        values = col.to_numpy()
+        vmax = vmin = None
+        for start in range(0, len(values), chunk_rows):
+            chunk = values[start:start + chunk_rows]
+            if chunk.dtype.kind == "c":
+                chunk = np.abs(chunk)
+            # fmax and fmin ignore NaN
+            cmax, cmin = np.fmax.reduce(chunk), np.fmin.reduce(chunk)
+            vmax = cmax if vmax is None else np.fmax(vmax, cmax)
+            vmin = cmin if vmin is None else np.fmin(vmin, cmin)
+        vmax, vmin = vmax.item(), vmin.item()
+        result.append([vmax, vmin] if vmax != vmin else [vmax, vmin - 1])
+
+    return result
+
+
+def mx_get_max_min(kernel, handle):
+    """Get the maximums and minimums of the columns of a value
+
+    The value is a DataFrame or Series kept by mx_send_value.
+    See _column_max_min.
+    """
+    value = _handles[handle]
+    if hasattr(value, "to_frame"):  # Series
+        value = value.to_frame()
+    return _column_max_min(value)
+
+
+def _get_attrdict(fullname, attrs, recursive=False):
+    import modelx as mx
+    try:
+        obj = mx.get_object(fullname, as_proxy=True)
+    except NameError:
+        return None
+    return obj._get_attrdict(attrs, recursive=recursive)
+
+
+def _select_model(modellist, model_id):
+    """Returns the name of the model to show in MxExplorer
+
+    Does the same as MxModelSelector: The model whose id is ``model_id``
+    if it exists, otherwise the current model.
+    """
+    if model_id is not None:
+        for m in modellist[1:]:
+            if m["id"] == model_id:
+                return m["name"]
+
+    return modellist[0]["name"] if modellist[0] else ""
+
+
+def _is_container(value):
+    return isinstance(value, dict) and isinstance(value.get("items"), dict)
+
+
+def _set_digests(node, digests=None):
+    """Set the digests of the objects in tree data
+
+    ``_digest`` of each object is set to the digest of its own
+    attributes, and ``_subdigest`` to the digest of its own attributes
+    and the names, order and subdigests of its descendants, so that
+    MxExplorer can tell unchanged objects and subtrees from their
+    digests. The subdigests are also set in ``digests`` by the ids
+    if given. Returns the subdigest of node.
+    """
+    own = hashlib.blake2b(digest_size=16)
+    sub = hashlib.blake2b(digest_size=16)
+    for key, val in node.items():
+        if _is_container(val):
+            sub.update(key.encode())
+            for name, child in val["items"].items():
+                sub.update(name.encode())
+                sub.update(_set_digests(child, digests))
+        else:
+            own.update(repr((key, val)).encode())
+
+    node["_digest"] = own.digest()
+    sub.update(node["_digest"])
+    node["_subdigest"] = sub.digest()
+    if digests is not None:
+        digests[node["id"]] = node["_subdigest"]
+    return node["_subdigest"]
+
+
+def _sizeof(value):
+    """Returns the approximate bytes held by a value
+
+    The bytes of the data of numpy and pandas objects are counted.
+    Only the bytes of other objects themselves are counted, not of
+    the objects they refer to.
+    """
+    import sys
+
+    np = sys.modules.get("numpy")
+    pd = sys.modules.get("pandas")
+    if np is not None and isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (0 if value.base is None
+                                       else value.nbytes)
+    elif pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    else:
+        return sys.getsizeof(value)
+
+
+def _estimate_bytes(values):
+    """Returns the approximate bytes of the keys and values in a dict
+
+    If the dict has more items than ``MEMORY_SAMPLE``, the bytes are
+    estimated from evenly spaced items.
+    """
+    import sys
+
+    count = len(values)
+    if count > MEMORY_SAMPLE:
+        items = list(itertools.islice(
+            values.items(), 0, None, count // MEMORY_SAMPLE))
+    else:
+        items = values.items()
+
+    total = sum(_sizeof(key) + _sizeof(value) for key, value in items)
+    if count > MEMORY_SAMPLE:
+        total = total * count // len(items)
+    return sys.getsizeof(values) + total
+
+
+def _set_memory(obj, data, sizes, old):
+    """Set the bytes of the values in cells to ``_memory`` in tree data
+
+    ``obj`` is the object of ``data``. The bytes of the cells are
+    summed up to the spaces and the model. ``sizes`` gets the bytes of
+    the cells by their ids with the numbers of their values, and
+    the bytes are only estimated again for the cells whose numbers
+    differ from the ones in ``old``. Returns the bytes of ``obj``.
+    """
+    if data["type"] == "Cells":
+        values = obj._impl.data
+        key = (id(values), len(values))
+        entry = old.get(data["id"])
+        if entry is None or entry[0] != key:
+            entry = (key, _estimate_bytes(values))
+        sizes[data["id"]] = entry
+        total = entry[1]
+    else:
+        if data["type"] == "Model":
+            keys = ("spaces",)
+        else:
+            keys = ("named_spaces", "_named_itemspaces", "cells")
+        total = 0
+        for key in keys:
+            if key in data:
+                children = getattr(obj, key)
+                for name, child in data[key]["items"].items():
+                    total += _set_memory(children[name], child, sizes, old)
+
+    data["_memory"] = total
+    return total
+
+
+def _update_tree_state(data):
+    """Update the state of the tree and returns the new state"""
+    global _tree_revision
+
+    state = _tree_states.get(data["id"], {})
+    newstate = {}
+    revision = _tree_revision + 1
+
+    digests = {}
+    _set_digests(data, digests)
+    for objid, digest in digests.items():
+        old = state.get(objid)
+        if old and old[0] == digest:
+            newstate[objid] = old
+        else:
+            newstate[objid] = (digest, revision)
+    if any(rev == revision for _, rev in newstate.values()):
+        _tree_revision = revision
+
+    _tree_states[data["id"]] = newstate
+    _name_indexes.setdefault(data["id"], _NameIndex()).update(data)
+    return newstate
+
+
+class _NameIndex:
+    """Index of the names of the spaces, cells and refs in a model
+
+    The names are the fullnames of the objects without the model name,
+    such as ``Space1.Cells1``, and are matched case-insensitively.
+    :meth:`update` only visits the subtrees whose subdigests have
+    changed since the last update. Item spaces are not indexed.
+    """
+
+    def __init__(self):
+        self.model = ""
+        self.nodes = {}     # id -> (name, subdigest, child ids)
+        self.keys = []      # Sorted list of lowercase names and names
+        self._text = None   # Lowercase names joined by newlines
+        self._starts = None     # Positions of the names in _text
+        self._added = self._removed = None  # Changes in update
+
+    def update(self, data):
+        """Update the index with the tree data of the model"""
+        self.model = data["name"]
+        self._added, self._removed = [], []
+        self._visit(data, "")
+
+        # Many names are added or removed at once by sorting or filtering
+        removed = set(self._removed)
+        if len(removed) > 100:
+            self.keys = [key for key in self.keys if key[1] not in removed]
+        else:
+            for name in removed:
+                del self.keys[bisect.bisect_left(
+                    self.keys, (name.lower(), name))]
+        if len(self._added) > 100:
+            self.keys.extend(self._added)
+            self.keys.sort()
+        else:
+            for key in self._added:
+                bisect.insort(self.keys, key)
+
+        if removed or self._added:
+            self._text = None
+        self._added = self._removed = None
+
+    def _visit(self, node, name):
+        old = self.nodes.get(node["id"])
+        if old and old[0] == name and old[1] == node["_subdigest"]:
+            return
+
+        if node["type"] == "Model":
+            keys = ("spaces", "refs")
+        else:
+            keys = ("named_spaces", "cells", "refs")
+        children = [child for key in keys if key in node
+                    for child in node[key]["items"].values()]
+        childids = [child["id"] for child in children]
+
+        if old:
+            for objid in set(old[2]).difference(childids):
+                self._remove(objid)
+            if old[0] != name:
+                self._removed.append(old[0])
+        if name and not (old and old[0] == name):
+            self._added.append((name.lower(), name))
+
+        self.nodes[node["id"]] = (name, node["_subdigest"], childids)
+        for child in children:
+            self._visit(child, name + "." + child["name"] if name
+                        else child["name"])
+
+    def _remove(self, objid):
+        name, _, childids = self.nodes.pop(objid)
+        self._removed.append(name)
+        for childid in childids:
+            self._remove(childid)
+
+    def find(self, query, mode="prefix", limit=100):
+        """Returns the fullnames of the objects matching query
+
+        ``mode`` is one of:
+
+        * ``"prefix"``: names starting with ``query``
+        * ``"substring"``: names containing ``query``
+        * ``"fuzzy"``: names containing the characters of ``query``
+          in the same order. Closer matches come first.
+
+        The other matches are in the order of the names.
+        """
+        query = query.lower()
+        if mode == "prefix":
+            i = bisect.bisect_left(self.keys, (query,))
+            names = []
+            while (i < len(self.keys) and len(names) < limit
+                   and self.keys[i][0].startswith(query)):
+                names.append(self.keys[i][1])
+                i += 1
+        elif mode == "substring":
+            names = self._search(re.escape(query), limit)
+        elif mode == "fuzzy":
+            # Each character is matched at its first occurrence after
+            # the previous one to avoid backtracking.
+            pattern = re.escape(query[:1]) + "".join(
+                "[^\\n%s]*%s" % (re.escape(c), re.escape(c))
+                for c in query[1:])
+            names = self._search(pattern, limit, rank=True)
+        else:
+            raise ValueError("invalid mode: %s" % mode)
+
+        return [self.model + "." + name for name in names]
+
+    def _search(self, pattern, limit, rank=False):
+        """Search the lowercase names joined by newlines at once"""
+        if self._text is None:
+            self._text = "\n".join(key for key, _ in self.keys)
+            self._starts = list(itertools.accumulate(
+                (len(key) + 1 for key, _ in self.keys[:-1]), initial=0))
+
+        matches = []    # Pairs of the span lengths and the rows
+        last = -1
+        for m in re.finditer(pattern, self._text):
+            row = bisect.bisect_right(self._starts, m.start()) - 1
+            if row != last:
+                matches.append((m.end() - m.start(), row))
+                last = row
+                if not rank and len(matches) == limit:
+                    break
+        if rank:
+            matches = heapq.nsmallest(limit, matches)
+        return [self.keys[row][1] for _, row in matches]
+
+
+def _get_named_spaces(data):
+    """Returns pairs of fullnames and namedids of the user spaces in data
+
+    The spaces are listed in depth-first order as MxExplorer lists them.
+    """
+    result = []
+
+    def visit(node, key):
+        for child in node[key]["items"].values():
+            result.append((child["fullname"], child["namedid"]))
+            visit(child, "named_spaces")
+
+    visit(data, "spaces")
+    return result
+
+
+def _get_args(reprstr):
+    """Returns the arguments of an item space in its repr
+
+    Such as ``1, 0`` of ``Space1[1, 0]``
+    """
+    return reprstr[reprstr.find("[") + 1:-1]
+
+
+def _select_page(items, page, get_repr):
+    """Returns the names of the items in a page and the number of matches
+
+    ``page`` is a list of the start and stop of the range of the items
+    and a prefix of the arguments of the items (see _get_args).
+    Only the items whose arguments start with the prefix are counted.
+    ``get_repr`` is a function to get the repr of an item.
+    """
+    start, stop, prefix = page
+    if prefix:
+        names = [name for name, item in items.items()
+                 if _get_args(get_repr(item)).startswith(prefix)]
+    else:
+        names = list(items)
+    return names[start:stop], len(names)
+
+
+def _page_container(val, page):
+    """Keep the items of a container of item spaces in a page
+
+    The number of the items matching the prefix of ``page`` is set to
+    ``_total`` and ``page`` to ``_page`` of the container.
+    """
+    items = val["items"]
+    names, total = _select_page(items, page, lambda node: node["repr"])
+    val["items"] = {name: items[name] for name in names}
+    val["_total"] = total
+    val["_page"] = list(page)
+
+
+def _parse_expanded(expanded):
+    """Returns the set of the pairs in expanded and a dict of the pages
+
+    The elements of ``expanded`` are the pairs of object ids and
+    container keys, optionally followed by the start, stop and prefix
+    of the page of item spaces shown (see _select_page).
+    """
+    pairs, pages = set(), {}
+    for elm in expanded:
+        pair = tuple(elm[:2])
+        pairs.add(pair)
+        if len(elm) > 2:
+            pages[pair] = list(elm[2:])
+    return pairs, pages
+
+
+def _prune_collapsed(data, expanded, pages, is_root=False):
+    """Remove the items of the containers not in expanded
+
+    ``expanded`` is a set of pairs of the object ids and container keys,
+    such as ``(id, "cells")``, whose items are shown in MxExplorer.
+    The items of the other containers are removed, and the numbers of
+    the removed items are set to ``_pruned`` of the containers.
+    The containers of the root are kept if ``is_root`` is ``True``.
+    Only the item spaces in their pages are kept in the containers
+    of item spaces. ``pages`` is a dict of the pairs to the pages,
+    and the other containers have the first ``ITEMSPACE_PAGE`` ones.
+    """
+    for key, val in data.items():
+        if not _is_container(val):
+            continue
+        elif is_root or (data["id"], key) in expanded:
+            if key == "_named_itemspaces":
+                _page_container(val, pages.get(
+                    (data["id"], key), [0, ITEMSPACE_PAGE, ""]))
+            for child in val["items"].values():
+                _prune_collapsed(child, expanded, pages)
+        else:
+            data[key] = {
+                "type": val["type"], "items": {},
+                "_pruned": len(val["items"])
+            }
+
+
+def _get_tree(obj, attrs, base, expanded=None):
+    """Get the tree data of a model with subtrees unchanged since base
+
+    ``base`` is the revision returned with the tree data last time.
+    The subtrees unchanged since ``base`` are replaced with dicts
+    of the object ids and ``_unchanged`` set to ``True``.
+
+    Each object in the tree data has ``_digest`` and ``_subdigest``
+    (see _set_digests). If ``attrs`` has ``_memory``, the bytes of
+    the values of each object are set to it (see _set_memory).
+
+    If ``expanded`` is given, only the items of the containers in
+    ``expanded`` and of the model are included (see _prune_collapsed),
+    and ``_namedspaces`` of the model is set to the list of all the
+    user spaces in the model. Other items are retrieved by
+    :func:`mx_get_subtree` when they are expanded.
+
+    The kernel still walks and hashes the whole model on each call,
+    because modelx does not tell which objects have changed.
+    Only the data sent to and processed in the GUI is reduced.
+    """
+    data = obj._get_attrdict(attrs, recursive=True)
+    if "_memory" in attrs:
+        sizes = {}
+        _set_memory(obj, data, sizes, _memory_sizes.get(data["id"], {}))
+        _memory_sizes[data["id"]] = sizes
+    state = _update_tree_state(data)
+    model_id = data["id"]
+
+    if expanded is not None:
+        data["_namedspaces"] = _get_named_spaces(data)
+        _prune_collapsed(data, *_parse_expanded(expanded), is_root=True)
+
+    if base and base[0] == _token and base[1] == model_id:
+        base = base[2]
+    else:
+        base = None
+
+    def stub(node):
+        return {"id": node["id"], "_unchanged": True}
+
+    def prune(node):
+        for val in node.values():
+            if _is_container(val):
+                items = val["items"]
+                for name, child in items.items():
+                    if state[child["id"]][1] <= base:
+                        items[name] = stub(child)
+                    else:
+                        prune(child)
+
+    if base is not None:
+        if state[data["id"]][1] <= base:
+            data = stub(data)
+        else:
+            prune(data)
+
+    return {
+        "revision": (_token, model_id, _tree_revision),
+        "base": base,
+        "data": data
+    }
+
+
+def mx_get_tree(kernel, fullname, attrs, base=None, expanded=None):
+    """Get the tree data of a model for MxExplorer
+
+    See _get_tree
+    """
+    import modelx as mx
+    obj = mx.get_models()[fullname] if fullname else mx.cur_model()
+    if obj is None:
+        return {"revision": None, "base": None, "data": None}
+    return _get_tree(obj, attrs, base, expanded)
+
+
+def mx_get_subtree(kernel, fullname, keys, attrs, expanded, page=None):
+    """Get the containers of an object collapsed in MxExplorer
+
+    Returns a dict of ``keys`` to the containers of the object
+    ``fullname``. The items of the containers of the children are
+    removed unless they are in ``expanded``. See _prune_collapsed.
+
+    If ``keys`` is ``["_named_itemspaces"]``, only the item spaces in
+    ``page`` (see _select_page) or the first ``ITEMSPACE_PAGE`` ones
+    are retrieved, without getting the data of the other item spaces.
+    """
+    import modelx as mx
+    obj = mx.get_object(fullname, as_proxy=True)
+    expanded, pages = _parse_expanded(expanded)
+    if "_memory" in attrs:
+        sizes = _memory_sizes.setdefault(id(obj.model._impl), {})
+
+    if keys == ["_named_itemspaces"]:
+        page = list(page) if page else [0, ITEMSPACE_PAGE, ""]
+        itemspaces = obj._named_itemspaces
+        names, total = _select_page(
+            itemspaces, page, lambda space: space._get_repr())
+        items = {}
+        for name in names:
+            items[name] = child = itemspaces[name]._get_attrdict(
+                attrs, recursive=True)
+            if "_memory" in attrs:
+                _set_memory(itemspaces[name], child, sizes, sizes)
+            _set_digests(child)
+            _prune_collapsed(child, expanded, pages)
+        return {"_named_itemspaces": {
+            "type": "SpaceView", "items": items,
+            "_total": total, "_page": page}}
+
+    data = obj._get_attrdict(attrs, recursive=True)
+    if "_memory" in attrs:
+        _set_memory(obj, data, sizes, sizes)
+    _set_digests(data)
+    expanded.update((data["id"], key) for key in keys)
+    _prune_collapsed(data, expanded, pages)
+    return {key: data[key] for key in keys}
+
+
+def mx_find_names(kernel, model_id, query, mode="prefix", limit=100):
+    """Find the objects in a model by their names
+
+    The names of the model last retrieved by :func:`mx_get_tree` are
+    searched. See _NameIndex.find.
+    """
+    index = _name_indexes.get(model_id)
+    return index.find(query, mode, limit) if index and query else []
+
+
+class _CountWatcher:
+    """Daemon thread to send the numbers of values in cells
+
+    Every ``interval`` seconds, the numbers of values in the cells to
+    watch are sent in a ``counts`` message, only for the cells whose
+    numbers changed. The thread runs while the kernel runs code,
+    so that MxExplorer shows the numbers growing during calculations.
+    """
+
+    def __init__(self, kernel):
+        import threading
+
+        self.kernel = kernel
+        self.state = ({}, {})   # Cells by ids and their last numbers
+        self.interval = None
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="MxCountWatcher", daemon=True)
+        self.thread.start()
+
+    def watch(self, cells, interval):
+        """Replace the cells to watch and the interval
+
+        No message is sent if ``interval`` is 0 or None.
+        """
+        counts = {}
+        for objid, obj in cells.items():
+            try:
+                counts[objid] = len(obj)
+            except Exception:
+                pass
+        self.state = (cells, counts)
+        self.interval = interval or None
+        self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.interval:
+                self.send()
+
+    def send(self):
+        cells, counts = self.state
+        changed = []
+        for objid, obj in cells.items():
+            try:
+                count = len(obj)
+            except Exception:   # Deleted
+                continue
+            if counts.get(objid) != count:
+                counts[objid] = count
+                changed.append([objid, count])
+
+        if changed:
+            _send_buffers(self.kernel, "counts", {"counts": changed}, [])
+
+
+def mx_watch_counts(kernel, fullnames, interval):
+    """Send the numbers of values in cells periodically
+
+    ``fullnames`` maps the ids of the cells to watch to their fullnames.
+    The numbers are sent every ``interval`` seconds if they change,
+    even while the kernel is running code. See _CountWatcher.
+    """
+    import modelx as mx
+    global _count_watcher
+
+    cells = {}
+    for objid, fullname in fullnames.items():
+        try:
+            cells[objid] = mx.get_object(fullname, as_proxy=True)
+        except NameError:
+            pass
+
+    if _count_watcher is None:
+        if not (cells and interval):
+            return
+        _count_watcher = _CountWatcher(kernel)
+    _count_watcher.watch(cells, interval)
+
+
+def mx_clear_caches(kernel, fullname):
+    """Clear the calculated values of the cells in an object
+
+    The cells in the spaces in the object are cleared recursively,
+    including the cells in item spaces.
+    """
+    import modelx as mx
+    from modelx.core.cells import Cells
+    obj = mx.get_object(fullname, as_proxy=True)
+
+    def clear(obj):
+        if isinstance(obj, Cells):
+            obj.clear()
+            return
+        elif obj._impl.is_model():
+            children = obj.spaces.values()
+        else:
+            children = itertools.chain(
+                obj.named_spaces.values(), obj._named_itemspaces.values(),
+                obj.cells.values())
+        for child in list(children):
+            clear(child)
+
+    clear(obj)
+
+
+class _Profiler:
+    """Record the calls and times of the formulas of modelx objects
+
+    The ``_eval_formula`` method of the executor of modelx is replaced
+    on the instance to time each evaluation of a formula. The total time
+    of an object includes the time of the formulas it calls, and is
+    only counted at the outermost call of recursive calls. The self
+    time excludes the time of the formulas it calls.
+    """
+
+    def __init__(self, executor):
+        import time
+        from modelx.core.execution.trace import OBJ
+
+        self.executor = executor
+        self.stats = {}     # id -> [obj, calls, total, self, depth]
+        self.running = True
+        stack = []          # Time of the callees of the running calls
+        stats = self.stats
+        timer = time.perf_counter
+        eval_formula = executor._eval_formula
+
+        def profiled(node):
+            obj = node[OBJ]
+            entry = stats.get(id(obj))
+            if entry is None:
+                entry = stats[id(obj)] = [obj, 0, 0.0, 0.0, 0]
+            entry[4] += 1
+            stack.append(0.0)
+            start = timer()
+            try:
+                return eval_formula(node)
+            finally:
+                elapsed = timer() - start
+                callees = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                entry[1] += 1
+                entry[3] += elapsed - callees
+                entry[4] -= 1
+                if not entry[4]:
+                    entry[2] += elapsed
+
+        executor._eval_formula = profiled
+
+    def stop(self):
+        if self.running:
+            del self.executor._eval_formula
+            self.running = False
+
+    def get_stats(self, limit=None):
+        """Returns the stats in the descending order of the self times"""
+        result = []
+        for objid, (obj, calls, total, selftime, _) in self.stats.items():
+            try:
+                fullname = obj.interface.fullname
+            except Exception:   # Deleted
+                continue
+            result.append({"id": objid, "fullname": fullname,
+                           "calls": calls, "total": total, "self": selftime})
+        result.sort(key=lambda stats: stats["self"], reverse=True)
+        return result[:limit] if limit else result
+
+
+def mx_start_profile(kernel):
+    """Start recording the calls and times of formulas
+
+    The records of the last profiling are discarded. See _Profiler.
+    """
+    from modelx.core.system import mxsys
+    global _profiler
+
+    if _profiler:
+        _profiler.stop()
+    _profiler = _Profiler(mxsys.executor)
+
+
+def mx_stop_profile(kernel):
+    """Stop recording the calls and times of formulas"""
+    if _profiler:
+        _profiler.stop()
+
+
+def mx_get_profile(kernel, limit=None):
+    """Returns the records of profiling
+
+    Returns a dict of ``running`` and ``stats``, the list of dicts of
+    ``id``, ``fullname``, ``calls``, ``total`` and ``self`` of at most
+    ``limit`` objects whose self times are the largest.
+    """
+    if _profiler is None:
+        return {"running": False, "stats": []}
+    return {"running": _profiler.running,
+            "stats": _profiler.get_stats(limit)}
+
+
+def mx_refresh_bundle(kernel, request):
+    """Get the data of all the modelx panes at once
+
+    ``request`` is a dict whose keys are the panes to update:
+
+    * ``explorer``: dict of ``model_id``, ``attrs``, ``base`` and
+      ``expanded`` (see _get_tree)
+    * ``property``: dict of ``fullname`` and ``attrs``
+    * ``datalist``: ``True`` to get the value info of the model
+    * ``analyzer``: dict of adjacency to dict of ``fullname``,
+      ``attrs`` and ``args``
+
+    The reply has the same keys and ``modellist``. If the data of a
+    pane fails to be retrieved, its error message is set in ``errors``
+    and the other panes are unaffected.
+    """
+    from spyder_kernels.utils.nsview import value_to_display
+    import modelx as mx
+
+    result = {"modellist": kernel.mx_get_modellist(), "errors": {}}
+    errors = result["errors"]
+
+    model = ""
+    if "explorer" in request:
+        req = request["explorer"]
+        model = _select_model(result["modellist"], req["model_id"])
+        try:
+            result["explorer"] = mx_get_tree(
+                kernel, model, req["attrs"], req.get("base"),
+                req.get("expanded"))
+        except Exception as e:
+            errors["explorer"] = _errmsg(e)
+    result["model"] = model
+
+    if "property" in request:
+        req = request["property"]
+        try:
+            result["property"] = _get_attrdict(req["fullname"], req["attrs"])
+        except Exception as e:
+            errors["property"] = _errmsg(e)
+
+    if request.get("datalist") and model:
+        try:
+            result["datalist"] = kernel.mx_get_value_info(model)
+        except Exception as e:
+            errors["datalist"] = _errmsg(e)
+
+    analyzer = result["analyzer"] = {}
+    for adjacency, req in request.get("analyzer", {}).items():
+        data = analyzer[adjacency] = {}
+        try:
+            data["attrdict"] = attrdict = _get_attrdict(
+                req["fullname"], req["attrs"])
+            if attrdict:
+                node = mx.get_object(req["fullname"], as_proxy=True).node(
+                    *ast.literal_eval(req["args"]))
+                data["node"] = node = node._get_attrdict(
+                    recursive=False, extattrs=['formula'])
+                node["value"] = value_to_display(node["value"])
+        except Exception as e:
+            errors["analyzer_" + adjacency] = _errmsg(e)
+
+    return result
+
+
+_handlers = [
+    mx_call,
+    mx_clear_caches,
+    mx_close_handle,
+    mx_close_stream,
+    mx_find_names,
+    mx_get_max_min,
+    mx_get_profile,
+    mx_get_subtree,
+    mx_get_tree,
+    mx_get_window,
+    mx_refresh_bundle,
+    mx_send_chunk,
+    mx_send_value,
+    mx_start_profile,
+    mx_stop_profile,
+    mx_watch_counts
+]
+
+
+def register(kernel):
+    """Register the functions in this module as comm call handlers"""
+    for func in _handlers:
+        handler = _ext_handlers[func.__name__] = functools.partial(
+            func, kernel)
+        kernel.frontend_comm.register_call_handler(func.__name__, handler)
@@ -47,7 +47,7 @@ import ast
 
 from qtpy.QtWidgets import (
     QVBoxLayout, QWidget, QLabel, QButtonGroup, QRadioButton, QGridLayout,
-    QHBoxLayout, QPushButton, QMessageBox
+    QHBoxLayout, QPushButton, QMessageBox, QProgressBar
 )
 
 import spyder
@@ -63,6 +63,8 @@ if spyder.version_info > (5, 1):
     from spyder_modelx.widgets.mxdataviewer.dataframeviewer import MxDataFrameViewer
     from spyder_modelx.widgets.mxdataviewer.arrayviewer import MxArrayViewer
     from spyder_modelx.widgets.mxdataviewer.collectionsviewer import MxCollectionsViewer
+    from spyder_modelx.widgets.mxdataviewer.remotemodel import (
+        create_remote_viewer)
 elif spyder.version_info > (5,):
     from spyder_modelx.widgets.mxdataviewer.compat50.dataframeviewer import MxDataFrameViewer
     from spyder_modelx.widgets.mxdataviewer.compat50.arrayviewer import MxArrayViewer
@@ -138,6 +140,7 @@ if spyder.version_info > (5,):
                 tab = self.widget(index)
 
             # Note: client index may have changed after closing related widgets
+            self.shellwidget.mx_scheduler.cancel(tab)
             self.removeTab(self.indexOf(tab))
 
 
@@ -158,6 +161,8 @@ if spyder.version_info > (5,):
             #               objbox  argbox
             #
             #       self.msgbox
+            #       progress_layout
+            #           self.progressbar  self.cancel_button
             #   self.widget
             #
 
@@ -171,10 +176,20 @@ if spyder.version_info > (5,):
             self.msgbox.setText("")
             self.msgbox.setWordWrap(True)
 
+            self.progressbar = QProgressBar(parent=self)
+            self.progressbar.setFormat(_("%v of %m rows"))
+            self.cancel_button = QPushButton(text=_("Cancel"), parent=self)
+            self.cancel_button.clicked.connect(self.cancel_stream)
+            progress_layout = QHBoxLayout()
+            progress_layout.addWidget(self.progressbar)
+            progress_layout.addWidget(self.cancel_button)
+            self.show_progress(False)
+
             outer_layout = QVBoxLayout()
             upper_layout = QHBoxLayout()
             outer_layout.addLayout(upper_layout)
             outer_layout.addWidget(self.msgbox)
+            outer_layout.addLayout(progress_layout)
 
             objbox_layout = QHBoxLayout()
             objbox_layout.addWidget(self.objbox)
@@ -195,7 +210,8 @@ if spyder.version_info > (5,):
 
             margins = (0, 0, 0, 0)
 
-            for lo in [outer_layout, upper_layout, self.msgbox]:
+            for lo in [outer_layout, upper_layout, self.msgbox,
+                       progress_layout]:
                 lo.setContentsMargins(*margins)
 
             objbox_layout.setContentsMargins(0, 0, 0, 0)
@@ -203,6 +219,7 @@ if spyder.version_info > (5,):
             self.setLayout(main_layout)
 
             self.attrdict = None
+            self.stream = None  # Request id of the value streamed
 
         @property
         def shellwidget(self):
@@ -233,18 +250,104 @@ if spyder.version_info > (5,):
             # assert
             ast.literal_eval(args)
 
-            calc = self.plugin.get_container().calc_on_update_action.isChecked()
+            container = self.plugin.get_container()
+            calc = container.calc_on_update_action.isChecked()
+            use_buffers = container.use_buffers_action.isChecked()
 
-            val, is_calculated = self.shellwidget.update_mxdataview(
-                is_obj=True,
-                obj=self.attrdict["fullname"],
-                args=args,
-                calc=calc
+            self.cancel_stream()
+            self.msgbox.setText(_("Retrieving value..."))
+            self.shellwidget.mx_scheduler.submit(
+                self,
+                lambda ticket: self.shellwidget.update_mxdataview(
+                    is_obj=True,
+                    obj=self.attrdict["fullname"],
+                    args=args,
+                    calc=calc,
+                    callback=ticket.wrap(self._set_data),
+                    errback=ticket.wrap(self._set_error),
+                    use_buffers=use_buffers,
+                    chunk_callback=self._get_chunk_callback(ticket),
+                    handle_callback=self._get_handle_callback(ticket)
+                )
             )
+
+        def _set_data(self, result):
+            val, is_calculated = result
             self.update_value(val)
             if is_calculated:
                 self.shellwidget.refresh_namespacebrowser()
 
+        def _set_error(self, msg):
+            self.show_progress(False)
+            self.msgbox.setText(msg)
+
+        def _get_chunk_callback(self, ticket):
+            """Returns a function to append chunks of a value to the viewer
+
+            The function returns False to stop the transfer when the value
+            is no longer shown.
+            """
+            if not hasattr(MxDataFrameViewer, "append_data"):
+                return None
+
+            def append_chunk(reqid, chunk, received, nrows):
+                if self.stream != reqid:
+                    if chunk is not None or not ticket.is_current():
+                        return False
+                    self.stream = reqid     # Called after _set_data
+                    self.show_progress(True)
+                else:
+                    self.widget.append_data(chunk)
+
+                self.progressbar.setMaximum(nrows)
+                self.progressbar.setValue(received)
+                if received == nrows:
+                    self.shellwidget.put_stream_value(
+                        reqid, self.widget.get_value())
+                    self.stream = None
+                    self.show_progress(False)
+
+            return append_chunk
+
+        def _get_handle_callback(self, ticket):
+            """Returns a function to show a value kept in the kernel
+
+            The value is released if the request is superseded.
+            """
+            if spyder.version_info <= (5, 1):
+                return None
+
+            set_handle = ticket.wrap(self._set_handle)
+
+            def handle_callback(result):
+                if not ticket.is_current():
+                    self.shellwidget.close_handle(result[0]["id"])
+                set_handle(result)
+
+            return handle_callback
+
+        def _set_handle(self, result):
+            info, is_calculated = result
+            self.widget.deleteLater()
+            self.widget = create_remote_viewer(self.shellwidget, info, self)
+            self.msgbox.setText(
+                _("%s (retrieved by windows)") % info["type"])
+            self.main_layout.addWidget(self.widget)
+            self.main_layout.setStretchFactor(self.widget, 1)
+            if is_calculated:
+                self.shellwidget.refresh_namespacebrowser()
+
+        def cancel_stream(self):
+            """Stop receiving the rest of the value being shown"""
+            if self.stream is not None:
+                self.shellwidget.cancel_stream(self.stream)
+            self.stream = None
+            self.show_progress(False)
+
+        def show_progress(self, visible):
+            self.progressbar.setVisible(visible)
+            self.cancel_button.setVisible(visible)
+
         def update_value(self, data):
 
             import pandas as pd
@@ -254,7 +357,11 @@ if spyder.version_info > (5,):
             if isinstance(data, (pd.DataFrame, pd.Index, pd.Series)):
                 self.widget.deleteLater()
                 self.widget = MxDataFrameViewer(self)
-                self.widget.setup_and_check(data)
+                if hasattr(MxDataFrameViewer, "append_data"):
+                    # Values can be shared with mx_value_cache
+                    self.widget.setup_and_check(data, readonly=True)
+                else:
+                    self.widget.setup_and_check(data.copy())
                 self.msgbox.setText(data.__class__.__name__)
             elif isinstance(data, (np.ndarray, np.ma.MaskedArray)):
                 self.widget.deleteLater()
@@ -277,6 +384,7 @@ if spyder.version_info > (5,):
 
         def clear_contents(self):
             if self.widget:
+                self.cancel_stream()
                 self.widget.deleteLater()
                 self.widget = QWidget(parent=self)
                 self.attrdict = None
@@ -490,7 +598,7 @@ else:
             if isinstance(data, (pd.DataFrame, pd.Index, pd.Series)):
                 self.widget.deleteLater()
                 self.widget = MxDataFrameViewer(self)
-                self.widget.setup_and_check(data)
+                self.widget.setup_and_check(data.copy())
                 self.msgbox.setText(data.__class__.__name__)
             elif isinstance(data, (np.ndarray, np.ma.MaskedArray)):
                 self.widget.deleteLater()
@@ -525,6 +633,7 @@ if spyder.version_info > (5,):
         AddNewTab = 'add_new_tab'
         ClearContents = 'clear_contents'
         CalcOnUpdate = 'calc_on_update'
+        UseBuffers = 'use_buffers'
 
     class MxDataViewMainWidgetActionsOptionsMenuSections:
 
@@ -578,12 +687,21 @@ if spyder.version_info > (5,):
                 toggled=True
             )
             self.calc_on_update_action.setChecked(True)
+            self.use_buffers_action = self.create_action(
+                MxDataViewMainWidgetActions.UseBuffers,
+                text=_('Transfer arrays as raw buffers'),
+                tip=_('Send DataFrames and arrays from the kernel '
+                      'without pickling them'),
+                toggled=True
+            )
+            self.use_buffers_action.setChecked(True)
 
             # Options menu
             options_menu = self.get_options_menu()
             for item in [self.new_action,
                          self.clear_action,
-                         self.calc_on_update_action]:
+                         self.calc_on_update_action,
+                         self.use_buffers_action]:
                 self.add_item_to_menu(
                     item,
                     menu=options_menu,
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from qtpy.QtGui import QColor
+
+from spyder_modelx.widgets.mxdataviewer.blocks import (
+    BlockCache, hsv_to_argb, number_hues, NO_COLOR)
+
+
+def test_hsv_to_argb():
+    hues = np.linspace(0, 1, 1001)
+    argb = hsv_to_argb(hues, .7, 1., .6)
+    for hue, value in zip(hues, argb):
+        expected = QColor.fromHsvF(hue, .7, 1., .6)
+        actual = QColor.fromRgba(int(value))
+        assert all(abs(x - y) <= 1 for x, y in
+                   zip(expected.getRgb(), actual.getRgb()))
+
+    assert list(hsv_to_argb([np.nan, -.1, 1.1], .7, 1., .6)) == [NO_COLOR] * 3
+
+
+def test_number_hues():
+    hues = number_hues([[0, 9, np.nan]], [10, 10, 10], [0, 10, 0], .66, .33)
+    assert hues[0, 0] == pytest.approx(.99)
+    assert hues[0, 1] == pytest.approx(.99)    # Divided by 1 if vmax == vmin
+    assert np.isnan(hues[0, 2])
+
+
+def test_block_cache():
+    computed = []
+
+    def compute(row0, row1, col0, col1):
+        computed.append((row0, col0))
+        if row0 >= 20:
+            return None
+        return np.add.outer(np.arange(row0, row1) * 100,
+                            np.arange(col0, col1))
+
+    cache = BlockCache(compute, 10, 5, maxblocks=2)
+    assert cache.get(3, 4) == 304
+    assert cache.get(13, 6) == 1306
+    assert cache.get(0, 0) == 0
+    assert computed == [(0, 0), (10, 5)]
+
+    assert cache.get(0, 5) == 5     # Evicts (10, 5)
+    assert cache.get(13, 6) == 1306
+    assert computed == [(0, 0), (10, 5), (0, 5), (10, 5)]
+
+    assert cache.get(25, 0) is None
+    assert cache.get(25, 0) is None
+    assert computed[-2:] == [(20, 0), (20, 0)]
+
+    cache.clear()
+    assert cache.get(3, 4) == 304
+    assert computed[-1] == (0, 0)
+
+
+if __name__ == "__main__":
+    pytest.main()
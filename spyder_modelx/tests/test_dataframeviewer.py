@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from qtpy.QtCore import Qt
+
+from spyder_modelx.mxkernelext import _encode_value, _decode_value
+from spyder_modelx.widgets.mxdataviewer.dataframeviewer import (
+    DataFrameModel, DEFAULT_FORMAT, sort_positions)
+
+
+def test_sort_positions():
+    df = pd.DataFrame({"a": [2.0, np.nan, 1.0, 2.0, 1.0],
+                       "b": list("xyzwv")},
+                      index=[3, 1, 4, 0, 2])
+
+    for keys, expected in [
+        ([(0, True)], df.sort_values("a", kind="mergesort")),
+        ([(0, False)], df.sort_values("a", ascending=False,
+                                      kind="mergesort")),
+        ([(0, True), (1, False)], df.sort_values(
+            ["a", "b"], ascending=[True, False], kind="mergesort")),
+        ([(-1, True)], df.sort_index())
+    ]:
+        assert df.iloc[sort_positions(df, keys)].equals(expected)
+
+    # Columns with the same label
+    dup = pd.DataFrame([[2, 1], [1, 2]], columns=["x", "x"])
+    assert list(sort_positions(dup, [(0, True)])) == [1, 0]
+
+
+def test_compute_texts():
+    df = pd.DataFrame({"f": [1.25, np.nan], "i": [1, 2], "s": ["a", "b"]})
+
+    model = DataFrameModel(df, format="%.1f")
+    assert model._compute_texts(0, 2, 0, 3).tolist() == [
+        ["1.2", "1", "a"], ["nan", "2", "b"]]
+
+    # Formatted value by value if the column cannot be formatted at once
+    model = DataFrameModel(df, format="%d")
+    texts = model._compute_texts(0, 2, 0, 3)
+    assert texts[:, 0].tolist() == ["1", DEFAULT_FORMAT % np.nan]
+    assert texts.tolist() == [
+        [model.format_value(value) for value in row]
+        for row in df.astype(object).values]
+
+
+def test_readonly():
+    df = pd.DataFrame({"x": [1.5, 2.5]})
+    fmt, buffers = _encode_value(df, ["pickle5"])
+    df = _decode_value(fmt, [memoryview(bytes(b)) for b in buffers])
+
+    model = DataFrameModel(df, readonly=True)
+    index = model.index(0, 0)
+    assert not model.flags(index) & Qt.ItemIsEditable
+    assert not model.setData(index, "2")
+    assert not model.setData(index, "", change_type=int)
+    assert df.iloc[0, 0] == 1.5
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,386 @@
+import sys
+import pytest
+
+from spyder_modelx import mxkernelext
+from spyder_modelx.mxkernelext import (
+    _NameIndex, _CountWatcher, _estimate_bytes, _Profiler, _column_max_min,
+    _get_handle_info, mx_get_window, _get_tree, _encode_value,
+    _decode_value, mx_get_subtree)
+
+
+EXPLORER_ATTRS = ['_is_derived', '__len__', '_evalrepr']
+PROPERTY_ATTRS = ['formula', '_evalrepr', 'allow_none', 'parameters']
+
+
+@pytest.fixture
+def model():
+    mx = pytest.importorskip("modelx")
+    model = mx.new_model("TestModel")
+    space = model.new_space("Space1")
+    space.new_cells("foo", formula=lambda x: 2 * x)
+    model.new_space("Space2")
+    yield model
+    model.close()
+
+
+class FakeKernel:
+
+    def __init__(self, model=None, value=None):
+        self.model = model
+        self.value = value
+
+    def mx_get_modellist(self):
+        entry = {"name": self.model.name, "id": id(self.model._impl)}
+        return [entry, entry]
+
+    def mx_get_value_info(self, name):
+        raise RuntimeError("no info")
+
+    def double(self, x):
+        return 2 * x
+
+    def mx_get_value(self, msgtype, fullname, args, calc):
+        return self.value, calc
+
+
+def make_node(type_, name, digest, children=()):
+    node = {"type": type_, "id": name, "name": name, "_subdigest": digest}
+    items = {child["name"]: child for child in children}
+    if type_ == "Model":
+        node.update(spaces={"items": items}, refs={"items": {}})
+    elif type_ == "UserSpace":
+        node.update(named_spaces={"items": {}}, cells={"items": items},
+                    refs={"items": {}})
+    return node
+
+
+def make_model(cellsnames, digest):
+    cells = [make_node("Cells", name, name) for name in cellsnames]
+    return make_node("Model", "Model1", digest,
+                     [make_node("UserSpace", "Space1", digest, cells)])
+
+
+def test_name_index():
+    index = _NameIndex()
+    index.update(make_model(["Premium", "Claims", "PremiumRate"], "a"))
+
+    assert index.find("space1.prem") == [
+        "Model1.Space1.Premium", "Model1.Space1.PremiumRate"]
+    assert index.find("rate", "substring") == ["Model1.Space1.PremiumRate"]
+    assert index.find("prm", "fuzzy") == [
+        "Model1.Space1.Premium", "Model1.Space1.PremiumRate"]
+    assert index.find("s1clm", "fuzzy") == ["Model1.Space1.Claims"]
+    assert index.find("zz", "fuzzy") == []
+
+    # Subtrees whose digests are unchanged are not visited
+    index.update(make_model(["Reserve"], "a"))
+    assert index.find("space1.r") == []
+
+    index.update(make_model(["Claims", "Reserve"], "b"))
+    assert index.find("space1.", limit=10) == [
+        "Model1.Space1.Claims", "Model1.Space1.Reserve"]
+    assert index.find("prem", "substring") == []
+
+    with pytest.raises(ValueError):
+        index.find("a", "regex")
+
+
+def test_count_watcher(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        mxkernelext, "_send_buffers",
+        lambda kernel, msgtype, content, buffers: sent.append(content))
+
+    a, b = [1], [1, 2]
+    watcher = _CountWatcher(None)
+    watcher.watch({1: a, 2: b}, None)
+    watcher.send()
+    assert sent == []
+
+    a.append(2)
+    watcher.send()
+    watcher.send()
+    assert sent == [{"counts": [[1, 2]]}]
+
+
+def test_estimate_bytes():
+    small = {(i,): "x" * 100 for i in range(10)}
+    large = {(i,): "x" * 100 for i in range(100000)}
+
+    exact = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in large.items())
+    assert _estimate_bytes(small) == sys.getsizeof(small) + sum(
+        sys.getsizeof(k) + sys.getsizeof(v) for k, v in small.items())
+    assert _estimate_bytes(large) - sys.getsizeof(large) == pytest.approx(
+        exact, rel=0.01)
+
+
+class FakeObject:
+
+    def __init__(self, fullname):
+        self.interface = self
+        self.fullname = fullname
+
+
+class FakeExecutor:
+    """Evaluates f(t) = f(t - 1) + g(t) by the nodes of (obj, t)"""
+
+    def __init__(self):
+        self.f, self.g = FakeObject("M.S.f"), FakeObject("M.S.g")
+
+    def _eval_formula(self, node):
+        obj, t = node
+        if obj is self.g or t == 0:
+            return t
+        return self._eval_formula((self.f, t - 1)) + self._eval_formula(
+            (self.g, t))
+
+
+def test_profiler():
+    executor = FakeExecutor()
+    profiler = _Profiler(executor)
+    assert executor._eval_formula((executor.f, 3)) == 6
+
+    f, g = sorted(profiler.get_stats(), key=lambda s: s["fullname"])
+    assert (f["calls"], g["calls"]) == (4, 3)
+    assert f["self"] <= f["total"]
+    assert f["total"] == pytest.approx(f["self"] + g["total"])
+
+    profiler.stop()
+    assert "_eval_formula" not in vars(executor)
+    assert len(profiler.get_stats(limit=1)) == 1
+
+
+def test_column_max_min():
+    pd = pytest.importorskip("pandas")
+    np = pytest.importorskip("numpy")
+
+    df = pd.DataFrame({
+        "real": [np.nan, 3.0, -1.0, 2.0, np.nan],
+        "complex": [3 + 4j, 0j, 1j, 1j, 1j],
+        "same": [1, 1, 1, 1, 1],
+        "text": list("abcde")
+    })
+    expected = [[3.0, -1.0], [5.0, 0.0], [1, 0], None]
+    assert _column_max_min(df) == expected
+    assert _column_max_min(df, chunk_rows=2) == expected
+    assert _column_max_min(df.iloc[:0]) is None
+
+
+def test_get_window(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    np = pytest.importorskip("numpy")
+
+    df = pd.DataFrame(np.arange(15).reshape(5, 3), columns=list("abc"))
+    array = np.arange(15.).reshape(5, 3)
+    assert _get_handle_info(df, 16) is None
+    assert _get_handle_info(df, 15)["shape"] == (5, 3)
+    assert _get_handle_info(df["a"], 5)["shape"] == (5, 1)
+    assert _get_handle_info(array[:, 0], 5)["shape"] == (5, 1)
+    assert _get_handle_info(array.astype(object), 1) is None
+
+    for handle, value in [("df", df), ("series", df["b"]),
+                          ("array", array), ("vector", array[:, 1])]:
+        monkeypatch.setitem(mxkernelext._handles, handle, value)
+
+    # Windows are clipped at the ends of the values
+    window = mx_get_window(None, "df", 3, 10, 1, 10)
+    assert window.equals(df.iloc[3:, 1:])
+    assert mx_get_window(None, "series", 4, 10, 0, 10).equals(
+        df[["b"]].iloc[4:])
+    assert (mx_get_window(None, "array", 3, 10, 2, 10) == array[3:, 2:]).all()
+    assert mx_get_window(None, "vector", 1, 3, 0, 10).tolist() == [[4.], [7.]]
+    assert mx_get_window(None, "df", 5, 10, 0, 3).empty
+
+    mxkernelext.mx_close_handle(None, "df")
+    with pytest.raises(KeyError):
+        mx_get_window(None, "df", 0, 1, 0, 1)
+
+
+def test_get_window_of_slab(monkeypatch):
+    np = pytest.importorskip("numpy")
+
+    value = np.arange(2 * 3 * 4 * 5).reshape(2, 3, 4, 5)
+    assert _get_handle_info(value, 121) is None
+    info = _get_handle_info(value, 120)
+    assert info["shape"] == (4, 5) and info["ndshape"] == (2, 3, 4, 5)
+
+    monkeypatch.setitem(mxkernelext._handles, "h", value)
+    window = mx_get_window(None, "h", 0, 2, 1, 3, [1, 3, [1, 0, 2, 0]])
+    assert (window == value[1, 0:2, 2, 1:3]).all()
+    window = mx_get_window(None, "h", 0, 10, 0, 10, [3, 0, [0, 1, 2, 0]])
+    assert (window == value[:, 1, 2, :].T).all()
+
+
+def test_refresh_bundle(model):
+    pytest.importorskip("spyder_kernels")
+    model.Space1.foo(2)
+    analyzer = {"fullname": "TestModel.Space1.foo", "attrs": PROPERTY_ATTRS}
+
+    result = mxkernelext.mx_refresh_bundle(FakeKernel(model), {
+        "explorer": {"model_id": id(model._impl), "attrs": EXPLORER_ATTRS},
+        "property": {"fullname": "TestModel.Space1.foo",
+                     "attrs": PROPERTY_ATTRS},
+        "datalist": True,
+        "analyzer": {"precedents": dict(analyzer, args="(2,)"),
+                     "succs": dict(analyzer, args="(1, 2)")}
+    })
+
+    # Each pane gets its data or its own error
+    assert result["model"] == "TestModel"
+    assert result["explorer"]["data"]["fullname"] == "TestModel"
+    assert result["property"]["fullname"] == "TestModel.Space1.foo"
+    assert result["analyzer"]["precedents"]["node"]["value"] == "4"
+    assert "node" not in result["analyzer"]["succs"]
+    assert set(result["errors"]) == {"datalist", "analyzer_succs"}
+    assert result["errors"]["datalist"] == "RuntimeError: no info"
+
+
+def test_call(monkeypatch):
+    cloudpickle = pytest.importorskip("cloudpickle")
+    monkeypatch.setitem(mxkernelext._ext_handlers, "mx_fail",
+                        lambda: 1 / 0)
+
+    result = mxkernelext.mx_call(FakeKernel(), "double", [3], {})
+    assert cloudpickle.loads(result["data"]) == 6
+    assert result["error"] is None and result["time"] >= 0
+
+    # Errors are returned instead of raised
+    result = mxkernelext.mx_call(FakeKernel(), "mx_fail", [], {})
+    assert result["data"] is None
+    assert result["error"] == "ZeroDivisionError: division by zero"
+
+    result = mxkernelext.mx_call(FakeKernel(), "no_such_method", [], {})
+    assert result["data"] is None
+    assert result["error"].startswith("AttributeError: ")
+
+
+def test_get_tree_since_base(model):
+    tree = _get_tree(model, EXPLORER_ATTRS, None)
+    revision = tree["revision"]
+    assert tree["base"] is None and "spaces" in tree["data"]
+
+    def stub(obj):
+        return {"id": id(obj._impl), "_unchanged": True}
+
+    tree = _get_tree(model, EXPLORER_ATTRS, revision)
+    assert tree["revision"] == revision
+    assert tree["data"] == stub(model)
+
+    # Only the subtrees changed since the base are sent
+    model.Space1.new_cells("bar")
+    tree = _get_tree(model, EXPLORER_ATTRS, revision)
+    assert tree["base"] == revision[2]
+    assert tree["revision"][2] > revision[2]
+    spaces = tree["data"]["spaces"]["items"]
+    assert spaces["Space2"] == stub(model.Space2)
+    cells = spaces["Space1"]["cells"]["items"]
+    assert cells["foo"] == stub(model.Space1.foo)
+    assert cells["bar"]["fullname"] == "TestModel.Space1.bar"
+
+    # Revisions of other kernels are not used as the base
+    tree = _get_tree(model, EXPLORER_ATTRS, ("other",) + revision[1:])
+    assert tree["base"] is None and "spaces" in tree["data"]
+
+
+@pytest.mark.parametrize("formats, dfformat", [
+    [["arrow", "pickle5"], "arrow"],
+    [["pickle5"], "pickle5"],
+    [[], "cloudpickle"]
+])
+def test_encode_decode_value(formats, dfformat):
+    pd = pytest.importorskip("pandas")
+    np = pytest.importorskip("numpy")
+    if "arrow" in formats:
+        pytest.importorskip("pyarrow")
+    arrayformat = "pickle5" if "pickle5" in formats else "cloudpickle"
+
+    df = pd.DataFrame({"x": [1.5, np.nan, 3.0], "y": [1, 2, 3]},
+                      index=pd.Index(list("abc"), name="key"))
+    for value, expected in [(df, dfformat),
+                            (df["x"], arrayformat),
+                            (np.arange(6.).reshape(2, 3), arrayformat),
+                            ({"x": 1}, "cloudpickle")]:
+        fmt, buffers = _encode_value(value, formats)
+        assert fmt == expected
+        # Buffers are received as memoryviews
+        decoded = _decode_value(fmt, [memoryview(bytes(b)) for b in buffers])
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(decoded, value)
+        elif isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(decoded, value)
+        elif isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(decoded, value)
+        else:
+            assert decoded == value
+
+
+def test_send_chunks(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    sent = []
+    monkeypatch.setattr(
+        mxkernelext, "_send_buffers",
+        lambda kernel, msgtype, content, buffers: sent.append(
+            (msgtype, content,
+             _decode_value(content["format"], buffers) if buffers else None)))
+    monkeypatch.setattr(mxkernelext, "_streams", {})
+
+    df = pd.DataFrame({"x": range(10)})
+    kernel = FakeKernel(value=df)
+    mxkernelext.mx_send_value(
+        kernel, "r1", "dataview", "M.S.x", "()", True, ["pickle5"], 4)
+    msgtype, content, value = sent.pop()
+    assert msgtype == "value" and content["nrows"] == 10
+    assert content["is_calculated"] and value.equals(df.iloc[:4])
+
+    # The last chunk has the rest of the rows
+    for start, stop, rows in [(4, 8, 4), (8, 12, 2)]:
+        mxkernelext.mx_send_chunk(kernel, "r1", start, stop, ["pickle5"])
+        msgtype, content, value = sent.pop()
+        assert msgtype == "chunk" and content["error"] is None
+        assert (content["start"], content["stop"]) == (start, stop)
+        assert len(value) == rows and value.equals(df.iloc[start:stop])
+
+    mxkernelext.mx_close_stream(kernel, "r1")
+    mxkernelext.mx_send_chunk(kernel, "r1", 8, 12, ["pickle5"])
+    assert sent.pop()[1]["error"] == "KeyError: 'r1'"
+
+    # Not kept if sent at once
+    mxkernelext.mx_send_value(
+        kernel, "r2", "dataview", "M.S.x", "()", False, ["pickle5"], 10)
+    msgtype, content, value = sent.pop()
+    assert content["nrows"] is None and value.equals(df)
+    assert not mxkernelext._streams
+
+
+def test_prune_collapsed(model):
+    space_id = id(model.Space1._impl)
+
+    tree = _get_tree(model, EXPLORER_ATTRS, None, expanded=[])
+    space = tree["data"]["spaces"]["items"]["Space1"]
+    assert space["cells"]["_pruned"] == 1 and not space["cells"]["items"]
+    assert space["refs"]["_pruned"] == 0
+    assert [name for _, name in tree["data"]["_namedspaces"]] == [
+        "Space1", "Space2"]
+
+    tree = _get_tree(model, EXPLORER_ATTRS, None,
+                     expanded=[[space_id, "cells"]])
+    space = tree["data"]["spaces"]["items"]["Space1"]
+    assert "_pruned" not in space["cells"]
+    assert list(space["cells"]["items"]) == ["foo"]
+
+    # The items of the children are pruned unless expanded
+    subtree = mx_get_subtree(None, "TestModel", ["spaces"], EXPLORER_ATTRS,
+                             [])
+    space = subtree["spaces"]["items"]["Space1"]
+    assert space["cells"]["_pruned"] == 1
+    assert "_subdigest" in space
+
+    subtree = mx_get_subtree(None, "TestModel.Space1", ["cells"],
+                             EXPLORER_ATTRS, [])
+    assert list(subtree) == ["cells"]
+    assert subtree["cells"]["items"]["foo"]["fullname"] == (
+        "TestModel.Space1.foo")
+
+
+if __name__ == "__main__":
+    pytest.main()
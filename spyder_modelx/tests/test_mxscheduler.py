@@ -0,0 +1,42 @@
+import pytest
+
+from spyder_modelx.widgets.mxscheduler import MxRequestScheduler
+
+
+def test_debounce_and_supersede(qtbot):
+    scheduler = MxRequestScheduler(delay=10)
+    made, replies, callbacks = [], [], []
+
+    def request(n):
+        def make(ticket):
+            made.append(n)
+            callbacks.append(ticket.wrap(lambda: replies.append(n)))
+        return make
+
+    # Only the last of the requests submitted in a row is made
+    for n in range(3):
+        scheduler.submit("pane", request(n))
+    qtbot.wait(100)
+    assert made == [2]
+
+    # Only the latest request is made after the reply
+    scheduler.submit("pane", request(3))
+    scheduler.submit("pane", request(4))
+    qtbot.wait(100)
+    assert made == [2] and scheduler.is_busy("pane")
+
+    callbacks[0]()      # Superseded by 4
+    assert replies == [] and made == [2, 4]
+    callbacks[1]()
+    assert replies == [4] and not scheduler.is_busy("pane")
+
+    # Requests of other panes are not affected
+    scheduler.submit("other", request(5))
+    scheduler.submit("pane", request(6))
+    scheduler.cancel("pane")
+    qtbot.wait(100)
+    assert made == [2, 4, 5] and not scheduler.is_busy("pane")
+
+
+if __name__ == "__main__":
+    pytest.main()
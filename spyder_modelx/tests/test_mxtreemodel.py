@@ -0,0 +1,208 @@
+import random
+import pytest
+
+from qtpy.QtCore import QModelIndex
+from qtpy.QtTest import QAbstractItemModelTester
+
+from spyder_modelx.widgets.mxtreemodel import (
+    MxTreeModel, ModelItem, merge_tree, compact_node, get_expanded,
+    build_items, is_changed,
+    _increasing_subsequence, _group_rows)
+
+
+def make_data(names):
+    """Tree data of a model with a space that has cells of names"""
+    cells = {
+        name: {"type": "Cells", "id": name, "name": name,
+               "fullname": "Model1.Space1." + name, "repr": name,
+               "namedid": "Space1." + name, "parameters": []}
+        for name in names
+    }
+    space = {
+        "type": "UserSpace", "id": "Space1", "name": "Space1",
+        "fullname": "Model1.Space1", "repr": "Space1",
+        "namedid": "Space1", "parameters": None,
+        "named_spaces": {"items": {}},
+        "_named_itemspaces": {"items": {}},
+        "cells": {"items": cells},
+        "refs": {"items": {}}
+    }
+    return {
+        "type": "Model", "id": "Model1", "name": "Model1",
+        "fullname": "Model1", "repr": "Model1", "namedid": "",
+        "spaces": {"items": {"Space1": space}},
+        "refs": {"items": {}}
+    }
+
+
+def get_names(model):
+    space = model.index(0, 0, QModelIndex())
+    return [model.index(row, 0, space).internalPointer().name
+            for row in range(model.rowCount(space))]
+
+
+def test_merge_tree_digests():
+    base = make_data(["a", "b"])
+    data = make_data(["a", "b"])
+    cells, basecells = (d["spaces"]["items"]["Space1"]["cells"]["items"]
+                        for d in (data, base))
+    for name in ["a", "b"]:
+        cells[name]["_subdigest"] = basecells[name]["_subdigest"] = name
+    cells["b"]["_subdigest"] = "changed"
+
+    merged = merge_tree(data, base)
+    mergedcells = merged["spaces"]["items"]["Space1"]["cells"]["items"]
+    assert mergedcells["a"] is basecells["a"]
+    assert mergedcells["b"] is cells["b"]
+
+
+def test_is_changed():
+    old = make_data(["a"])
+    new = make_data(["a"])
+    assert not is_changed(old, old)
+    assert not is_changed(old, new)
+
+    # Compared by _subdigest without the contents
+    old["_subdigest"], new["_subdigest"] = "x", "x"
+    new["spaces"]["items"]["Space1"]["cells"]["items"]["a"]["repr"] = "b"
+    assert not is_changed(old, new)
+    new["_subdigest"] = "y"
+    assert is_changed(old, new)
+
+    item = ModelItem(old)
+    item.updateData(new)
+    assert item.itemData is new
+
+
+def test_build_items():
+    base = merge_tree(make_data(["a", "b"]), None)
+    data = make_data(["a", "b"])
+    data["spaces"]["items"]["Space1"]["cells"]["items"]["a"] = {
+        "id": "a", "_unchanged": True}
+
+    root = build_items(data, base)
+    space = root.childItems[0]
+    assert space.isChildCreated()
+    a, b = space.childItems
+    basecells = base["spaces"]["items"]["Space1"]["cells"]["items"]
+    assert a.itemData is basecells["a"]
+    assert not a.isChildCreated() and b.isChildCreated()
+
+    assert not build_items({"id": "Model1", "_unchanged": True},
+                           base).isChildCreated()
+
+
+def test_compact_node():
+    data = make_data(["a", "b"])
+    cells = data["spaces"]["items"]["Space1"]["cells"]
+    cells["keys"] = ["a", "b"]
+    for name, node in cells["items"].items():
+        node.update(parameters=["x", "y"], _evalrepr="Model1.Space1." + name,
+                    _digest=b"own", _subdigest=b"sub")
+    a, b = cells["items"]["a"], cells["items"]["b"]
+
+    assert compact_node(a) == []
+    compact_node(b)
+    assert a["parameters"] == ("x", "y") and a["parameters"] is b["parameters"]
+    assert a["_evalrepr"] is a["fullname"]
+    assert "_digest" not in a and a["_subdigest"] == b"sub"
+
+    space = data["spaces"]["items"]["Space1"]
+    assert [key for key, _ in compact_node(space)] == [
+        "named_spaces", "_named_itemspaces", "cells", "refs"]
+    assert "keys" not in cells
+    with pytest.raises(AttributeError):     # No __dict__
+        ModelItem(data).attr = None
+
+
+def test_itemspace_page():
+    data = make_data(["a"])
+    space = data["spaces"]["items"]["Space1"]
+    space["_named_itemspaces"] = {
+        "items": {"__Space%d" % i: make_data([])["spaces"]["items"]["Space1"]
+                  for i in range(3)},
+        "_page": [3, 6, ""], "_total": 1000}
+    for i, child in enumerate(space["_named_itemspaces"]["items"].values()):
+        child["id"] = "__Space%d" % i
+
+    spaceitem = ModelItem(data).child(0)
+    mapitem = spaceitem.child(0)
+    assert mapitem.isPaged() and mapitem.childCount() == 3
+    assert mapitem.data(0) == "ItemSpaces (4-6 of 1,000)"
+    assert ("Space1", "_named_itemspaces", 3, 6, "") in get_expanded(data)
+
+    space["_named_itemspaces"]["_page"] = [0, 3, "1"]
+    space["_named_itemspaces"]["_total"] = 3
+    assert mapitem.data(0) == 'ItemSpaces (first 3 of 3 matching "1")'
+
+
+def test_increasing_subsequence():
+    assert _increasing_subsequence([]) == set()
+    assert _increasing_subsequence([3, 0, 1, 4, 2]) in (
+        {0, 1, 4}, {0, 1, 2})
+    assert _increasing_subsequence(list(range(5))) == set(range(5))
+
+
+def test_group_rows():
+    assert _group_rows([2, 3, 4, 7, 8]) == [(2, 4), (7, 8)]
+    assert _group_rows([]) == []
+
+
+def test_child_rows():
+    names = ["c%d" % i for i in range(6)]
+    space = ModelItem(make_data(names + ["x"])).childItems[0]
+    x, = space.removeChildren(6, 1)    # Inserted later
+
+    def check(expected):
+        assert [child.name for child in space.childItems] == expected
+        for row, child in enumerate(space.childItems):
+            assert child.row() == row
+            assert space.childByKey(child.key) is child
+
+    removed = space.removeChildren(1, 2)
+    assert [child.name for child in removed] == ["c1", "c2"]
+    assert space.childByKey(removed[0].key) is None
+    check(["c0", "c3", "c4", "c5"])
+
+    space.insertChildren(1, removed[::-1])
+    space.insertChild(0, x)
+    check(["x", "c0", "c2", "c1", "c3", "c4", "c5"])
+
+    space.moveChildren(1, 2, 6)     # Before c5
+    check(["x", "c1", "c3", "c4", "c0", "c2", "c5"])
+    space.moveChildren(5, 2, 0)
+    check(["c2", "c5", "x", "c1", "c3", "c4", "c0"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_children(seed):
+    rnd = random.Random(seed)
+    names = ["c%d" % i for i in range(30)]
+    model = MxTreeModel(ModelItem(make_data(names)))
+    tester = QAbstractItemModelTester(
+        model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    get_names(model)    # Create the children
+
+    moves = []
+    model.rowsMoved.connect(lambda *args: moves.append(args))
+
+    for i in range(10):
+        names = [n for n in names if rnd.random() > 0.1]
+        names += ["n%d_%d" % (i, k) for k in range(rnd.randrange(5))]
+        for _ in range(rnd.randrange(3)):   # Move a few children
+            names.insert(rnd.randrange(len(names)),
+                         names.pop(rnd.randrange(len(names))))
+
+        model.updateRoot(ModelItem(make_data(names)))
+        assert get_names(model) == names
+
+        space = model.rootItem.child(0)
+        for row, child in enumerate(space.childItems):
+            assert child.row() == row
+            assert space.childByKey(child.key) is child
+
+    assert len(moves) <= 20
+
+
+if __name__ == "__main__":
+    pytest.main()
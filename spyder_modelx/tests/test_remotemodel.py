@@ -0,0 +1,53 @@
+import pytest
+
+from spyder_modelx.widgets.mxdataviewer.remotemodel import MxRemoteBlocks
+
+
+class FakeShell:
+    """Keeps the requests of windows to complete them in tests"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_window(self, handle, row0, row1, col0, col1,
+                   callback, errback=None, slab=None):
+        self.requests.append(((row0, col0), callback))
+
+    def close_handle(self, handle):
+        pass
+
+
+def test_pending_blocks():
+    shell = FakeShell()
+    blocks = MxRemoteBlocks(shell, {"id": "h", "shape": (1000, 10)})
+    blocks.MAX_BLOCKS = 2
+
+    for row in [0, 200, 400]:
+        assert blocks.get(row, 0) is None
+    assert blocks.get(200, 0) is None   # Not requested again
+    assert len(shell.requests) == 3
+
+    # Blocks being retrieved are not evicted by the blocks retrieved
+    for (row0, _), callback in shell.requests:
+        callback("window%d" % row0)
+    assert blocks.get(0, 0) is None
+    assert blocks.get(210, 1) == ("window200", 10, 1)
+    assert blocks.get(400, 0) == ("window400", 0, 0)
+    assert len(shell.requests) == 4     # Block 0 is requested again
+
+
+def test_get_window():
+    shell = FakeShell()
+    blocks = MxRemoteBlocks(shell, {"id": "h", "shape": (1000, 10)})
+    windows = []
+
+    blocks.get_window(0, 1000, 0, 10, callback=windows.append)
+    blocks.get_window(0, 1000, 0, 10, callback=windows.append)
+    shell.requests[0][1]("window")
+    blocks.close()
+    shell.requests[1][1]("window")     # Retrieved after closed
+    assert windows == ["window"]
+
+
+if __name__ == "__main__":
+    pytest.main()
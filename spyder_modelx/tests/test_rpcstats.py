@@ -0,0 +1,34 @@
+import json
+import pytest
+
+from spyder_modelx.utility.rpcstats import RpcStats, percentile
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3], 90) == 3
+    assert percentile([], 50) is None
+
+
+def test_summary():
+    stats = RpcStats(maxlen=5)
+    for i in range(10):
+        stats.record("mx_get_value", "dataview_getval",
+                     wall=i, kernel=None, nbytes=100)
+    stats.record("mx_get_tree", wall=100)
+
+    tree, value = stats.summary()   # Sorted by total wall time
+    assert tree["method"] == "mx_get_tree"
+    assert value["count"] == 10
+    assert value["wall"]["max"] == 9
+    assert value["wall"]["total"] == sum(range(5, 10))  # Latest 5 kept
+    assert value["kernel"]["p50"] is None
+
+    data = json.loads(stats.to_json())
+    assert len(data["records"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main()
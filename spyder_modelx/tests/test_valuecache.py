@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from spyder_modelx.utility.valuecache import ValueCache, ModelValueCache
+
+MODELLIST = [
+    {"name": "Model1", "id": 10},
+    {"name": "Model1", "id": 10},
+    {"name": "Model2", "id": 20}
+]
+
+
+def test_lru():
+    cache = ValueCache(max_bytes=3 * 800)
+    arrays = [np.zeros(100) for _ in range(4)]  # 800 bytes each
+
+    for i in range(3):
+        cache.put(i, arrays[i])
+
+    assert cache.get(0) is arrays[0]
+    cache.put(3, arrays[3])     # Evicts 1, the least recently used
+
+    assert 1 not in cache
+    assert [k for k in range(4) if k in cache] == [0, 2, 3]
+    assert cache.nbytes == 3 * 800
+
+
+def test_too_large():
+    cache = ValueCache(max_bytes=100)
+    cache.put("a", np.zeros(100))
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_discard_and_stats():
+    cache = ValueCache()
+    cache.put(("x", (1,), 1), 1)
+    cache.put(("x", (2,), 2), 2)
+
+    cache.discard(lambda key: key[2] != 2)
+    assert cache.get(("x", (1,), 1)) is None
+    assert cache.get(("x", (2,), 2)) == 2
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_overwritten_value():
+    cache = ValueCache()
+    key = (10, "Model1.Space1.Cells1", 1, True)
+    cache.put(key, 1)
+    generation = cache.generation
+
+    # Cells1[1] = 5 is executed, which keeps the key
+    cache.clear()
+    assert cache.get(key) is None
+
+    cache.put(key, 1, generation)   # Requested before the execution
+    assert key not in cache
+
+    cache.put(key, 5, cache.generation)
+    assert cache.get(key) == 5
+
+
+def test_model_value_key():
+    get_key = ModelValueCache.get_key
+
+    key = get_key(MODELLIST, "Model2.Space1.Cells1", "(1, 'a')", True)
+    assert key == (20, "Model2.Space1.Cells1", (1, 'a'), True)
+
+    # calc is in the key
+    assert get_key(MODELLIST, "Model2.Space1.x", "", False) != get_key(
+        MODELLIST, "Model2.Space1.x", "", True)
+
+    # Not in the model list
+    assert get_key(MODELLIST, "Model3.Space1.x", "", True) is None
+    assert get_key([None], "Model1.Space1.x", "", True) is None
+
+    # Unhashable arguments
+    assert get_key(MODELLIST, "Model1.Space1.Cells1", "[1]", True) is None
+
+
+def test_model_value_result():
+    cache = ModelValueCache()
+    key = cache.get_key(MODELLIST, "Model1.Space1.Cells1", "1", True)
+    assert cache.get_result(key) is None
+
+    # Cached whether calculated or not, and not calculated when reused
+    cache.put_value(key, 2)
+    assert cache.get_result(key) == [2, False]
+
+    cache.put_value(None, 3)
+    assert len(cache) == 1
+    assert cache.get_result(None) is None
+
+
+def test_discard_models():
+    cache = ModelValueCache()
+    key1 = cache.get_key(MODELLIST, "Model1.x", "", True)
+    key2 = cache.get_key(MODELLIST, "Model2.x", "", True)
+    cache.put_value(key1, 1)
+    cache.put_value(key2, 2)
+
+    # Model1 is closed and the tree is updated
+    cache.discard_models(set(m["id"] for m in MODELLIST[2:] if m))
+    assert key1 not in cache
+    assert cache.get_result(key2) == [2, False]
+
+
+if __name__ == "__main__":
+    pytest.main()
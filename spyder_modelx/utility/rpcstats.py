@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import math
+from collections import deque
+
+# Measurements of each request
+FIELDS = ("wall", "kernel", "nbytes", "decode")
+
+
+def percentile(values, q):
+    """Returns the q-th percentile of values by the nearest-rank method"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class RpcStats:
+    """Statistics of requests to the kernel
+
+    Requests are grouped by the names of the methods and the msgtypes.
+    The latest ``maxlen`` measurements are kept for each group.
+    Times are in seconds and payload sizes are in bytes. Measurements
+    not available for a request are ``None`` and excluded from the
+    statistics.
+    """
+
+    def __init__(self, maxlen=1000):
+        self.maxlen = maxlen
+        self._counts = {}
+        self._records = {}  # (method, msgtype) -> {field: deque}
+
+    def record(self, method, msgtype=None, **values):
+        key = (method, msgtype)
+        if key not in self._records:
+            self._counts[key] = 0
+            self._records[key] = {
+                f: deque(maxlen=self.maxlen) for f in FIELDS}
+
+        self._counts[key] += 1
+        for field, value in values.items():
+            if value is not None:
+                self._records[key][field].append(value)
+
+    def clear(self):
+        self._counts.clear()
+        self._records.clear()
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Returns a list of dicts of the statistics of each group"""
+        result = []
+        for key, records in self._records.items():
+            method, msgtype = key
+            stats = {
+                "method": method,
+                "msgtype": msgtype,
+                "count": self._counts[key]
+            }
+            for field, values in records.items():
+                stats[field] = {"p%s" % q: percentile(values, q)
+                                for q in percentiles}
+                stats[field]["max"] = max(values) if values else None
+                stats[field]["total"] = sum(values)
+
+            result.append(stats)
+
+        return sorted(result, key=lambda s: -s["wall"]["total"])
+
+    def to_json(self, **kwargs):
+        """Returns the summary and the raw measurements in JSON"""
+        data = {
+            "summary": self.summary(),
+            "records": [
+                dict(method=method, msgtype=msgtype,
+                     **{f: list(v) for f, v in records.items()})
+                for (method, msgtype), records in self._records.items()
+            ]
+        }
+        return json.dumps(data, **kwargs)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import ast
+import sys
+from collections import OrderedDict
+
+# Sentinel for values not in caches
+_NOT_CACHED = object()
+
+
+def get_nbytes(value):
+    """Returns the approximate size of a value in bytes"""
+
+    pd = sys.modules.get("pandas")
+    np = sys.modules.get("numpy")
+
+    if pd and isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    elif pd and isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=False))
+    elif np and isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    else:
+        return sys.getsizeof(value)
+
+
+class ValueCache:
+    """LRU cache of values with a limit on their total size in bytes
+
+    Values larger than ``max_bytes`` are not cached.
+    ``generation`` is incremented each time the cache is cleared, so that
+    values requested before the cache is cleared are not put afterwards.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = OrderedDict()  # key -> (value, nbytes)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Returns the value of key and marks it as most recently used"""
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+        else:
+            self.misses += 1
+            return default
+
+    def put(self, key, value, generation=None):
+        """Save value unless the cache is cleared after generation"""
+        if generation is not None and generation != self.generation:
+            return
+        self.pop(key)
+        nbytes = get_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+
+        self._data[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, size) = self._data.popitem(last=False)
+            self.nbytes -= size
+
+    def pop(self, key):
+        if key in self._data:
+            value, nbytes = self._data.pop(key)
+            self.nbytes -= nbytes
+            return value
+
+    def discard(self, predicate):
+        """Remove values whose keys satisfy predicate"""
+        for key in [k for k in self._data if predicate(k)]:
+            self.pop(key)
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+        self.generation += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._data),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+class ModelValueCache(ValueCache):
+    """ValueCache of the values of modelx objects
+
+    The values are keyed by the ids of their models, the fullnames of
+    the objects, their arguments and ``calc`` passed to get them.
+    The keys do not change when values are calculated, so the cache
+    must be cleared when code is executed in the kernel or
+    the models are changed from the GUI.
+    """
+
+    @staticmethod
+    def get_key(modellist, fullname, args, calc):
+        """Returns the key of a value or None if it cannot be cached
+
+        ``modellist`` is the list of the dicts of the names and ids of
+        the models. ``args`` is the string of the arguments.
+        """
+        try:
+            args = ast.literal_eval(args)
+        except (ValueError, SyntaxError):
+            pass
+
+        name = fullname.split(".")[0]
+        for model in modellist:
+            if model and model["name"] == name:
+                key = (model["id"], fullname, args, bool(calc))
+                try:
+                    hash(key)
+                except TypeError:
+                    return None
+                return key
+        return None
+
+    def get_result(self, key):
+        """Returns ``[value, False]`` if key is cached, otherwise None
+
+        ``False`` tells that the value is not calculated by the request.
+        """
+        value = self.get(key, _NOT_CACHED) if key is not None else _NOT_CACHED
+        return None if value is _NOT_CACHED else [value, False]
+
+    def put_value(self, key, value, generation=None):
+        if key is not None:
+            self.put(key, value, generation)
+
+    def discard_models(self, modelids):
+        """Remove the values of the models whose ids are not in modelids"""
+        self.discard(lambda key: key[0] not in modelids)
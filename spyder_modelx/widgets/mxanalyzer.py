@@ -62,7 +62,8 @@ from qtpy.QtWidgets import (QApplication, QTreeView, QWidget, QHBoxLayout,
                             QLabel, QTabWidget, QSplitter, QVBoxLayout,
                             QGridLayout,
                             QButtonGroup, QRadioButton, QMenu)
-from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt, QObject
+from qtpy.QtCore import (QAbstractItemModel, QModelIndex, Qt, QObject,
+                         QPersistentModelIndex)
 
 import spyder
 from spyder.config.base import _, debug_print
@@ -109,6 +110,7 @@ class NodeItem(object):
         self.parentItem = parent
         self.node = data
         self.isChildLoaded = False
+        self.isChildLoading = False
         self.childItems = []
         if model is None:
             self.model = parent.model
@@ -121,26 +123,38 @@ class NodeItem(object):
             self.adjacency = parent.adjacency
 
     def childCount(self):
+        return len(self.childItems)
+
+    def hasChildren(self):
         if self.isChildLoaded:
-            return len(self.childItems)
+            return bool(self.childItems)
         else:
-            return self.node[self.adjacency + "len"]
+            return bool(self.node[self.adjacency + "len"])
 
-    def hasChildren(self):
-        return bool(self.childCount())
+    def canFetchMore(self):
+        return (not self.isChildLoaded and not self.isChildLoading
+                and self.hasChildren())
 
-    def _reloadChildren(self):
-        self.childItems.clear()
+    def fetchChildren(self, callback, errback):
+        """Get the child nodes from the kernel without blocking"""
+        self.isChildLoading = True
         sw = self.model.get_shell()
-        nodes = sw.get_adjacent(self.node['obj']['fullname'],
-                                self.node['args'], self.adjacency)
-        items = [NodeItem(node, self) for node in nodes]
-        self.childItems.extend(items)
+        sw.get_adjacent(self.node['obj']['fullname'],
+                        self.node['args'], self.adjacency,
+                        callback=callback, errback=errback)
+
+    def setChildren(self, nodes):
+        self.childItems = [NodeItem(node, self) for node in nodes]
         self.isChildLoaded = True
+        self.isChildLoading = False
+
+    def row(self):
+        if self.parentItem:
+            return self.parentItem.childItems.index(self)
+        else:
+            return 0
 
     def getChild(self, row):
-        if not self.isChildLoaded:
-            self._reloadChildren()
         return self.childItems[row]
 
     def data(self, column):
@@ -202,6 +216,40 @@ class MxAnalyzerModel(QAbstractItemModel):
     def get_shell(self):
         return self.tab.shellwidget
 
+    def hasChildren(self, parent=QModelIndex()):
+
+        if not self.rootItem:
+            return False
+        elif parent.isValid():
+            return parent.internalPointer().hasChildren()
+        else:
+            return True
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return parent.internalPointer().canFetchMore()
+        else:
+            return False
+
+    def fetchMore(self, parent):
+
+        item = parent.internalPointer()
+        index = QPersistentModelIndex(parent)
+
+        def set_children(nodes):
+            if index.isValid() and nodes:
+                self.beginInsertRows(QModelIndex(index), 0, len(nodes) - 1)
+                item.setChildren(nodes)
+                self.endInsertRows()
+            else:
+                item.setChildren(nodes)
+
+        def set_error(msg):
+            item.setChildren([])
+            self.tab.status.setText(msg)
+
+        item.fetchChildren(callback=set_children, errback=set_error)
+
     def rowCount(self, parent) -> int:  # Pure virtual
 
         if not self.rootItem:
@@ -279,7 +327,7 @@ class MxAnalyzerModel(QAbstractItemModel):
         if parentItem is None:
             return QModelIndex()
         else:
-            return self.createIndex(0, 0, parentItem)
+            return self.createIndex(parentItem.row(), 0, parentItem)
 
     def insertRows(self, rows, newitem, parent):
         # Currently called only when setting root (parent is invalid)
@@ -644,32 +692,43 @@ class MxAnalyzerTree(QTreeView):
 
     def doubleClicked_callback(self, index: QModelIndex):
 
-        import pandas as pd
-        import numpy as np
-        import numpy.ma
-
         if index.isValid() and index.column() == NodeCols.Value:
 
             item = index.internalPointer()
             obj = item.node['obj']['fullname']
             args = str(item.node['args'])
 
-            data, _ = self.shell.get_obj_value(
-                'analyze_getval', obj, args)
-
-            if isinstance(data, (pd.DataFrame, pd.Index, pd.Series)):
-                dialog = DataFrameEditor(self)
-                dialog.setup_and_check(data)
-            elif isinstance(data, (np.ndarray, np.ma.MaskedArray)):
-                dialog = ArrayEditor(self)
-                dialog.setup_and_check(data, title='', readonly=True)
-            elif isinstance(data, (list, set, tuple, dict)):
-                dialog = CollectionsEditor(self)
-                dialog.setup(data, title='', readonly=True)
-            else:
-                return
+            status = self.parent().parent().status
+            status.setText(_("Retrieving value..."))
+
+            def show_value(result):
+                status.setText("")
+                self.show_value(result[0])
+
+            self.shell.get_obj_value(
+                'analyze_getval', obj, args,
+                callback=show_value, errback=status.setText)
+
+    def show_value(self, data):
+
+        import pandas as pd
+        import numpy as np
+        import numpy.ma
+
+        if isinstance(data, (pd.DataFrame, pd.Index, pd.Series)):
+            dialog = DataFrameEditor(self)
+            # Copied as data can be shared with mx_value_cache
+            dialog.setup_and_check(data.copy())
+        elif isinstance(data, (np.ndarray, np.ma.MaskedArray)):
+            dialog = ArrayEditor(self)
+            dialog.setup_and_check(data, title='', readonly=True)
+        elif isinstance(data, (list, set, tuple, dict)):
+            dialog = CollectionsEditor(self)
+            dialog.setup(data, title='', readonly=True)
+        else:
+            return
 
-            dialog.show()
+        dialog.show()
 
     @property
     def shell(self):
@@ -42,6 +42,8 @@ from spyder.py3compat import (is_binary_string, is_string,
 from spyder.utils.icon_manager import ima
 from spyder.utils.qthelpers import add_actions, create_action, keybinding
 from spyder.plugins.variableexplorer.widgets.basedialog import BaseDialog
+from spyder_modelx.widgets.mxdataviewer.blocks import (
+    BlockCache, hsv_to_argb, number_hues, NO_COLOR)
 
 # Note: string and unicode data types will be formatted with '%s' (see below)
 SUPPORTED_FORMATS = {
@@ -128,6 +130,10 @@ class ArrayModel(QAbstractTableModel):
 
         self.dialog = parent
         self.changes = {}
+        self.bgcolors = BlockCache(
+            self._compute_bgcolors, self.ROWS_TO_LOAD, self.COLS_TO_LOAD)
+        self.texts = BlockCache(
+            self._compute_texts, self.ROWS_TO_LOAD, self.COLS_TO_LOAD)
         self.xlabels = xlabels
         self.ylabels = ylabels
         self.readonly = readonly
@@ -267,49 +273,103 @@ class ArrayModel(QAbstractTableModel):
         """Cell content."""
         if not index.isValid():
             return to_qvariant()
-        value = self.get_value(index)
-        dtn = self._data.dtype.name
-
-        # Tranform binary string to unicode so they are displayed
-        # correctly
-        if is_binary_string(value):
-            try:
-                value = to_text_string(value, 'utf8')
-            except Exception:
-                pass
 
         # Handle roles
         if role == Qt.DisplayRole:
-            if value is np.ma.masked:
-                return ''
-            else:
-                if dtn == 'object':
-                    # We don't know what's inside an object array, so
-                    # we can't trust value repr's here.
-                    return value_to_display(value)
-                else:
-                    try:
-                        return to_qvariant(self._format % value)
-                    except TypeError:
-                        self.readonly = True
-                        return repr(value)
+            return to_qvariant(self.texts.get(index.row(), index.column()))
         elif role == Qt.TextAlignmentRole:
             return to_qvariant(int(Qt.AlignCenter|Qt.AlignVCenter))
         elif (role == Qt.BackgroundColorRole and self.bgcolor_enabled
-              and value is not np.ma.masked and not self.has_inf):
-            try:
-                hue = (self.hue0 +
-                       self.dhue * (float(self.vmax) - self.color_func(value))
-                       / (float(self.vmax) - self.vmin))
-                hue = float(np.abs(hue))
-                color = QColor.fromHsvF(hue, self.sat, self.val, self.alp)
-                return to_qvariant(color)
-            except (TypeError, ValueError):
+              and not self.has_inf
+              and self.get_value(index) is not np.ma.masked):
+            argb = self.bgcolors.get(index.row(), index.column())
+            if argb is None or argb == NO_COLOR:
                 return to_qvariant()
+            return to_qvariant(QColor.fromRgba(int(argb)))
         elif role == Qt.FontRole:
             return to_qvariant(get_font(font_size_delta=DEFAULT_SMALL_DELTA))
         return to_qvariant()
 
+    def get_block(self, row0, row1, col0, col1):
+        """Values of a block with the changes applied (mx change)
+
+        Returns None if the values are not available yet.
+        """
+        data = self._data if self._data.ndim == 2 else self._data[np.newaxis]
+        block = data[row0:row1, col0:col1].copy()
+        for (i, j), value in self.changes.items():
+            if row0 <= i < row1 and col0 <= j < col1:
+                block[i - row0, j - col0] = value
+        return block
+
+    def format_value(self, value):
+        """Text of a value (mx change)"""
+        # Tranform binary string to unicode so they are displayed
+        # correctly
+        if is_binary_string(value):
+            try:
+                value = to_text_string(value, 'utf8')
+            except Exception:
+                pass
+
+        if value is np.ma.masked:
+            return ''
+        elif self._data.dtype.name == 'object':
+            # We don't know what's inside an object array, so
+            # we can't trust value repr's here.
+            return value_to_display(value)
+        else:
+            try:
+                return self._format % value
+            except TypeError:
+                self.readonly = True
+                return repr(value)
+            except ValueError:
+                # may happen if format = '%d' and value = NaN
+                return repr(value)
+
+    def _compute_texts(self, row0, row1, col0, col1):
+        """Texts of the values in a block (mx change)
+
+        Blocks of real numbers are formatted at once by ``np.char.mod``,
+        and the other blocks value by value.
+        """
+        block = self.get_block(row0, row1, col0, col1)
+        if block is None:
+            return None
+        texts = np.empty((row1 - row0, col1 - col0), dtype=object)
+        rows, cols = block.shape
+        if block.dtype.kind in "biuf":
+            try:
+                formatted = np.char.mod(self._format, np.asarray(block))
+                texts[:rows, :cols] = np.where(
+                    np.ma.getmaskarray(block), '', formatted)
+                return texts
+            except (ValueError, TypeError):
+                pass
+        for i in range(rows):
+            for j in range(cols):
+                texts[i, j] = self.format_value(block[i, j])
+        return texts
+
+    def _compute_bgcolors(self, row0, row1, col0, col1):
+        """Background colors of a block as packed ARGB (mx change)"""
+        block = self.get_block(row0, row1, col0, col1)
+        if block is None:
+            return None
+        colors = np.full((row1 - row0, col1 - col0), NO_COLOR,
+                         dtype=np.uint32)
+        try:
+            hues = number_hues(self.color_func(block), float(self.vmax),
+                               self.vmin, self.hue0, self.dhue)
+        except (TypeError, ValueError):
+            return colors
+        argb = hsv_to_argb(hues, self.sat, self.val, self.alp)
+        masked = np.ma.getmaskarray(block)
+        colors[:block.shape[0], :block.shape[1]] = np.where(
+            masked, NO_COLOR, argb)
+        return colors
+
     def setData(self, index, value, role=Qt.EditRole):
         """Cell content change"""
         if not index.isValid() or self.readonly:
@@ -348,6 +408,8 @@ class ArrayModel(QAbstractTableModel):
 
         # Add change to self.changes
         self.changes[(i, j)] = val
+        self.bgcolors.clear()
+        self.texts.clear()
         self.dataChanged.emit(index, index)
 
         if not is_string(val):
@@ -379,6 +441,8 @@ class ArrayModel(QAbstractTableModel):
             return to_qvariant(labels[section])
 
     def reset(self):
+        self.bgcolors.clear()
+        self.texts.clear()
         self.beginResetModel()
         self.endResetModel()
 
@@ -543,10 +607,8 @@ class ArrayView(QTableView):
         else:
             QTableView.keyPressEvent(self, event)
 
-    def _sel_to_text(self, cell_range):
-        """Copy an array portion to a unicode string"""
-        if not cell_range:
-            return
+    def _sel_to_rect(self, cell_range):
+        """Returns the rows and columns of the cells to copy (mx change)"""
         row_min, row_max, col_min, col_max = get_idx_rect(cell_range)
         if col_min == 0 and col_max == (self.model().cols_loaded-1):
             # we've selected a whole column. It isn't possible to
@@ -555,11 +617,23 @@ class ArrayView(QTableView):
             col_max = self.model().total_cols-1
         if row_min == 0 and row_max == (self.model().rows_loaded-1):
             row_max = self.model().total_rows-1
+        return row_min, row_max, col_min, col_max
+
+    def _sel_to_text(self, cell_range):
+        """Copy an array portion to a unicode string"""
+        if not cell_range:
+            return
+        row_min, row_max, col_min, col_max = self._sel_to_rect(cell_range)
 
         _data = self.model().get_data()
+        return self._array_to_text(
+            _data[row_min:row_max+1, col_min:col_max+1])
+
+    def _array_to_text(self, data):
+        """Convert a 2 dimensional array to a unicode string (mx change)"""
         output = io.BytesIO()
         try:
-            np.savetxt(output, _data[row_min:row_max+1, col_min:col_max+1],
+            np.savetxt(output, data,
                        delimiter='\t', fmt=self.model().get_format())
         except:
             QMessageBox.warning(self, _("Warning"),
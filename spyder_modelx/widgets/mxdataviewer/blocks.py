@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Block-wise computation of what the data viewers show in cells
+
+The models of the data viewers compute the values to show in the cells
+of a block of rows and columns at once with NumPy, and look them up
+in :class:`BlockCache` when Qt asks for them.
+This module does not depend on Qt.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+# Packed ARGB of cells without background colors
+NO_COLOR = 0
+
+
+class BlockCache:
+    """Cache of the arrays computed for the blocks of a table
+
+    The table is divided into blocks of ``rows`` by ``cols`` cells, and
+    ``compute(row0, row1, col0, col1)`` is called to get the array of
+    a block when a cell in the block is first looked up. ``compute``
+    returns None if the block is not available yet, and is called
+    again the next time. The last ``maxblocks`` blocks looked up are kept.
+    """
+
+    def __init__(self, compute, rows, cols, maxblocks=64):
+        self.compute = compute
+        self.rows = rows
+        self.cols = cols
+        self.maxblocks = maxblocks
+        self._blocks = OrderedDict()
+
+    def get(self, row, col):
+        """Returns the element of a cell or None if not available"""
+        key = (row // self.rows, col // self.cols)
+        block = self._blocks.get(key)
+        if block is None:
+            row0, col0 = key[0] * self.rows, key[1] * self.cols
+            block = self.compute(row0, row0 + self.rows,
+                                 col0, col0 + self.cols)
+            if block is None:
+                return None
+            self._blocks[key] = block
+            if len(self._blocks) > self.maxblocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(key)
+
+        return block[row - key[0] * self.rows, col - key[1] * self.cols]
+
+    def clear(self):
+        self._blocks.clear()
+
+
+def _to_byte(value):
+    return np.rint(np.asarray(value) * 255).astype(np.uint32)
+
+
+def hsv_to_argb(hue, saturation, value, alpha):
+    """Returns HSV colors as packed 32-bit ARGB integers
+
+    Same as ``QColor.fromHsvF(hue, saturation, value, alpha).rgba()``
+    for each element of ``hue`` except for rounding. The elements not
+    in [0, 1], such as NaN, are ``NO_COLOR``, as such hues are invalid
+    in QColor.
+    """
+    hue = np.asarray(hue, dtype=float)
+    with np.errstate(invalid="ignore"):
+        valid = (hue >= 0) & (hue <= 1)
+    h = np.where(valid, hue, 0.0) * 6
+    sector = np.floor(h)
+    f = h - sector
+    sector = sector.astype(np.int64) % 6
+
+    p = value * (1 - saturation)
+    q = value * (1 - saturation * f)
+    t = value * (1 - saturation * (1 - f))
+    red = np.choose(sector, [value, q, p, p, t, value])
+    green = np.choose(sector, [t, value, value, q, p, p])
+    blue = np.choose(sector, [p, p, t, value, value, q])
+
+    argb = (_to_byte(alpha) << 24 | _to_byte(red) << 16
+            | _to_byte(green) << 8 | _to_byte(blue))
+    return np.where(valid, argb, NO_COLOR).astype(np.uint32)
+
+
+def number_hues(values, vmax, vmin, hue0, dhue):
+    """Returns the hues of numbers between vmin and vmax
+
+    The hue of ``vmax`` is ``hue0`` and the hue of ``vmin`` is
+    ``hue0 + dhue``. ``vmax`` and ``vmin`` can be arrays of
+    the maximums and minimums of the columns. The hues are absolute
+    values, and the hues of NaN are NaN.
+    """
+    diff = np.asarray(vmax, dtype=float) - vmin
+    diff = np.where(diff == 0, 1.0, diff)
+    with np.errstate(invalid="ignore", over="ignore"):
+        return np.abs(hue0 + dhue * (vmax - np.asarray(values, dtype=float))
+                      / diff)
@@ -60,6 +60,10 @@ from spyder.utils.qthelpers import (add_actions, create_action,
                                     keybinding, qapplication)
 from spyder.plugins.variableexplorer.widgets.arrayeditor import get_idx_rect
 from spyder.plugins.variableexplorer.widgets.basedialog import BaseDialog
+from spyder_modelx.mxkernelext import _column_max_min
+from spyder_modelx.widgets.mxdataviewer.blocks import (
+    BlockCache, hsv_to_argb, number_hues, NO_COLOR)
+from spyder_modelx.widgets.mxworker import MxWorker
 
 # Supported Numbers and complex numbers
 REAL_NUMBER_TYPES = (float, int, np.int64, np.int32)
@@ -107,6 +111,31 @@ def global_max(col_vals, index):
     return max(max_col), min(min_col)
 
 
+def sort_positions(df, keys):
+    """Returns the positions of the rows of df in sorted order (mx change)
+
+    ``keys`` is a list of pairs of a column position, or -1 for the index,
+    and True for ascending order or False for descending order.
+    The rows are sorted stably as ``df.sort_values`` does, but only
+    the key columns are copied and df is not changed.
+    """
+    columns, ascending = [], []
+    for column, asc in keys:
+        if column < 0:
+            for level in range(df.index.nlevels):
+                columns.append(pd.Series(df.index.get_level_values(level)))
+                ascending.append(asc)
+        else:
+            columns.append(pd.Series(df.iloc[:, column].array))
+            ascending.append(asc)
+
+    # Positional labels, as the labels of df can be duplicated
+    keyframe = pd.concat(columns, axis=1, ignore_index=True)
+    keyframe = keyframe.sort_values(by=list(keyframe.columns),
+                                    ascending=ascending, kind='mergesort')
+    return keyframe.index.to_numpy()
+
+
 class DataFrameModel(QAbstractTableModel):
     """
     DataFrame Table Model.
@@ -118,15 +147,27 @@ class DataFrameModel(QAbstractTableModel):
     https://github.com/wavexx/gtabview/blob/master/gtabview/models.py
     """
 
-    def __init__(self, dataFrame, format=DEFAULT_FORMAT, parent=None):
+    # Emitted when max_min_col is set in the background (mx change)
+    sig_max_min_updated = Signal()
+
+    def __init__(self, dataFrame, format=DEFAULT_FORMAT, parent=None,
+                 readonly=False):
         QAbstractTableModel.__init__(self)
         self.dialog = parent
+        self.worker = None
         self.df = dataFrame
+        self.readonly = readonly    # mx change
+        self.order = None   # Positions of the rows sorted. See sort
+        self.sort_keys = []
         self.df_columns_list = None
         self.df_index_list = None
         self._format = format
         self.complex_intran = None
         self.display_error_idxs = []
+        self.bgcolors = BlockCache(
+            self._compute_bgcolors, ROWS_TO_LOAD, COLS_TO_LOAD)
+        self.texts = BlockCache(
+            self._compute_texts, ROWS_TO_LOAD, COLS_TO_LOAD)
 
         self.total_rows = self.df.shape[0]
         self.total_cols = self.df.shape[1]
@@ -139,9 +180,11 @@ class DataFrameModel(QAbstractTableModel):
             self.bgcolor_enabled = True
             self.colum_avg(1)
         else:
+            # Enabled by MxDataFrameViewer when max_min_col is set
             self.colum_avg_enabled = False
             self.bgcolor_enabled = False
             self.colum_avg(0)
+            self.update_max_min()
 
         # Use paging when the total size, number of rows or number of
         # columns is too large
@@ -212,6 +255,8 @@ class DataFrameModel(QAbstractTableModel):
         The value corresponds to the header of column or row x in the
         given level.
         """
+        if axis == 1:   # mx change
+            x = self.position(x)
         ax = self._axis(axis)
         if not hasattr(ax, 'levels'):
             ax = self._axis_list(axis)
@@ -240,24 +285,47 @@ class DataFrameModel(QAbstractTableModel):
         minimum of the absolute values. If vmax equals vmin, then vmin is
         decreased by one.
         """
-        if self.df.shape[0] == 0: # If no rows to compute max/min then return
+        # mx change: Computed by chunks of rows. See _column_max_min
+        max_min_col = _column_max_min(self.df)
+        if max_min_col is not None:  # None if no rows
+            self.max_min_col = max_min_col
+
+    def update_max_min(self):
+        """Update max_min_col in a worker thread if large (mx change)
+
+        ``sig_max_min_updated`` is emitted when the update is done
+        in the worker thread.
+        """
+        if self.total_rows * self.total_cols < LARGE_SIZE:
+            self.max_min_col_update()
             return
-        self.max_min_col = []
-        for dummy, col in self.df.items():
-            if col.dtype in REAL_NUMBER_TYPES + COMPLEX_NUMBER_TYPES:
-                if col.dtype in REAL_NUMBER_TYPES:
-                    vmax = col.max(skipna=True)
-                    vmin = col.min(skipna=True)
-                else:
-                    vmax = col.abs().max(skipna=True)
-                    vmin = col.abs().min(skipna=True)
-                if vmax != vmin:
-                    max_min = [vmax, vmin]
-                else:
-                    max_min = [vmax, vmin - 1]
-            else:
-                max_min = None
-            self.max_min_col.append(max_min)
+
+        if self.worker is None:
+            self.worker = MxWorker(self)
+        # A shallow copy is not changed by sorting in place
+        df = self.df.copy(deep=False)
+        self.worker.submit(
+            lambda: _column_max_min(df),
+            callback=lambda max_min: self.set_max_min(max_min, len(df)))
+
+    def set_max_min(self, max_min, nrows=None):
+        """Set max_min_col computed in the background (mx change)
+
+        ``nrows`` is the number of the rows the values are computed from.
+        If rows are appended after that, the values are computed again.
+        """
+        if nrows is not None and nrows != self.total_rows:
+            self.update_max_min()
+            return
+        if max_min is None:
+            return
+        self.max_min_col = max_min
+        self.bgcolors.clear()
+        self.sig_max_min_updated.emit()
+        if self.bgcolor_enabled and self.rowCount() and self.columnCount():
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(self.rowCount() - 1, self.columnCount() - 1))
 
     def get_format(self):
         """Return current format"""
@@ -285,38 +353,66 @@ class DataFrameModel(QAbstractTableModel):
 
     def get_bgcolor(self, index):
         """Background color depending on value."""
-        column = index.column()
         if not self.bgcolor_enabled:
             return
-        value = self.get_value(index.row(), column)
-        if self.max_min_col[column] is None or pd.isna(value):
+        argb = self.bgcolors.get(index.row(), index.column())
+        if argb is None or argb == NO_COLOR:
+            return
+        return QColor.fromRgba(int(argb))
+
+    def _compute_bgcolors(self, row0, row1, col0, col1):
+        """Background colors of a block as packed ARGB (mx change)
+
+        Computes the colors of the cells in the block column by column
+        at once, as :meth:`get_bgcolor` used to compute cell by cell.
+        """
+        nonnumber = []
+        for alpha in (BACKGROUND_STRING_ALPHA, BACKGROUND_MISC_ALPHA):
             color = QColor(BACKGROUND_NONNUMBER_COLOR)
-            if is_text_string(value):
-                color.setAlphaF(BACKGROUND_STRING_ALPHA)
-            else:
-                color.setAlphaF(BACKGROUND_MISC_ALPHA)
-        else:
-            if isinstance(value, COMPLEX_NUMBER_TYPES):
-                color_func = abs
-            else:
-                color_func = float
-            vmax, vmin = self.return_max(self.max_min_col, column)
-            if vmax - vmin == 0:
-                vmax_vmin_diff = 1.0
+            color.setAlphaF(alpha)
+            nonnumber.append(color.rgba())
+        string_argb, misc_argb = nonnumber
+
+        block = self.get_block(row0, row1, col0, col1)
+        if block is None:
+            return None
+        colors = np.full((row1 - row0, col1 - col0), NO_COLOR,
+                         dtype=np.uint32)
+        for j in range(block.shape[1]):
+            col = block.iloc[:, j]
+            column = col0 + j
+            if self.max_min_col[column] is None:
+                is_text = [is_text_string(value) for value in col]
+                colors[:len(col), j] = np.where(is_text, string_argb,
+                                                misc_argb)
             else:
-                vmax_vmin_diff = vmax - vmin
-            hue = (BACKGROUND_NUMBER_MINHUE + BACKGROUND_NUMBER_HUERANGE *
-                   (vmax - color_func(value)) / (vmax_vmin_diff))
-            hue = float(abs(hue))
-            if hue > 1:
-                hue = 1
-            color = QColor.fromHsvF(hue, BACKGROUND_NUMBER_SATURATION,
-                                    BACKGROUND_NUMBER_VALUE,
-                                    BACKGROUND_NUMBER_ALPHA)
-        return color
+                values = col.to_numpy()
+                if col.dtype in COMPLEX_NUMBER_TYPES:
+                    values = np.abs(values)
+                vmax, vmin = self.return_max(self.max_min_col, column)
+                hues = np.minimum(number_hues(
+                    values, vmax, vmin, BACKGROUND_NUMBER_MINHUE,
+                    BACKGROUND_NUMBER_HUERANGE), 1)
+                argb = hsv_to_argb(hues, BACKGROUND_NUMBER_SATURATION,
+                                   BACKGROUND_NUMBER_VALUE,
+                                   BACKGROUND_NUMBER_ALPHA)
+                colors[:len(col), j] = np.where(pd.isna(values), misc_argb,
+                                                argb)
+        return colors
+
+    def position(self, row):
+        """Position in the DataFrame of a row in the view (mx change)"""
+        return row if self.order is None else self.order[row]
+
+    def positions(self, row0, row1):
+        """Positions in the DataFrame of rows in the view (mx change)"""
+        if self.order is None:
+            return slice(row0, row1)
+        return self.order[row0:row1]
 
     def get_value(self, row, column):
         """Return the value of the DataFrame."""
+        row = self.position(row)    # mx change
         # To increase the performance iat is used but that requires error
         # handling, so fallback uses iloc
         try:
@@ -327,33 +423,68 @@ class DataFrameModel(QAbstractTableModel):
             value = self.df.iloc[row, column]
         return value
 
+    def get_block(self, row0, row1, col0, col1):
+        """DataFrame of the values in a block (mx change)
+
+        Returns None if the values are not available yet.
+        """
+        return self.df.iloc[self.positions(row0, row1), col0:col1]
+
+    def format_value(self, value):
+        """Text of a value, or None if it cannot be displayed (mx change)"""
+        if isinstance(value, float):
+            try:
+                return self._format % value
+            except (ValueError, TypeError):
+                # may happen if format = '%d' and value = NaN;
+                # see spyder-ide/spyder#4139.
+                return DEFAULT_FORMAT % value
+        elif is_type_text_string(value):
+            # Don't perform any conversion on strings
+            # because it leads to differences between
+            # the data present in the dataframe and
+            # what is shown by Spyder
+            return value
+        else:
+            try:
+                return to_text_string(value)
+            except Exception:
+                return None
+
+    def _compute_texts(self, row0, row1, col0, col1):
+        """Texts of the values in a block (mx change)
+
+        Float columns are formatted at once by ``np.char.mod``,
+        and the other columns value by value.
+        """
+        block = self.get_block(row0, row1, col0, col1)
+        if block is None:
+            return None
+        texts = np.empty((row1 - row0, col1 - col0), dtype=object)
+        for j in range(block.shape[1]):
+            col = block.iloc[:, j]
+            if col.dtype == np.float64:
+                try:
+                    texts[:len(col), j] = np.char.mod(
+                        self._format, col.to_numpy())
+                    continue
+                except (ValueError, TypeError):
+                    pass
+            # Same types of values as get_value
+            texts[:len(col), j] = [self.format_value(value)
+                                   for value in col.array]
+        return texts
+
     def data(self, index, role=Qt.DisplayRole):
         """Cell content"""
         if not index.isValid():
             return to_qvariant()
         if role == Qt.DisplayRole or role == Qt.EditRole:
-            column = index.column()
-            row = index.row()
-            value = self.get_value(row, column)
-            if isinstance(value, float):
-                try:
-                    return to_qvariant(self._format % value)
-                except (ValueError, TypeError):
-                    # may happen if format = '%d' and value = NaN;
-                    # see spyder-ide/spyder#4139.
-                    return to_qvariant(DEFAULT_FORMAT % value)
-            elif is_type_text_string(value):
-                # Don't perform any conversion on strings
-                # because it leads to differences between
-                # the data present in the dataframe and
-                # what is shown by Spyder
-                return value
-            else:
-                try:
-                    return to_qvariant(to_text_string(value))
-                except Exception:
-                    self.display_error_idxs.append(index)
-                    return u'Display Error!'
+            text = self.texts.get(index.row(), index.column())
+            if text is None:
+                self.display_error_idxs.append(index)
+                return u'Display Error!'
+            return to_qvariant(text)
         elif role == Qt.BackgroundColorRole:
             return to_qvariant(self.get_bgcolor(index))
         elif role == Qt.FontRole:
@@ -366,53 +497,77 @@ class DataFrameModel(QAbstractTableModel):
 
     def recalculate_index(self):
         """Recalcuate index information."""
-        self.df_index_list = self.df.index.tolist()
+        # mx change: Sorting does not change the index. Listed on demand
+        self.df_index_list = None
 
-    def sort(self, column, order=Qt.AscendingOrder):
-        """Overriding sort method"""
+    def sort(self, column, order=Qt.AscendingOrder, add_key=False):
+        """Overriding sort method (mx change)
+
+        The DataFrame is not changed, and the rows are shown in
+        the order of ``self.order``. If ``add_key`` is True, the rows are
+        sorted by the columns sorted by before and then by ``column``.
+        """
         if self.complex_intran is not None:
             if self.complex_intran.any(axis=0).iloc[column]:
                 QMessageBox.critical(self.dialog, "Error",
                                      "TypeError error: no ordering "
                                      "relation is defined for complex numbers")
                 return False
-        try:
-            ascending = order == Qt.AscendingOrder
-            if column >= 0:
-                try:
-                    self.df.sort_values(by=self.df.columns[column],
-                                        ascending=ascending, inplace=True,
-                                        kind='mergesort')
-                except AttributeError:
-                    # for pandas version < 0.17
-                    self.df.sort(columns=self.df.columns[column],
-                                 ascending=ascending, inplace=True,
-                                 kind='mergesort')
-                except ValueError as e:
-                    # Not possible to sort on duplicate columns
-                    # See spyder-ide/spyder#5225.
-                    QMessageBox.critical(self.dialog, "Error",
-                                         "ValueError: %s" % to_text_string(e))
-                except SystemError as e:
-                    # Not possible to sort on category dtypes
-                    # See spyder-ide/spyder#5361.
-                    QMessageBox.critical(self.dialog, "Error",
-                                         "SystemError: %s" % to_text_string(e))
-            else:
-                # Update index list
-                self.recalculate_index()
-                # To sort by index
-                self.df.sort_index(inplace=True, ascending=ascending)
-        except TypeError as e:
-            QMessageBox.critical(self.dialog, "Error",
-                                 "TypeError error: %s" % str(e))
-            return False
+        ascending = order == Qt.AscendingOrder
+        if add_key:
+            keys = [key for key in self.sort_keys if key[0] != column]
+        else:
+            keys = []
+        keys.append((column, ascending))
+        return self.sort_by(keys)
 
-        self.reset()
+    def sort_by(self, keys):
+        """Sort the rows by keys, in a worker thread if large (mx change)
+
+        See sort_positions for ``keys``. Returns False if the rows
+        cannot be sorted here, and True otherwise.
+        """
+        if self.total_rows * self.total_cols < LARGE_SIZE:
+            try:
+                positions = sort_positions(self.df, keys)
+            except (TypeError, ValueError) as e:
+                self.sort_failed(e)
+                return False
+            self.set_order(positions, keys)
+            return True
+
+        if self.worker is None:
+            self.worker = MxWorker(self)
+        # A shallow copy is not changed by appending rows
+        df = self.df.copy(deep=False)
+        self.worker.submit(
+            lambda: sort_positions(df, keys),
+            callback=lambda positions: self.set_order(
+                positions, keys, len(df)),
+            errback=self.sort_failed)
         return True
 
+    def set_order(self, positions, keys, nrows=None):
+        """Show the rows in the order of positions (mx change)
+
+        ``nrows`` is the number of the rows sorted. If rows are appended
+        after that, the rows are sorted again.
+        """
+        if nrows is not None and nrows != self.total_rows:
+            self.sort_by(keys)
+            return
+        self.order = positions
+        self.sort_keys = keys
+        self.reset()
+
+    def sort_failed(self, error):
+        QMessageBox.critical(self.dialog, "Error", "%s: %s" % (
+            type(error).__name__, to_text_string(error)))
+
     def flags(self, index):
         """Set flags"""
+        if self.readonly:   # mx change
+            return QAbstractTableModel.flags(self, index)
         return Qt.ItemFlags(int(QAbstractTableModel.flags(self, index) |
                                 Qt.ItemIsEditable))
 
@@ -421,7 +576,7 @@ class DataFrameModel(QAbstractTableModel):
         column = index.column()
         row = index.row()
 
-        if index in self.display_error_idxs:
+        if self.readonly or index in self.display_error_idxs:
             return False
         if change_type is not None:
             try:
@@ -429,9 +584,15 @@ class DataFrameModel(QAbstractTableModel):
                 val = from_qvariant(value, str)
                 if change_type is bool:
                     val = bool_false_check(val)
-                self.df.iloc[row, column] = change_type(val)
+                self.df.iloc[self.position(row), column] = change_type(val)
             except ValueError:
-                self.df.iloc[row, column] = change_type('0')
+                try:
+                    self.df.iloc[self.position(row), column] = (
+                        change_type('0'))
+                except ValueError as e:     # mx change: Read-only data
+                    QMessageBox.critical(self.dialog, "Error",
+                                         str(type(e).__name__) + ": " + str(e))
+                    return False
         else:
             val = from_qvariant(value, str)
             current_value = self.get_value(row, column)
@@ -441,7 +602,8 @@ class DataFrameModel(QAbstractTableModel):
             if (isinstance(current_value, supported_types) or
                     is_text_string(current_value)):
                 try:
-                    self.df.iloc[row, column] = current_value.__class__(val)
+                    self.df.iloc[self.position(row), column] = (
+                        current_value.__class__(val))
                 except (ValueError, OverflowError) as e:
                     QMessageBox.critical(self.dialog, "Error",
                                          str(type(e).__name__) + ": " + str(e))
@@ -451,7 +613,9 @@ class DataFrameModel(QAbstractTableModel):
                                      "Editing dtype {0!s} not yet supported."
                                      .format(type(current_value).__name__))
                 return False
-        self.max_min_col_update()
+        self.update_max_min()
+        self.bgcolors.clear()
+        self.texts.clear()
         self.dataChanged.emit(index, index)
         return True
 
@@ -459,6 +623,38 @@ class DataFrameModel(QAbstractTableModel):
         """Return data"""
         return self.df
 
+    def append_rows(self, data):
+        """Append rows to the dataframe (mx change)
+
+        Used to show a dataframe while its rows are being received.
+        """
+        count = self.rowCount()
+        total_rows = self.total_rows + data.shape[0]
+        new_count = min(total_rows, max(self.rows_loaded, count))
+
+        if new_count > count:
+            self.beginInsertRows(QModelIndex(), count, new_count - 1)
+        self.df = pd.concat([self.df, data])
+        self.df_index_list = None
+        if self.order is not None:
+            # Appended rows are shown at the end as they are
+            self.order = np.concatenate(
+                [self.order, np.arange(self.total_rows, total_rows)])
+        self.total_rows = total_rows
+        if new_count > count:
+            self.endInsertRows()
+
+        if self.max_min_col is not None:
+            for max_min, (dummy, col) in zip(self.max_min_col, data.items()):
+                if max_min is None:
+                    continue
+                if col.dtype in COMPLEX_NUMBER_TYPES:
+                    col = col.abs()
+                max_min[0] = max(max_min[0], col.max(skipna=True))
+                max_min[1] = min(max_min[1], col.min(skipna=True))
+        self.bgcolors.clear()
+        self.texts.clear()
+
     def rowCount(self, index=QModelIndex()):
         """DataFrame row number"""
         # Avoid a "Qt exception in virtual methods" generated in our
@@ -496,7 +692,8 @@ class DataFrameModel(QAbstractTableModel):
         # See spyder-ide/spyder#8910.
         try:
             # This is done to implement series
-            if len(self.df.shape) == 1:
+            # mx change: shape instead of df.shape for remote models
+            if len(self.shape) == 1:
                 return 2
             elif self.total_cols <= self.cols_loaded:
                 return self.total_cols
@@ -506,6 +703,8 @@ class DataFrameModel(QAbstractTableModel):
             return 0
 
     def reset(self):
+        self.bgcolors.clear()
+        self.texts.clear()
         self.beginResetModel()
         self.endResetModel()
 
@@ -581,7 +780,9 @@ class DataFrameView(QTableView, SpyderConfigurationAccessor):
         if self.sort_old == [None]:
             self.header_class.setSortIndicatorShown(True)
         sort_order = self.header_class.sortIndicatorOrder()
-        if not self.model().sort(index, sort_order):
+        # mx change: Shift-click to sort by more columns
+        add_key = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+        if not self.model().sort(index, sort_order, add_key=add_key):
             if len(self.sort_old) != 2:
                 self.header_class.setSortIndicatorShown(False)
             else:
@@ -630,12 +831,23 @@ class DataFrameView(QTableView, SpyderConfigurationAccessor):
             return
         (row_min, row_max,
          col_min, col_max) = get_idx_rect(self.selectedIndexes())
+        df = self.model().df
+        if df is None:  # mx change: Retrieve data kept in the kernel
+            self.model().blocks.get_window(
+                row_min, row_max + 1, col_min, col_max + 1,
+                callback=self._frame_to_clipboard,
+                errback=lambda msg: QMessageBox.critical(
+                    self, _("Error"), msg))
+            return
+        self._frame_to_clipboard(
+            df.iloc[self.model().positions(row_min, row_max + 1),
+                    slice(col_min, col_max + 1)])
+
+    def _frame_to_clipboard(self, obj):
+        """Copy the text of a DataFrame to clipboard (mx change)"""
         # Copy index and header too (equal True).
         # See spyder-ide/spyder#11096
         index = header = True
-        df = self.model().df
-        obj = df.iloc[slice(row_min, row_max + 1),
-                      slice(col_min, col_max + 1)]
         output = io.StringIO()
         try:
             obj.to_csv(output, sep='\t', index=index, header=header)
@@ -744,6 +956,21 @@ class DataFrameHeaderModel(QAbstractTableModel):
         self.model.sort(self.COLUMN_INDEX, order=ascending)
         return True
 
+    def append_rows(self):
+        """Update the index after rows are appended to the model (mx change)"""
+        if self.axis == 0:
+            return
+        count = self.rowCount()
+        total_rows = self.model.shape[0]
+        new_count = min(total_rows, max(self.rows_loaded, count))
+
+        if new_count > count:
+            self.beginInsertRows(QModelIndex(), count, new_count - 1)
+        self.total_rows = total_rows
+        self._shape = (total_rows, self._shape[1])
+        if new_count > count:
+            self.endInsertRows()
+
     def headerData(self, section, orientation, role):
         """Get the information to put in the header."""
         if role == Qt.TextAlignmentRole:
@@ -898,19 +1125,13 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
         self.is_series = False
         self.layout = None
 
-    def setup_and_check(self, data, title=''):
+    def setup_and_check(self, data, title='', readonly=False):
         """
         Setup DataFrameEditor:
         return False if data is not supported, True otherwise.
         Supported types for data are DataFrame, Series and Index.
+        Cells are not editable if readonly is True (mx change).
         """
-        self._selection_rec = False
-        self._model = None
-
-        self.layout = QGridLayout()
-        self.layout.setSpacing(0)
-        self.layout.setContentsMargins(20, 20, 20, 0)
-        self.setLayout(self.layout)
         if title:
             title = to_text_string(title) + " - %s" % data.__class__.__name__
         else:
@@ -921,6 +1142,21 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
         elif isinstance(data, pd.Index):
             data = pd.DataFrame(data)
 
+        return self.setup_model(
+            DataFrameModel(data, parent=self, readonly=readonly), title)
+
+    def setup_model(self, model, title=''):
+        """Setup DataFrameEditor with a model (mx change)
+
+        ``model`` is a DataFrameModel or a model with the same interface.
+        """
+        self._selection_rec = False
+        self._model = None
+
+        self.layout = QGridLayout()
+        self.layout.setSpacing(0)
+        self.layout.setContentsMargins(20, 20, 20, 0)
+        self.setLayout(self.layout)
         self.setWindowTitle(title)
 
         self.hscroll = QScrollBar(Qt.Horizontal)
@@ -936,7 +1172,7 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
         self.create_table_index()
 
         # Create the model and view of the data
-        self.dataModel = DataFrameModel(data, parent=self)
+        self.dataModel = model
         # self.dataModel.dataChanged.connect(self.save_and_close_enable)    # mx change
         self.create_data_table()
 
@@ -969,11 +1205,11 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
         btn_layout.addWidget(btn_resize)
         btn_resize.clicked.connect(self.resize_to_contents)
 
-        bgcolor = QCheckBox(_('Background color'))
-        bgcolor.setChecked(self.dataModel.bgcolor_enabled)
-        bgcolor.setEnabled(self.dataModel.bgcolor_enabled)
-        bgcolor.stateChanged.connect(self.change_bgcolor_enable)
-        btn_layout.addWidget(bgcolor)
+        self.bgcolor = QCheckBox(_('Background color'))   # mx change
+        self.bgcolor.setChecked(self.dataModel.bgcolor_enabled)
+        self.bgcolor.setEnabled(self.dataModel.bgcolor_enabled)
+        self.bgcolor.stateChanged.connect(self.change_bgcolor_enable)
+        btn_layout.addWidget(self.bgcolor)
 
         self.bgcolor_global = QCheckBox(_('Column min/max'))
         self.bgcolor_global.setChecked(self.dataModel.colum_avg_enabled)
@@ -981,6 +1217,10 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
                                        self.dataModel.bgcolor_enabled)
         self.bgcolor_global.stateChanged.connect(self.dataModel.colum_avg)
         btn_layout.addWidget(self.bgcolor_global)
+        self.dataModel.sig_max_min_updated.connect(self.enable_bgcolor)
+        # Rows can be sorted in the background
+        self.dataModel.modelReset.connect(
+            lambda: self.table_index.viewport().update())
 
         btn_layout.addStretch()
 
@@ -1006,6 +1246,13 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
 
         return True
 
+    def append_data(self, data):
+        """Append rows of a DataFrame or Series to the data (mx change)"""
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        self.dataModel.append_rows(data)
+        self.table_index.model().append_rows()
+
     @Slot(QModelIndex, QModelIndex)
     def save_and_close_enable(self, top_left, bottom_right):
         """Handle the data change event to enable the save and close button."""
@@ -1284,6 +1531,13 @@ class MxDataFrameViewer(QWidget, SpyderConfigurationAccessor):  # mx change
         self.dataModel.bgcolor(state)
         self.bgcolor_global.setEnabled(not self.is_series and state > 0)
 
+    def enable_bgcolor(self):
+        """Let background colors be turned on when the model has got
+        column min/max in the background (mx change)"""
+        self.bgcolor.setEnabled(True)
+        self.bgcolor_global.setEnabled(not self.is_series and
+                                       self.bgcolor.isChecked())
+
     def change_format(self):
         """
         Ask user for display format for floats and use it.
@@ -0,0 +1,596 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Models of values kept in MxKernel
+
+The models retrieve only the windows of the values to show from the kernel.
+See MxShellWidget.get_obj_value.
+"""
+
+from collections import OrderedDict
+
+from qtpy.compat import to_qvariant
+from qtpy.QtCore import QAbstractTableModel, QObject, Qt, Signal, Slot
+from qtpy.QtWidgets import (
+    QApplication, QCheckBox, QComboBox, QHBoxLayout, QLabel, QMessageBox,
+    QPushButton, QSpinBox, QStackedWidget, QVBoxLayout, QWidget,
+    QGridLayout)
+from spyder_kernels.utils.lazymodules import numpy as np
+from spyder.config.base import _
+
+from spyder_modelx.widgets.mxdataviewer.dataframeviewer import (
+    DataFrameModel, MxDataFrameViewer, DEFAULT_FORMAT,
+    LARGE_SIZE, LARGE_NROWS, LARGE_COLS, ROWS_TO_LOAD, COLS_TO_LOAD)
+from spyder_modelx.widgets.mxdataviewer.arrayviewer import (
+    ArrayModel, ArrayView, ArrayEditorWidget, MxArrayViewer,
+    SUPPORTED_FORMATS, is_float)
+from spyder_modelx.widgets.mxdataviewer.blocks import BlockCache
+from spyder_modelx.widgets.mxdataviewer.arrayviewer import (
+    LARGE_SIZE as ARRAY_LARGE_SIZE, LARGE_NROWS as ARRAY_LARGE_NROWS,
+    LARGE_COLS as ARRAY_LARGE_COLS)
+
+# Text shown in place of values being retrieved
+LOADING = "..."
+
+
+class MxRemoteBlocks(QObject):
+    """Blocks of a value kept in the kernel
+
+    The value is divided into blocks of ``BLOCK_ROWS`` rows and
+    ``BLOCK_COLS`` columns, and each block is retrieved from the kernel
+    when it is first accessed. The last ``MAX_BLOCKS`` blocks retrieved
+    and accessed are kept, in addition to the blocks being retrieved.
+
+    Arrays with more than 2 dimensions are divided by the 2 dimensional
+    slab set by :meth:`set_slab`.
+    """
+    BLOCK_ROWS = 200
+    BLOCK_COLS = 50
+    MAX_BLOCKS = 200
+
+    # Rows and columns of a block retrieved: row0, row1, col0, col1
+    sig_block_loaded = Signal(int, int, int, int)
+
+    def __init__(self, shellwidget, info, parent=None):
+        QObject.__init__(self, parent)
+        self.shellwidget = shellwidget
+        self.info = info
+        self.handle = info["id"]
+        self.shape = tuple(info["shape"])
+        self.errors = {}
+        self._blocks = OrderedDict()    # Block keys to windows
+        self._pending = set()           # Keys of blocks being retrieved
+
+        # [row_axis, col_axis, index] of N-D arrays. See mx_get_window
+        if "ndshape" in info:
+            ndim = len(info["ndshape"])
+            self.slab = [ndim - 2, ndim - 1, [0] * ndim]
+        else:
+            self.slab = None
+
+    def set_slab(self, row_axis, col_axis, index):
+        """Divide the slab of an N-D array at ``index`` into blocks
+
+        ``index`` is a list of the indexes of all the axes, of which
+        the indexes of ``row_axis`` and ``col_axis`` are ignored.
+        """
+        self.slab = [row_axis, col_axis, list(index)]
+        ndshape = self.info["ndshape"]
+        self.shape = (ndshape[row_axis], ndshape[col_axis])
+        self._blocks.clear()
+        self._pending.clear()
+        self.errors.clear()
+
+    def get(self, row, col):
+        """Returns the window that has a cell and the cell's position in it
+
+        Returns None if the window is not retrieved yet.
+        """
+        key = (row // self.BLOCK_ROWS, col // self.BLOCK_COLS)
+        if key not in self._blocks:
+            if key not in self._pending and key not in self.errors:
+                self._load(key)
+            return None
+
+        window = self._blocks[key]
+        self._blocks.move_to_end(key)
+        return (window,
+                row - key[0] * self.BLOCK_ROWS,
+                col - key[1] * self.BLOCK_COLS)
+
+    def _load(self, key):
+        if self.handle is None:
+            return
+        self._pending.add(key)
+        row0 = key[0] * self.BLOCK_ROWS
+        col0 = key[1] * self.BLOCK_COLS
+        slab = self.slab
+        self.shellwidget.get_window(
+            self.handle, row0, row0 + self.BLOCK_ROWS,
+            col0, col0 + self.BLOCK_COLS,
+            callback=lambda window: self._set_block(key, window, slab),
+            errback=lambda msg: self._set_error(key, msg, slab),
+            slab=slab)
+
+    def _set_block(self, key, window, slab=None):
+        if self.handle is None or slab is not self.slab:   # Closed or old
+            return
+        self._pending.discard(key)
+        self._blocks[key] = window
+        self._blocks.move_to_end(key)
+        while len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+
+        row0 = key[0] * self.BLOCK_ROWS
+        col0 = key[1] * self.BLOCK_COLS
+        self.sig_block_loaded.emit(
+            row0, row0 + self.BLOCK_ROWS, col0, col0 + self.BLOCK_COLS)
+
+    def _set_error(self, key, msg, slab=None):
+        if slab is not self.slab:
+            return
+        self._pending.discard(key)
+        self.errors[key] = msg
+
+    def get_window(self, row0, row1, col0, col1, callback, errback=None):
+        """Retrieve a window of any size, such as the cells to copy
+
+        ``callback`` is not called if the value is closed or the slab
+        is changed before the window is retrieved.
+        """
+        if self.handle is None:
+            return
+        slab = self.slab
+
+        def set_window(window):
+            if self.handle is not None and slab is self.slab:
+                callback(window)
+
+        self.shellwidget.get_window(
+            self.handle, row0, row1, col0, col1,
+            callback=set_window, errback=errback, slab=slab)
+
+    def close(self):
+        """Release the value in the kernel"""
+        if self.handle is not None:
+            self.shellwidget.close_handle(self.handle)
+            self.handle = None
+            self._blocks.clear()
+            self._pending.clear()
+
+
+def _init_paging(model, large_size, large_nrows, large_cols,
+                 rows_to_load, cols_to_load):
+    """Set rows_loaded and cols_loaded the same way as the local models"""
+    size = model.total_rows * model.total_cols
+    if size > large_size:
+        model.rows_loaded = rows_to_load
+        model.cols_loaded = cols_to_load
+    else:
+        if model.total_rows > large_nrows:
+            model.rows_loaded = rows_to_load
+        else:
+            model.rows_loaded = model.total_rows
+        if model.total_cols > large_cols:
+            model.cols_loaded = cols_to_load
+        else:
+            model.cols_loaded = model.total_cols
+
+
+def _emit_block_changed(model, row0, row1, col0, col1):
+    row1 = min(row1, model.rowCount()) - 1
+    col1 = min(col1, model.columnCount()) - 1
+    if row0 <= row1 and col0 <= col1:
+        model.dataChanged.emit(model.index(row0, col0),
+                               model.index(row1, col1))
+
+
+class RemoteDataFrameModel(DataFrameModel):
+    """DataFrameModel of a DataFrame or Series kept in the kernel
+
+    Sorting is not available. Background colors are available after
+    the kernel computes the maximums and minimums of the columns.
+    """
+
+    def __init__(self, blocks, format=DEFAULT_FORMAT, parent=None):
+        QAbstractTableModel.__init__(self)
+        self.dialog = parent
+        self.blocks = blocks
+        self.df = None
+        self.df_columns_list = blocks.info["columns"]
+        self.df_index_list = None
+        self._format = format
+        self.complex_intran = None
+        self.display_error_idxs = []
+        # Aligned with the blocks so that a block is in one window
+        self.bgcolors = BlockCache(
+            self._compute_bgcolors, blocks.BLOCK_ROWS, blocks.BLOCK_COLS)
+        self.texts = BlockCache(
+            self._compute_texts, blocks.BLOCK_ROWS, blocks.BLOCK_COLS)
+
+        self.total_rows, self.total_cols = blocks.shape
+        self.max_min_col = None
+        self.colum_avg_enabled = False
+        self.bgcolor_enabled = False
+        self.colum_avg(0)
+        self.update_max_min()
+
+        _init_paging(self, LARGE_SIZE, LARGE_NROWS, LARGE_COLS,
+                     ROWS_TO_LOAD, COLS_TO_LOAD)
+
+        blocks.sig_block_loaded.connect(
+            lambda *args: _emit_block_changed(self, *args))
+
+    @property
+    def shape(self):
+        return self.blocks.shape
+
+    @property
+    def header_shape(self):
+        return (len(self.blocks.info["column_names"]),
+                len(self.blocks.info["index_names"]))
+
+    def header(self, axis, x, level=0):
+        if axis == 0:
+            label = self.df_columns_list[x]
+            nlevels = self.header_shape[0]
+        else:
+            found = self.blocks.get(x, 0)
+            if found is None:
+                return LOADING
+            window, i, _j = found
+            label = window.index[i]
+            nlevels = self.header_shape[1]
+
+        return label[level] if nlevels > 1 else label
+
+    def name(self, axis, level):
+        if axis == 0:
+            return self.blocks.info["column_names"][level]
+        else:
+            return self.blocks.info["index_names"][level]
+
+    def get_value(self, row, column):
+        found = self.blocks.get(row, column)
+        if found is None:
+            return LOADING
+        window, i, j = found
+        return window.iat[i, j]
+
+    def get_block(self, row0, row1, col0, col1):
+        found = self.blocks.get(row0, col0)
+        if found is None:
+            return None
+        return found[0]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if (role in (Qt.DisplayRole, Qt.EditRole) and index.isValid()
+                and self.get_value(index.row(), index.column()) is LOADING):
+            return to_qvariant(LOADING)
+        return DataFrameModel.data(self, index, role)
+
+    def update_max_min(self):
+        """Get max_min_col from the kernel"""
+        if self.blocks.handle is not None:
+            self.blocks.shellwidget.get_max_min(
+                self.blocks.handle,
+                callback=lambda max_min: (
+                    self.blocks.handle is not None
+                    and self.set_max_min(max_min)))
+
+    def recalculate_index(self):
+        pass
+
+    def sort(self, column, order=Qt.AscendingOrder, add_key=False):
+        QMessageBox.information(
+            self.dialog, _("Sort"),
+            _("Values kept in the kernel cannot be sorted."))
+        return False
+
+    def flags(self, index):
+        return QAbstractTableModel.flags(self, index)
+
+    def setData(self, index, value, role=Qt.EditRole, change_type=None):
+        return False
+
+
+class RemoteArrayModel(ArrayModel):
+    """ArrayModel of a 1 or 2 dimensional array kept in the kernel"""
+
+    def __init__(self, blocks, format="%.6g", parent=None):
+        QAbstractTableModel.__init__(self)
+        info = blocks.info
+
+        self.dialog = parent
+        self.blocks = blocks
+        self.changes = {}
+        # Aligned with the blocks so that a block is in one window
+        self.bgcolors = BlockCache(
+            self._compute_bgcolors, blocks.BLOCK_ROWS, blocks.BLOCK_COLS)
+        self.texts = BlockCache(
+            self._compute_texts, blocks.BLOCK_ROWS, blocks.BLOCK_COLS)
+        self.xlabels = None
+        self.ylabels = None
+        self.readonly = True
+        self.dtype = np.dtype(info["dtype"])
+        self.test_array = np.array([0], dtype=self.dtype)
+
+        if self.dtype in (np.complex64, np.complex128):
+            self.color_func = np.abs
+        else:
+            self.color_func = np.real
+
+        # Backgroundcolor settings
+        huerange = [.66, .99] # Hue
+        self.sat = .7 # Saturation
+        self.val = 1. # Value
+        self.alp = .6 # Alpha-channel
+
+        # Empty array of the same dtype for the methods of ArrayModel
+        self._data = np.empty((0, 0), dtype=self.dtype)
+        self._format = format
+
+        self.total_rows, self.total_cols = blocks.shape
+
+        self.vmin = info["vmin"]
+        self.vmax = info["vmax"]
+        self.has_inf = info["has_inf"]
+        if self.vmin is not None and self.vmax is not None:
+            if self.vmax == self.vmin:
+                self.vmin -= 1
+            self.hue0 = huerange[0]
+            self.dhue = huerange[1]-huerange[0]
+            self.bgcolor_enabled = not self.has_inf
+        else:
+            self.hue0 = None
+            self.dhue = None
+            self.bgcolor_enabled = False
+
+        _init_paging(self, ARRAY_LARGE_SIZE, ARRAY_LARGE_NROWS,
+                     ARRAY_LARGE_COLS, self.ROWS_TO_LOAD, self.COLS_TO_LOAD)
+
+        blocks.sig_block_loaded.connect(
+            lambda *args: _emit_block_changed(self, *args))
+
+    def get_value(self, index):
+        found = self.blocks.get(index.row(), index.column())
+        if found is None:
+            return LOADING
+        window, i, j = found
+        return window[i, j]
+
+    def set_slab(self, row_axis, col_axis, index):
+        """Show the slab of an N-D array. See MxRemoteBlocks.set_slab"""
+        self.beginResetModel()
+        self.blocks.set_slab(row_axis, col_axis, index)
+        self.total_rows, self.total_cols = self.blocks.shape
+        _init_paging(self, ARRAY_LARGE_SIZE, ARRAY_LARGE_NROWS,
+                     ARRAY_LARGE_COLS, self.ROWS_TO_LOAD, self.COLS_TO_LOAD)
+        self.bgcolors.clear()
+        self.texts.clear()
+        self.endResetModel()
+
+    def get_block(self, row0, row1, col0, col1):
+        found = self.blocks.get(row0, col0)
+        if found is None:
+            return None
+        return found[0]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and self.get_value(index) is LOADING:
+            if role == Qt.DisplayRole:
+                return to_qvariant(LOADING)
+            elif role == Qt.TextAlignmentRole:
+                return to_qvariant(int(Qt.AlignCenter|Qt.AlignVCenter))
+            return to_qvariant()
+        return ArrayModel.data(self, index, role)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        return False
+
+
+class RemoteArrayView(ArrayView):
+    """ArrayView of an array kept in the kernel
+
+    The cells to copy are retrieved from the kernel.
+    """
+
+    @Slot()
+    def copy(self):
+        """Copy text to clipboard"""
+        cell_range = self.selectedIndexes()
+        if not cell_range:
+            return
+        row_min, row_max, col_min, col_max = self._sel_to_rect(cell_range)
+        self.model().blocks.get_window(
+            row_min, row_max + 1, col_min, col_max + 1,
+            callback=self._window_to_clipboard,
+            errback=lambda msg: QMessageBox.critical(self, _("Error"), msg))
+
+    def _window_to_clipboard(self, window):
+        cliptxt = self._array_to_text(window)
+        if cliptxt is not None:
+            QApplication.clipboard().setText(cliptxt)
+
+
+class RemoteArrayEditorWidget(ArrayEditorWidget):
+
+    def __init__(self, parent, model):
+        QWidget.__init__(self, parent)
+        self.data = model.get_data()
+        self.old_data_shape = None
+        self.model = model
+        self.view = RemoteArrayView(
+            self, model, model.dtype, model.blocks.shape)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+    def accept_changes(self):
+        pass
+
+
+class MxRemoteArrayViewer(MxArrayViewer):
+    """MxArrayViewer of an array kept in the kernel
+
+    Arrays with more than 2 dimensions are shown by 2 dimensional slabs.
+    The axes of the rows and columns are chosen in combo boxes, and
+    the indexes of the other axes in spin boxes. Only the windows of
+    the slab shown are retrieved from the kernel.
+    """
+
+    def setup_model(self, model, title=''):
+
+        self.layout = QGridLayout()
+        self.setLayout(self.layout)
+        self.setWindowTitle(title or _("Array editor"))
+
+        self.stack = QStackedWidget(self)
+        self.stack.addWidget(RemoteArrayEditorWidget(self, model))
+        self.arraywidget = self.stack.currentWidget()
+        self.layout.addWidget(self.stack, 1, 0)
+
+        btn_layout_bottom = QHBoxLayout()
+
+        btn_format = QPushButton(_("Format"))
+        btn_format.setEnabled(is_float(model.dtype))
+        btn_layout_bottom.addWidget(btn_format)
+        btn_format.clicked.connect(lambda: self.arraywidget.change_format())
+
+        btn_resize = QPushButton(_("Resize"))
+        btn_layout_bottom.addWidget(btn_resize)
+        btn_resize.clicked.connect(
+            lambda: self.arraywidget.view.resize_to_contents())
+
+        self.bgcolor = QCheckBox(_('Background color'))
+        self.bgcolor.setEnabled(model.bgcolor_enabled)
+        self.bgcolor.setChecked(model.bgcolor_enabled)
+        self.bgcolor.stateChanged.connect(
+            lambda state: self.arraywidget.model.bgcolor(state))
+        btn_layout_bottom.addWidget(self.bgcolor)
+        btn_layout_bottom.addStretch()
+
+        btn_layout_bottom.setContentsMargins(4, 4, 4, 4)
+        if model.blocks.slab is not None:
+            self.layout.addLayout(self.create_slab_layout(model), 2, 0)
+            self.layout.addLayout(btn_layout_bottom, 3, 0)
+        else:
+            self.layout.addLayout(btn_layout_bottom, 2, 0)
+        self.setMinimumSize(500, 300)
+
+        return True
+
+    def create_slab_layout(self, model):
+        """Create the widgets to choose the slab of an N-D array"""
+        ndshape = model.blocks.info["ndshape"]
+        row_axis, col_axis, index = model.blocks.slab
+        axes = [str(axis) for axis in range(len(ndshape))]
+
+        self.row_combo = QComboBox(self)
+        self.row_combo.addItems(axes)
+        self.row_combo.setCurrentIndex(row_axis)
+        self.row_combo.currentIndexChanged.connect(
+            lambda axis: self.change_axes(axis, self.col_combo))
+        self.col_combo = QComboBox(self)
+        self.col_combo.addItems(axes)
+        self.col_combo.setCurrentIndex(col_axis)
+        self.col_combo.currentIndexChanged.connect(
+            lambda axis: self.change_axes(axis, self.row_combo))
+
+        self.index_spins = []
+        for size, value in zip(ndshape, index):
+            spin = QSpinBox(self, keyboardTracking=False)
+            spin.setRange(0, max(size - 1, 0))
+            spin.setValue(value)
+            spin.valueChanged.connect(self.change_slab)
+            self.index_spins.append(spin)
+
+        self.slicing_label = QLabel(self)
+
+        layout = QHBoxLayout()
+        layout.addWidget(QLabel(_("Shape: (%s)") % ", ".join(
+            str(size) for size in ndshape)))
+        layout.addWidget(QLabel(_("Rows:")))
+        layout.addWidget(self.row_combo)
+        layout.addWidget(QLabel(_("Columns:")))
+        layout.addWidget(self.col_combo)
+        layout.addWidget(QLabel(_("Index:")))
+        for spin in self.index_spins:
+            layout.addWidget(spin)
+        layout.addWidget(self.slicing_label)
+        layout.addStretch()
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.update_slab_widgets()
+        return layout
+
+    def change_axes(self, axis, other_combo):
+        """Swap the axes of the rows and columns if the same is chosen"""
+        if axis == other_combo.currentIndex():
+            row_axis, col_axis = self.arraywidget.model.blocks.slab[:2]
+            # The axis chosen before in the combo box changed
+            old = row_axis if other_combo is self.col_combo else col_axis
+            other_combo.blockSignals(True)
+            other_combo.setCurrentIndex(old)
+            other_combo.blockSignals(False)
+        self.change_slab()
+
+    def change_slab(self):
+        """Show the slab chosen in the widgets"""
+        model = self.arraywidget.model
+        model.set_slab(self.row_combo.currentIndex(),
+                       self.col_combo.currentIndex(),
+                       [spin.value() for spin in self.index_spins])
+        self.arraywidget.view.shape = model.blocks.shape
+        self.update_slab_widgets()
+
+    def update_slab_widgets(self):
+        row_axis, col_axis, index = self.arraywidget.model.blocks.slab
+        texts = []
+        for axis, spin in enumerate(self.index_spins):
+            shown = axis in (row_axis, col_axis)
+            spin.setVisible(not shown)
+            texts.append(":" if shown else str(index[axis]))
+        self.slicing_label.setText(_("Slicing: [%s]") % ", ".join(texts))
+
+
+def create_remote_viewer(shellwidget, info, parent=None):
+    """Create a viewer of a value kept in the kernel
+
+    ``info`` is the information of the value passed to the
+    ``handle_callback`` of MxShellWidget.get_obj_value.
+    The value in the kernel is released when the viewer is destroyed.
+    """
+    blocks = MxRemoteBlocks(shellwidget, info)
+
+    if info["type"] == "ndarray":
+        viewer = MxRemoteArrayViewer(parent)
+        format = SUPPORTED_FORMATS.get(np.dtype(info["dtype"]).name, '%s')
+        viewer.setup_model(RemoteArrayModel(blocks, format, parent=viewer))
+    else:
+        viewer = MxDataFrameViewer(parent)
+        viewer.is_series = info["type"] == "Series"
+        model = RemoteDataFrameModel(blocks, parent=viewer)
+        viewer.setup_model(
+            model, _("%s editor") % info["type"])
+
+        # Repaint the index when its labels are retrieved
+        blocks.sig_block_loaded.connect(
+            lambda *args: viewer.table_index.viewport().update())
+
+    viewer.destroyed.connect(lambda: blocks.close())
+    return viewer
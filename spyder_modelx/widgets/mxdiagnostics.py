@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Widget to show the statistics of requests to MxKernel"""
+
+import os
+
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QMessageBox, QLabel
+)
+from qtpy.compat import getsavefilename
+from spyder.config.base import _
+from spyder.utils.misc import getcwd_or_home
+
+# Column titles and functions to get the cell values from summaries
+COLUMNS = [
+    ("Method", lambda s: s["method"]),
+    ("Msgtype", lambda s: s["msgtype"] or ""),
+    ("Count", lambda s: s["count"]),
+    ("Wall p50 (ms)", lambda s: _ms(s["wall"]["p50"])),
+    ("Wall p90 (ms)", lambda s: _ms(s["wall"]["p90"])),
+    ("Wall p99 (ms)", lambda s: _ms(s["wall"]["p99"])),
+    ("Wall total (ms)", lambda s: _ms(s["wall"]["total"])),
+    ("Kernel p50 (ms)", lambda s: _ms(s["kernel"]["p50"])),
+    ("Kernel p90 (ms)", lambda s: _ms(s["kernel"]["p90"])),
+    ("Payload p50 (KB)", lambda s: _kb(s["nbytes"]["p50"])),
+    ("Payload max (KB)", lambda s: _kb(s["nbytes"]["max"])),
+    ("Decode p50 (ms)", lambda s: _ms(s["decode"]["p50"])),
+    ("Decode p90 (ms)", lambda s: _ms(s["decode"]["p90"]))
+]
+
+
+def _ms(value):
+    return "" if value is None else "%.1f" % (value * 1000)
+
+
+def _kb(value):
+    return "" if value is None else "%.1f" % (value / 1024)
+
+
+class MxDiagnosticsWidget(QWidget):
+    """Table of the statistics of requests to the kernel
+
+    The table is updated every second while it is visible.
+    """
+
+    def __init__(self, parent):
+        QWidget.__init__(self, parent)
+        self.shellwidget = None
+        self.export_filename = None
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeToContents)
+
+        self.status = QLabel(self)
+        self.reset_button = QPushButton(_("Reset"), self)
+        self.reset_button.clicked.connect(self.reset)
+        self.export_button = QPushButton(_("Export..."), self)
+        self.export_button.clicked.connect(self.export)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.status)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.export_button)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.update_table)
+
+    @property
+    def stats(self):
+        if self.shellwidget is None:
+            return None
+        return self.shellwidget.mx_rpc_stats
+
+    def showEvent(self, event):
+        self.update_table()
+        self.timer.start()
+        QWidget.showEvent(self, event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        QWidget.hideEvent(self, event)
+
+    def update_table(self):
+        if self.stats is None:
+            self.table.setRowCount(0)
+            return
+
+        summary = self.stats.summary()
+        self.table.setRowCount(len(summary))
+        for row, stats in enumerate(summary):
+            for col, (_title, getter) in enumerate(COLUMNS):
+                item = QTableWidgetItem(str(getter(stats)))
+                if col > 1:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+        self.status.setText(
+            _("%d requests") % sum(s["count"] for s in summary))
+
+    def reset(self):
+        if self.stats is not None:
+            self.stats.clear()
+        self.update_table()
+
+    def export(self):
+        """Save the statistics in a JSON file"""
+        if self.stats is None:
+            return
+
+        title = _("Export statistics")
+        if self.export_filename is None:
+            self.export_filename = os.path.join(
+                getcwd_or_home(), "mxstats.json")
+        filename, _selfilter = getsavefilename(
+            self, title, self.export_filename, _("JSON files") + " (*.json)")
+        if filename:
+            self.export_filename = filename
+            try:
+                with open(filename, "w") as f:
+                    f.write(self.stats.to_json(indent=2))
+            except Exception as error:
+                QMessageBox.critical(self, title,
+                                     _("<b>Unable to export statistics</b>"
+                                       "<br><br>Error message:<br>%s"
+                                       ) % str(error))
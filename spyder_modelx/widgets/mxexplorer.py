@@ -45,12 +45,14 @@
 """modelx Widget."""
 import sys, os
 import keyword
-from qtpy.QtCore import Signal, Slot, Qt, QStringListModel, QEventLoop
+from qtpy.QtCore import (Signal, Slot, Qt, QStringListModel, QEventLoop,
+                         QModelIndex)
 from qtpy.QtWidgets import (QHBoxLayout, QLabel, QMenu, QMessageBox, QAction,
                             QToolButton, QVBoxLayout, QWidget, QTreeView,
                             QSplitter, QComboBox, QSizePolicy, QDialog,
                             QGridLayout, QListWidget, QPushButton,
-                            QDialogButtonBox, QLineEdit, QCheckBox, QTabWidget)
+                            QDialogButtonBox, QLineEdit, QCheckBox, QTabWidget,
+                            QInputDialog, QCompleter)
 from qtpy.QtGui import QPalette
 from qtpy.compat import getexistingdirectory, getopenfilename
 import spyder
@@ -65,9 +67,13 @@ from spyder_modelx.widgets.mxcodeeditor import BaseCodePane
 from spyder_modelx.widgets.mxproperty import MxPropertyWidget
 from spyder_modelx.widgets.mxtreemodel import (
     TreeCol,
-    MxTreeModel, ModelItem, ItemSpaceItem,
-    ViewItem, SpaceItem, CellsItem, RefItem)
+    MxTreeModel, ModelItem, ItemSpaceItem, ItemSpaceMapItem,
+    InterfaceItem, ViewItem, SpaceItem, CellsItem, RefItem, build_items,
+    get_expanded,
+    PROFILE_COLUMNS)
 from spyder_modelx.widgets.mxdatalist import MxDataListWidget
+from spyder_modelx.widgets.mxdiagnostics import MxDiagnosticsWidget
+from spyder_modelx.widgets.mxprofiler import MxProfilerWidget
 
 
 class MxTreeView(QTreeView):
@@ -109,6 +115,22 @@ class MxTreeView(QTreeView):
         self.action_update_formulas = self.contextMenu.addAction(
             "Show Formulas"
         )
+        self.action_show_memory = self.contextMenu.addAction(
+            "Show Memory"
+        )
+        self.action_show_memory.setCheckable(True)
+        self.action_clear_caches = self.contextMenu.addAction(
+            "Clear Caches"
+        )
+        self.action_prev_itemspaces = self.contextMenu.addAction(
+            "Previous ItemSpaces"
+        )
+        self.action_next_itemspaces = self.contextMenu.addAction(
+            "Next ItemSpaces"
+        )
+        self.action_filter_itemspaces = self.contextMenu.addAction(
+            "Filter ItemSpaces"
+        )
         self.action_new_model = self.contextMenu.addAction(
             "Create New Model"
         )
@@ -131,6 +153,18 @@ class MxTreeView(QTreeView):
             "Delete Model"
         )
 
+    def setModel(self, model):
+        super().setModel(model)
+        self.update_columns()
+
+    def update_columns(self):
+        """Show the optional columns only when they have data"""
+        model = self.model()
+        self.setColumnHidden(TreeCol.MEMORY,
+                             not self.action_show_memory.isChecked())
+        for column in PROFILE_COLUMNS:
+            self.setColumnHidden(column, not (model and model.profile))
+
     def get_current_item(self):
         if self.currentIndex().isValid():
             return self.currentIndex().internalPointer()
@@ -158,6 +192,38 @@ class MxTreeView(QTreeView):
             self.shell.mxdataviewer.add_tab()
             self.shell.mxdataviewer.update_object(item.itemData)
 
+    def page_itemspaces(self, action):
+        """Show another page of the item spaces of the current item"""
+        index = self.currentIndex()
+        if not index.isValid():
+            return
+        item = index.internalPointer()
+        if isinstance(item, ItemSpaceItem):
+            index = index.parent()
+            item = index.internalPointer()
+        if not isinstance(item, ItemSpaceMapItem) or not item.isPaged():
+            return
+
+        start, stop, prefix = item.getPage()
+        if action == self.action_next_itemspaces:
+            if stop >= item.itemData['_total']:
+                return
+            start = stop
+        elif action == self.action_prev_itemspaces:
+            if start == 0:
+                return
+            start = max(start - (stop - start), 0)
+        else:
+            prefix, accepted = QInputDialog.getText(
+                self, "Filter ItemSpaces",
+                "Show ItemSpaces whose arguments start with:",
+                QLineEdit.Normal, prefix)
+            if not accepted:
+                return
+            start = 0
+
+        self.model().fetchPage(index, start, prefix)
+
     def contextMenuEvent(self, event):
         action = self.contextMenu.exec_(self.mapToGlobal(event.pos()))
 
@@ -175,6 +241,29 @@ class MxTreeView(QTreeView):
 
                 self.shell.update_codelist(item.itemData['fullname'])
 
+        elif action == self.action_show_memory:
+            self.setColumnHidden(TreeCol.MEMORY, not action.isChecked())
+            self.shell.set_memory_shown(action.isChecked())
+
+        elif action == self.action_clear_caches:
+            index = self.currentIndex()
+            if index.isValid():
+                item = index.internalPointer()
+                if not isinstance(item, (ViewItem, RefItem)):
+                    fullname = item.itemData['fullname']
+                    answer = QMessageBox.question(
+                        self, _("Clear Caches"),
+                        _("Do you want to clear the caches of %s?")
+                        % fullname,
+                        QMessageBox.Yes | QMessageBox.No)
+                    if answer == QMessageBox.Yes:
+                        self.shell.clear_caches(fullname)
+
+        elif action in (self.action_prev_itemspaces,
+                        self.action_next_itemspaces,
+                        self.action_filter_itemspaces):
+            self.page_itemspaces(action)
+
         elif action == self.action_update_properties:
             index = self.currentIndex()
             if index.isValid():
@@ -415,26 +504,270 @@ class MxExplorer(QWidget):
         self.setWindowTitle("Mx explorer") # Not visible
 
         self.treeview = treeview = MxTreeView(self)
+        self.searchbox = MxNameSearchBox(self)
+        self._selecting = None  # Fullname of the object to select
+        self.watched = {}      # Fullnames of the cells by ids
+        self.profile = {}       # Records of profiling by ids
+        self._deferred = []     # Changes to the tree data. See _when_idle
+        self.status = QLabel(_("Refreshing..."), self)
+        self.status.setVisible(False)
 
         # Main layout
+        toplayout = QHBoxLayout()
+        toplayout.addWidget(self.searchbox)
+        toplayout.addWidget(self.status)
+
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(toplayout)
         layout.addWidget(self.treeview)
         self.setLayout(layout)
 
+        treeview.expanded.connect(lambda index: self.watch_counts())
+
     def process_remote_view(self, data):
-        if data:
+        """Update the tree with the entire tree data of a model"""
+        self.build_tree(data, None, None)
+
+    def build_tree(self, data, base, revision):
+        """Build the items from tree data and show them
+
+        The items are built in the worker thread of the shell, and
+        the tree is shown as refreshing while the worker is busy.
+        See :func:`build_items` for ``base``. The tree data is not
+        changed while the worker is busy. See :meth:`_when_idle`.
+        """
+        if not data:
+            self.treeview.setModel(None)
+            self.watch_counts()
+            return
+
+        self.treeview.shell.mx_worker.submit(
+            lambda: build_items(data, base),
+            callback=lambda root: self.set_tree(root, revision),
+            errback=self.build_failed)
+
+    def set_tree(self, root, revision):
+        model = self.treeview.model()
+        if model and model.modelid == root.itemData['id']:
+            model.updateRoot(root)
+        else:
+            model = MxTreeModel(root, fetcher=self.fetch_children)
+            model.profile = self.profile
+            self.treeview.setModel(model)
+        model.revision = revision
+        self.watch_counts()
+        self.treeview.shell.discard_stale_values()
+
+    def build_failed(self, error):
+        if not isinstance(error, KeyError):
+            raise error
+
+        # Inconsistent with the current tree. Get the entire tree.
+        model = self.treeview.model()
+        if model:
+            model.revision = None
+        self.treeview.shell.refresh_mxpanes()
+
+    def set_refreshing(self, refreshing):
+        self.status.setVisible(refreshing)
+        if not refreshing:
+            deferred, self._deferred = self._deferred, []
+            for func in deferred:
+                func()
+
+    def _when_idle(self, func):
+        """Call func now, or when the worker of the shell is idle
+
+        func changes the tree data, which must not be changed while the
+        worker reads it to build items. See :meth:`build_tree`.
+        """
+        shell = self.treeview.shell
+        if shell and shell.mx_worker.pending:
+            self._deferred.append(func)
+        else:
+            func()
+
+    def fetch_children(self, model, item, page=None):
+        """Retrieve the children of an item collapsed in the kernel
+
+        ``page`` is the page of the item spaces to retrieve if the
+        item is paged. See mx_get_subtree in mxkernelext.
+        """
+        fullname, keys = item.getFetchTarget()
+
+        def set_data(data):
+            model.setFetchedData(item, data)
+            self._select_next()
+            self.watch_counts()
+
+        def errback(msg):
+            model.fetchFailed(item)
+            self._selecting = None
+
+        self.treeview.shell.get_subtree(
+            fullname, keys, get_expanded(model.rootItem.itemData),
+            callback=lambda data: self._when_idle(lambda: set_data(data)),
+            errback=errback, page=page)
+
+    def select_object(self, fullname):
+        """Expand only the path to an object and select it
+
+        The collapsed objects on the path are retrieved from the kernel,
+        and the path is expanded further when they are retrieved.
+        """
+        self._selecting = fullname
+        self._select_next()
+
+    def _select_next(self):
+        model = self.treeview.model()
+        fullname, self._selecting = self._selecting, None
+        if model is None or fullname is None:
+            return
+
+        names = fullname.split(".")
+        if names[0] != model.rootItem.itemData['name']:
+            return
+
+        index = QModelIndex()
+        for name in names[1:]:
+            item = model.getItem(index)
+            if item in model.fetching or model.canFetchMore(index):
+                self._selecting = fullname  # Continued when retrieved
+                model.fetchMore(index)
+                return
+
+            child = next((c for c in item.childItems
+                          if isinstance(c, InterfaceItem)
+                          and c.itemData['name'] == name), None)
+            if child is None:
+                return
+            if index.isValid():
+                self.treeview.expand(index)
+            index = model.createIndex(child.row(), 0, child)
+
+        self.treeview.setCurrentIndex(index)
+        self.treeview.scrollTo(index)
+
+    def watch_counts(self):
+        """Have the kernel send the numbers of values in cells
+
+        The cells whose items are created are watched, and their
+        numbers are updated while the kernel runs code.
+        See mx_watch_counts in mxkernelext.
+        """
+        model = self.treeview.model()
+        if model:
+            model.watchedItems = {
+                item.objid: item for item in model.getCreatedItems(CellsItem)}
+            fullnames = {objid: item.itemData['fullname']
+                         for objid, item in model.watchedItems.items()}
+        else:
+            fullnames = {}
+
+        if fullnames != self.watched and self.treeview.shell:
+            self.watched = fullnames
+            self.treeview.shell.watch_counts(fullnames)
+
+    def set_profile(self, stats):
+        """Show the records of profiling. See mx_get_profile"""
+        self.profile = {record["id"]: record for record in stats}
+        model = self.treeview.model()
+        if model:
+            model.profile = self.profile
+            self.treeview.update_columns()
+            self.treeview.viewport().update()
+
+    def update_counts(self, counts):
+
+        def update():
             model = self.treeview.model()
             if model:
-                if model.modelid == data['id']:
-                    if model.rootItem.itemData != data:
-                        model.updateRoot(ModelItem(data))
-                else:
-                    self.treeview.setModel(MxTreeModel(ModelItem(data)))
-            else:
-                self.treeview.setModel(MxTreeModel(ModelItem(data)))
-        else:
-            self.treeview.setModel(None)
+                model.updateCounts(counts)
+
+        self._when_idle(update)
+
+    def process_remote_tree(self, tree):
+        """Update the tree with data returned from mx_get_tree
+
+        The data only contains the subtrees changed since the revision
+        of the current tree.
+        """
+        model = self.treeview.model()
+        self.build_tree(tree["data"], model.rootItem.itemData if model
+                        else None, tree["revision"])
+
+    @property
+    def revision(self):
+        model = self.treeview.model()
+        return model.revision if model else None
+
+    @property
+    def expanded(self):
+        """Containers whose items are shown. See get_expanded"""
+        model = self.treeview.model()
+        return get_expanded(model.rootItem.itemData) if model else []
+
+
+class MxNameSearchBox(QWidget):
+    """Box to find objects in MxExplorer by their names
+
+    The names are searched in the kernel as they are typed, and
+    the matches are shown in the popup of a completer. Selecting a match
+    selects the object in MxExplorer.
+    """
+
+    MODES = [("Prefix", "prefix"), ("Substring", "substring"),
+             ("Fuzzy", "fuzzy")]
+
+    def __init__(self, explorer):
+        QWidget.__init__(self, explorer)
+        self.explorer = explorer
+
+        self.lineedit = QLineEdit(self)
+        self.lineedit.setPlaceholderText(_("Find objects by name"))
+        self.mode_selector = QComboBox(self)
+        for text, mode in self.MODES:
+            self.mode_selector.addItem(_(text), mode)
+
+        self.matches = QStringListModel(self)
+        self.completer = QCompleter(self.matches, self)
+        self.completer.setCompletionMode(
+            QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(20)
+        self.lineedit.setCompleter(self.completer)
+
+        self.lineedit.textEdited.connect(self.search)
+        self.mode_selector.currentIndexChanged.connect(
+            lambda _: self.search(self.lineedit.text()))
+        self.completer.activated[str].connect(self.explorer.select_object)
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.lineedit)
+        layout.addWidget(self.mode_selector)
+        self.setLayout(layout)
+
+    def search(self, text):
+        shell = self.explorer.treeview.shell
+        model = self.explorer.treeview.model()
+        if shell is None or model is None or not text:
+            self.matches.setStringList([])
+            return
+
+        mode = self.mode_selector.currentData()
+        shell.mx_scheduler.submit(
+            "search",
+            lambda ticket: shell.find_names(
+                model.modelid, text, mode,
+                callback=ticket.wrap(self.set_matches),
+                errback=ticket.wrap(lambda msg: self.set_matches([])))
+        )
+
+    def set_matches(self, names):
+        self.matches.setStringList(names)
+        if names and self.lineedit.hasFocus():
+            self.completer.complete()
 
 
 if spyder.version_info > (5,):
@@ -470,6 +803,8 @@ if spyder.version_info > (5,):
             self.codelist = MxCodeListWidget(self)
             self.propwidget = MxPropertyWidget(self, orientation=Qt.Vertical)
             self.datalist = MxDataListWidget(self, orientation=Qt.Vertical)
+            self.diagnostics = MxDiagnosticsWidget(self)
+            self.profiler = MxProfilerWidget(self, self.explorer)
 
             # Create splitter
             self.splitter = QSplitter(self)
@@ -483,6 +818,10 @@ if spyder.version_info > (5,):
             MxMainWidget.IdxProperties = self.tabwidget.addTab(self.propwidget, "Properties")
             MxMainWidget.IdxFormulas = self.tabwidget.addTab(self.codelist, "Formulas")
             MxMainWidget.IdxDataList = self.tabwidget.addTab(self.datalist, "Data")
+            MxMainWidget.IdxDiagnostics = self.tabwidget.addTab(
+                self.diagnostics, "Diagnostics")
+            MxMainWidget.IdxProfiler = self.tabwidget.addTab(
+                self.profiler, "Profile")
 
             # Layout management
             self.splitter.addWidget(self.explorer)
@@ -501,6 +840,8 @@ if spyder.version_info > (5,):
             self.shellwidget.set_mxcodelist(self.codelist)
             self.shellwidget.set_mxproperty(self.propwidget)
             self.shellwidget.set_mxdatalist(self.datalist)
+            self.diagnostics.shellwidget = shellwidget
+            self.profiler.shellwidget = shellwidget
 
         def raise_tab(self, widget):
             self.tabwidget.setCurrentWidget(widget)
@@ -536,6 +877,8 @@ else:
             self.codelist = MxCodeListWidget(self)
             self.propwidget = MxPropertyWidget(self, orientation=Qt.Vertical)
             self.datalist = MxDataListWidget(self, orientation=Qt.Vertical)
+            self.diagnostics = MxDiagnosticsWidget(self)
+            self.profiler = MxProfilerWidget(self, self.explorer)
 
             # Create splitter
             self.splitter = QSplitter(self)
@@ -549,6 +892,10 @@ else:
             MxMainWidget.IdxProperties = self.tabwidget.addTab(self.propwidget, "Properties")
             MxMainWidget.IdxFormulas = self.tabwidget.addTab(self.codelist, "Formulas")
             MxMainWidget.IdxDataList = self.tabwidget.addTab(self.datalist, "Data")
+            MxMainWidget.IdxDiagnostics = self.tabwidget.addTab(
+                self.diagnostics, "Diagnostics")
+            MxMainWidget.IdxProfiler = self.tabwidget.addTab(
+                self.profiler, "Profile")
 
             # Layout management
             self.splitter.addWidget(self.explorer)
@@ -566,6 +913,8 @@ else:
             self.shellwidget.set_mxcodelist(self.codelist)
             self.shellwidget.set_mxproperty(self.propwidget)
             self.shellwidget.set_mxdatalist(self.datalist)
+            self.diagnostics.shellwidget = shellwidget
+            self.profiler.shellwidget = shellwidget
 
         def raise_tab(self, widget):
             self.tabwidget.setCurrentWidget(widget)
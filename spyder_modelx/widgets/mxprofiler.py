@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Widget to profile the formulas of modelx objects"""
+
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QLabel, QSpinBox
+)
+from spyder.config.base import _
+
+# Column titles and functions to get the cell values from stats
+COLUMNS = [
+    ("Object", lambda s: s["fullname"]),
+    ("Calls", lambda s: s["calls"]),
+    ("Self (ms)", lambda s: round(s["self"] * 1000, 1)),
+    ("Total (ms)", lambda s: round(s["total"] * 1000, 1)),
+    ("Self per call (ms)", lambda s: round(s["self"] * 1000 / s["calls"], 3)
+     if s["calls"] else 0.0)
+]
+
+
+class MxProfilerWidget(QWidget):
+    """Table of the objects whose formulas take the most time
+
+    The records are retrieved from the kernel every 2 seconds while
+    profiling and the table is visible. The columns are sortable, and
+    double-clicking a row selects the object in MxExplorer.
+    The records are also shown in the columns of MxExplorer.
+    """
+
+    def __init__(self, parent, explorer):
+        QWidget.__init__(self, parent)
+        self.shellwidget = None
+        self.explorer = explorer
+        self.running = False
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeToContents)
+        self.table.setSortingEnabled(True)
+        self.table.cellDoubleClicked.connect(self.select_object)
+
+        self.status = QLabel(self)
+        self.limit = QSpinBox(self)
+        self.limit.setRange(1, 10000)
+        self.limit.setValue(50)
+        self.limit.setPrefix(_("Top "))
+        self.start_button = QPushButton(_("Start"), self)
+        self.start_button.clicked.connect(self.start)
+        self.stop_button = QPushButton(_("Stop"), self)
+        self.stop_button.clicked.connect(self.stop)
+        self.update_button = QPushButton(_("Update"), self)
+        self.update_button.clicked.connect(self.update_table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.status)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.limit)
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.stop_button)
+        button_layout.addWidget(self.update_button)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(2000)
+        self.timer.timeout.connect(
+            lambda: self.running and self.update_table())
+
+    def showEvent(self, event):
+        self.timer.start()
+        QWidget.showEvent(self, event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        QWidget.hideEvent(self, event)
+
+    def start(self):
+        if self.shellwidget is not None:
+            self.shellwidget.start_profile(callback=self.update_table)
+
+    def stop(self):
+        if self.shellwidget is not None:
+            self.shellwidget.stop_profile(callback=self.update_table)
+
+    def update_table(self, *args):
+        if self.shellwidget is not None:
+            self.shellwidget.get_profile(
+                self.limit.value(), callback=self.set_profile)
+
+    def set_profile(self, profile):
+        self.running = profile["running"]
+        stats = profile["stats"]
+
+        self.table.setSortingEnabled(False)     # Not to sort on each item
+        self.table.setRowCount(len(stats))
+        for row, record in enumerate(stats):
+            for col, (_title, getter) in enumerate(COLUMNS):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, getter(record))
+                if col > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+
+        self.status.setText(
+            (_("Profiling") if self.running else _("Stopped"))
+            + " - " + _("%d objects") % len(stats))
+        self.explorer.set_profile(stats)
+
+    def select_object(self, row, column):
+        self.explorer.select_object(self.table.item(row, 0).text())
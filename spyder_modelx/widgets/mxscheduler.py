@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Scheduler of kernel requests from modelx panes"""
+
+# Third party imports
+from qtpy.QtCore import QObject, QTimer
+
+
+class MxRequestTicket:
+    """Ticket of a request passed to the request function
+
+    The request function must call the callbacks and errbacks of the
+    kernel calls it makes through :meth:`wrap`. The request finishes
+    when a wrapped function returns without making another kernel call
+    through :meth:`wrap`, or when the request function makes no call.
+    """
+
+    def __init__(self, scheduler, pane, generation):
+        self.scheduler = scheduler
+        self.pane = pane
+        self.generation = generation
+        self.wrapcount = 0
+
+    def is_current(self):
+        """Returns True if no request is submitted for the pane after this"""
+        return self.scheduler._generations.get(self.pane) == self.generation
+
+    def wrap(self, func):
+        """Wrap func to be called only if the request is not superseded"""
+        self.wrapcount += 1
+
+        def wrapper(*args, **kwargs):
+            count = self.wrapcount
+            try:
+                if self.is_current():
+                    return func(*args, **kwargs)
+            finally:
+                if self.wrapcount == count:
+                    self.scheduler._finish(self)
+
+        return wrapper
+
+
+class MxRequestScheduler(QObject):
+    """Debounce and supersede kernel requests of each pane
+
+    A request is a function that takes a :class:`MxRequestTicket`.
+    :meth:`submit` waits for ``delay`` milliseconds before making a
+    request, and requests submitted for the same pane in the meantime
+    replace it. While a request of a pane is waiting for its reply,
+    only the latest request submitted for the pane is kept and it is made
+    after the reply. Replies to requests superseded by newer ones are
+    ignored.
+    """
+
+    def __init__(self, parent=None, delay=100):
+        QObject.__init__(self, parent)
+        self.delay = delay
+        self._generation = 0
+        self._generations = {}  # pane -> generation of the latest request
+        self._pending = {}      # pane -> (ticket, request) not made yet
+        self._inflight = {}     # pane -> ticket waiting for a reply
+        self._timers = {}
+
+    def submit(self, pane, request, delay=None):
+        """Submit a request for a pane"""
+        self._generation += 1
+        generation = self._generations[pane] = self._generation
+        self._pending[pane] = (
+            MxRequestTicket(self, pane, generation), request)
+
+        timer = self._timers.get(pane)
+        if timer is None:
+            timer = self._timers[pane] = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._send(pane))
+
+        timer.start(self.delay if delay is None else delay)
+
+    def cancel(self, pane):
+        """Drop the pending request and ignore the reply of the pane"""
+        self._generations.pop(pane, None)
+        self._pending.pop(pane, None)
+        timer = self._timers.pop(pane, None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+
+    def is_busy(self, pane):
+        return pane in self._pending or pane in self._inflight
+
+    def clear(self):
+        """Cancel all requests such as when the kernel restarts"""
+        for pane in list(self._generations):
+            self.cancel(pane)
+        self._inflight.clear()
+
+    def _send(self, pane):
+        if pane in self._inflight or pane not in self._pending:
+            return
+        ticket, request = self._pending.pop(pane)
+        self._inflight[pane] = ticket
+        try:
+            request(ticket)
+        finally:
+            if not ticket.wrapcount:
+                self._finish(ticket)
+
+    def _finish(self, ticket):
+        if self._inflight.get(ticket.pane) is ticket:
+            del self._inflight[ticket.pane]
+            timer = self._timers.get(ticket.pane)
+            if ticket.pane in self._pending and not timer.isActive():
+                self._send(ticket.pane)
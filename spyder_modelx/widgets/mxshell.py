@@ -44,6 +44,9 @@
 
 """modelx Widget."""
 import ast
+import importlib.util
+import inspect
+import pickle
 import uuid
 import time
 from collections import namedtuple
@@ -61,7 +64,12 @@ else:
 from spyder.utils import encoding
 from spyder.py3compat import to_text_string
 
+from spyder_modelx.mxkernelext import _decode_value
 from spyder_modelx.utility.tupleencoder import TupleEncoder, hinted_tuple_hook
+from spyder_modelx.utility.valuecache import ModelValueCache
+from spyder_modelx.utility.rpcstats import RpcStats
+from spyder_modelx.widgets.mxscheduler import MxRequestScheduler
+from spyder_modelx.widgets.mxworker import MxWorker
 from spyder_modelx.utility.formula import (
     is_funcdef, is_lambda, replace_funcname, get_funcname)
 
@@ -71,6 +79,39 @@ if spyder.version_info > (4,):
     )
 
 
+# Formats of values sent as buffers. See mxkernelext._encode_value
+MX_VALUE_FORMATS = (
+    (["arrow"] if importlib.util.find_spec("pyarrow") else [])
+    + (["pickle5"] if pickle.HIGHEST_PROTOCOL >= 5 else [])
+)
+
+# Numbers of rows in the first chunk and the largest chunks of streamed
+# values. Chunks double in size up to the largest.
+MX_FIRST_CHUNK_ROWS = 10000
+MX_MAX_CHUNK_ROWS = 500000
+
+# Number of elements from which values are kept in the kernel
+# and shown in windows. See get_obj_value
+MX_HANDLE_MIN_SIZE = 10000000
+
+
+class _MxValueStream:
+    """State of a value streamed in chunks. See get_obj_value"""
+
+    def __init__(self, key, generation, callback, chunk_callback,
+                 errback, msgtype):
+        self.key = key
+        self.generation = generation
+        self.callback = callback
+        self.chunk_callback = chunk_callback
+        self.errback = errback
+        self.msgtype = msgtype
+        self.is_calculated = False
+        self.nrows = 0
+        self.received = 0
+        self.start = None   # Time when the last chunk was requested
+
+
 def _quote_string(arg):
     if arg:
         return "'%s'" % arg
@@ -95,6 +136,7 @@ class MxShellWidget(ShellWidget):
     sig_mxproperty = Signal(object)
     sig_mxgetattrdict = Signal()     # Spyder 3 only
     sig_mxgetvalueinfo = Signal(object)     # Spyder 3 only
+    sig_mxkernelext = Signal(bool)
 
     mx_msgtypes = ['mxupdated',
                    'dataview',
@@ -114,21 +156,57 @@ class MxShellWidget(ShellWidget):
 
     mx_nondata_msgs = ['mxupdated']
 
+    # Attributes of the objects shown in each pane
+    mx_explorer_attrs = ['_is_derived', '__len__', '_evalrepr']
+    mx_property_attrs = ['formula', '_evalrepr', 'allow_none', 'parameters']
+
+    # Seconds between the updates of the numbers of values in cells
+    # in MxExplorer while the kernel runs code. 0 to disable the updates.
+    mx_count_interval = 1.0
+
     _mx_value = None
     _MxRequest = namedtuple("_MxRequest",
-                            ["msgtype", "code", "local_uuid", "usrexp"])
+                            ["msgtype", "code", "local_uuid", "usrexp",
+                             "start"])
+
+    # Kernel methods whose first parameters are msgtypes
+    mx_msgtype_methods = ['mx_get_value', 'mx_get_node', 'mx_get_adjacent',
+                          'mx_get_object', 'mx_get_evalresult']
 
     def __init__(self, *args, **kw):
 
         self._mx_exec = {}
+
+        # None: Not loaded, True: Loaded, False: Failed to load
+        self._mx_kernelext = None
+
+        # Callbacks and errbacks of mx_send_value requests by request ids
+        self._mx_value_requests = {}
+
+        # Values being streamed by request ids
+        self._mx_streams = {}
+
+        # Values retrieved by get_obj_value
+        self.mx_value_cache = ModelValueCache()
+
+        # Latency and payload statistics of kernel requests
+        self.mx_rpc_stats = RpcStats()
+
         super(MxShellWidget, self).__init__(*args, **kw)
 
+        # Scheduler of kernel requests from the modelx panes
+        self.mx_scheduler = MxRequestScheduler(self)
+
+        # Worker thread to decode and process large replies
+        self.mx_worker = MxWorker(self)
+
     # ---- modelx browser ----
     def set_mxexplorer(self, mxexplorer, mxmodelselector):
         """Set namespace browser widget"""
         self.mxexplorer = mxexplorer
         self.mxmodelselector = mxmodelselector
         mxexplorer.treeview.shell = self
+        self.mx_worker.sig_busy.connect(mxexplorer.set_refreshing)
         self.configure_mxexplorer()
 
     def configure_mxexplorer(self):
@@ -166,11 +244,76 @@ class MxShellWidget(ShellWidget):
             self.sig_mxproperty.connect(self.mxdataviewer.update_object)
 
     def get_obj_value(self, msgtype: str, obj: str, args: str,
-                      calc: bool=False):
-
+                      calc: bool=False, callback=None, errback=None,
+                      use_buffers=False, chunk_callback=None,
+                      handle_callback=None):
+        """Get the value of a modelx object
+
+        If ``callback`` is given, the call does not block and
+        ``callback`` is called with the result. ``errback`` is called
+        with the error message if the call fails.
+        If ``use_buffers`` is ``True`` in addition, pandas and numpy values
+        are sent as raw buffers instead of pickled objects.
+        Values retrieved with ``callback`` are saved in ``mx_value_cache``
+        and reused until the model is updated or code is executed in
+        the kernel. ``callback`` is called with ``[value, False]`` for
+        the values reused. They must not be changed by the receivers.
+
+        If ``chunk_callback`` is also given, long DataFrames and Series
+        are sent in chunks of rows. ``callback`` is called with the first
+        chunk, and then ``chunk_callback`` is called with
+        ``(reqid, chunk, received, nrows)`` each time a chunk arrives,
+        where ``received`` is the number of rows received so far and
+        ``nrows`` is the length of the value. ``chunk`` is ``None`` in
+        the first call right after ``callback``. The transfer stops if
+        ``chunk_callback`` returns ``False`` or ``cancel_stream`` is
+        called with ``reqid``. The chunks are not kept, so the value is
+        cached only if ``put_stream_value`` is called with the whole
+        value when the last chunk arrives.
+
+        If ``handle_callback`` is also given, DataFrames, Series and numeric
+        arrays with ``MX_HANDLE_MIN_SIZE`` elements or more are kept in
+        the kernel, and ``handle_callback`` is called with
+        ``[info, is_calculated]`` instead of ``callback``, where ``info``
+        is a dict of the id, type and shape of the value. Arrays with
+        more than 2 dimensions are shown by 2 dimensional slabs.
+        Windows of the value are retrieved by ``get_window``, and the value
+        must be released by ``close_handle``.
+        """
         # jsonargs = TupleEncoder(ensure_ascii=True).encode(args)
 
         if spyder.version_info > (4,):
+            if callback:
+                key = self.mx_value_cache.get_key(
+                    self.mxmodelselector.modellist, obj, args, calc)
+                result = self.mx_value_cache.get_result(key)
+                if result:
+                    callback(result)
+                    return
+                if chunk_callback and use_buffers and self._mx_kernelext:
+                    stream = _MxValueStream(
+                        key, self.mx_value_cache.generation,
+                        callback, chunk_callback, errback, msgtype)
+                else:
+                    stream = None
+                callback = self._cache_value(key, callback)
+
+            if callback and use_buffers and self._mx_kernelext:
+                reqid = uuid.uuid4().hex
+                self._mx_value_requests[reqid] = (
+                    callback, errback, msgtype, time.perf_counter(),
+                    handle_callback)
+                if stream:
+                    self._mx_streams[reqid] = stream
+                self.call_kernel(interrupt=True).mx_send_value(
+                    reqid, msgtype, obj, args, calc, MX_VALUE_FORMATS,
+                    MX_FIRST_CHUNK_ROWS if stream else None,
+                    MX_HANDLE_MIN_SIZE if handle_callback else None)
+                return
+            elif callback:
+                self.mx_call_async('mx_get_value', msgtype, obj, args, calc,
+                                   callback=callback, errback=errback)
+                return
             result = self.call_kernel(
                 interrupt=True,
                 blocking=True,
@@ -200,13 +343,42 @@ class MxShellWidget(ShellWidget):
             else:
                 raise RuntimeError('must not happen')
 
-            return self._mx_wait_reply(code, sig)
+            result = self._mx_wait_reply(code, sig)
+            if callback:
+                callback(result)
+            else:
+                return result
+
+    def _cache_value(self, key, callback):
+        """Wrap callback to save values in mx_value_cache"""
+        generation = self.mx_value_cache.generation
+
+        def wrapper(result):
+            self.mx_value_cache.put_value(key, result[0], generation)
+            callback(result)
 
-    def update_mxdataview(self, is_obj, obj=None, args=None, expr=None, calc=False):
+        return wrapper
+
+    def discard_stale_values(self):
+        """Remove cached values of the models no longer in the model list
+
+        Called when the tree of MxExplorer is updated.
+        """
+        self.mx_value_cache.discard_models(
+            set(m["id"] for m in self.mxmodelselector.modellist if m))
+
+    def update_mxdataview(self, is_obj, obj=None, args=None, expr=None,
+                          calc=False, callback=None, errback=None,
+                          use_buffers=False, chunk_callback=None,
+                          handle_callback=None):
         """Update dataview"""
         # expr = self.mxdataviewer.exprbox.get_expr()
         if is_obj:
-            return self.get_obj_value('dataview_getval', obj, args, calc)
+            return self.get_obj_value('dataview_getval', obj, args, calc,
+                                      callback=callback, errback=errback,
+                                      use_buffers=use_buffers,
+                                      chunk_callback=chunk_callback,
+                                      handle_callback=handle_callback)
         else:
             if expr:
                 method = "get_ipython().kernel.mx_get_evalresult('dataview', %s)" % expr
@@ -229,11 +401,8 @@ class MxShellWidget(ShellWidget):
             return
 
         if spyder.version_info > (4,):
-            result = self.call_kernel(
-                interrupt=True,
-                blocking=True,
-                timeout=CALL_KERNEL_TIMEOUT).mx_get_value_info(model)
-            self.mxdatalist.process_remote_view(result)
+            self.mx_call_async('mx_get_value_info', model,
+                               callback=self.mxdatalist.process_remote_view)
         else:
             code = "get_ipython().kernel.mx_get_value_info('%s')" % model
             self.mx_silent_exec_method(code, msgtype='get_value_info')
@@ -280,9 +449,16 @@ class MxShellWidget(ShellWidget):
                 else:
                     RuntimeError('must not happen')
 
-    def get_attrdict(self, fullname=None, attrs=None, recursive=False):
+    def get_attrdict(self, fullname=None, attrs=None, recursive=False,
+                     callback=None, errback=None):
 
         if spyder.version_info > (4,):
+            if callback:
+                self.mx_call_async(
+                    'mx_get_attrdict',
+                    fullname=fullname, attrs=attrs, recursive=recursive,
+                    callback=callback, errback=errback)
+                return
             return self.call_kernel(
                 interrupt=True,
                 blocking=True,
@@ -293,14 +469,29 @@ class MxShellWidget(ShellWidget):
             param = "'%s', ['formula', '_evalrepr', 'allow_none', 'parameters']" % fullname
             code = "get_ipython().kernel.mx_get_attrdict(" + param + ")"
 
-            return self._mx_wait_reply(
+            result = self._mx_wait_reply(
                 None,
                 self.sig_mxgetattrdict,
                 code
             )
-
+            if callback:
+                callback(result)
+            else:
+                return result
 
     def update_mxanalyzer(self, adjacency, update_attrdict=True):
+        """Schedule an update of the tab of adjacency in MxAnalyzer
+
+        Updates requested in quick succession are coalesced by
+        mx_scheduler, so only the latest one is sent to the kernel.
+        """
+        self.mx_scheduler.submit(
+            "analyzer_" + adjacency,
+            lambda ticket: self._update_mxanalyzer(
+                adjacency, update_attrdict, ticket)
+        )
+
+    def _update_mxanalyzer(self, adjacency, update_attrdict, ticket):
 
         tab = self.mxanalyzer.tabs[adjacency]
 
@@ -308,20 +499,35 @@ class MxShellWidget(ShellWidget):
             if not tab.attrdict:
                 return
             if update_attrdict:
-                tab.attrdict = self.get_attrdict(
+                self.mxanalyzer.update_status(
+                    adjacency, True, _("Retrieving..."))
+                self.get_attrdict(
                     fullname=tab.attrdict['fullname'],
-                    attrs=['formula', '_evalrepr', 'allow_none', 'parameters'],
-                    recursive=False
+                    attrs=self.mx_property_attrs,
+                    recursive=False,
+                    callback=ticket.wrap(
+                        lambda attrdict: self._set_mxanalyzer_obj(
+                            adjacency, attrdict, ticket)),
+                    errback=ticket.wrap(
+                        lambda msg: self.mxanalyzer.update_status(
+                            adjacency, False, msg))
                 )
-            if not tab.attrdict:
-                tab.clear_obj()
-                return
-            tab.set_argbox()
-            self._update_mxanalyzer_obj(adjacency, update_attrdict)
+            else:
+                self._set_mxanalyzer_obj(adjacency, tab.attrdict, ticket)
         elif tab.expr_radio.isChecked():
             self._update_mxanalyzer_expr(adjacency)
 
-    def _update_mxanalyzer_obj(self, adjacency, update_attrdict):
+    def _set_mxanalyzer_obj(self, adjacency, attrdict, ticket=None):
+
+        tab = self.mxanalyzer.tabs[adjacency]
+        tab.attrdict = attrdict
+        if not tab.attrdict:
+            tab.clear_obj()
+            return
+        tab.set_argbox()
+        self._update_mxanalyzer_obj(adjacency, ticket)
+
+    def _update_mxanalyzer_obj(self, adjacency, ticket=None):
 
         tab = self.mxanalyzer.tabs[adjacency]
         msgtype = "analyze_" + adjacency + "_setnode"
@@ -331,19 +537,24 @@ class MxShellWidget(ShellWidget):
 
         if spyder.version_info > (4,):
 
-            try:
-                result = self.call_kernel(
-                    interrupt=True,
-                    blocking=True,
-                    timeout=CALL_KERNEL_TIMEOUT).mx_get_node(
-                    msgtype, obj, args
-                )
+            def set_node(result):
                 self.mxanalyzer.update_status(adjacency, True)
                 self.sig_mxanalyzer.emit(adjacency, result)
-            except Exception as e:
-                msg = e.__class__.__name__ + ": " + str(e)
+
+            def set_error(msg):
                 self.mxanalyzer.update_status(adjacency, False, msg)
 
+            if ticket:
+                set_node, set_error = ticket.wrap(set_node), ticket.wrap(
+                    set_error)
+
+            self.mxanalyzer.update_status(adjacency, True, _("Retrieving..."))
+            self.mx_call_async(
+                'mx_get_node', msgtype, obj, args,
+                callback=set_node,
+                errback=set_error
+            )
+
         else:
             str1 = "get_ipython().kernel.mx_get_node"
             str2 = "('%s', '%s', '%s')" % (msgtype, obj, args)
@@ -378,12 +589,18 @@ class MxShellWidget(ShellWidget):
         for adj in ['precedents', 'succs']:
             self.update_mxanalyzer(adj)
 
-    def get_adjacent(self, obj: str, args: tuple, adjacency: str):
+    def get_adjacent(self, obj: str, args: tuple, adjacency: str,
+                     callback=None, errback=None):
 
         jsonargs = TupleEncoder(ensure_ascii=True).encode(args)
         msgtype = "analyze_" + adjacency
 
         if spyder.version_info > (4,):
+            if callback:
+                self.mx_call_async(
+                    'mx_get_adjacent', msgtype, obj, jsonargs, adjacency,
+                    callback=callback, errback=errback)
+                return
             result = self.call_kernel(
                 interrupt=True,
                 blocking=True,
@@ -413,7 +630,11 @@ class MxShellWidget(ShellWidget):
             else:
                 raise RuntimeError("must not happen")
 
-            return self._mx_wait_reply(code, sig)
+            result = self._mx_wait_reply(code, sig)
+            if callback:
+                callback(result)
+            else:
+                return result
 
     # ---- modelx property widget ----
     def set_mxproperty(self, mxproperty):
@@ -463,9 +684,13 @@ class MxShellWidget(ShellWidget):
 
                 return result
 
-    def get_modellist(self):
+    def get_modellist(self, callback=None, errback=None):
 
         if spyder.version_info > (4,):
+            if callback:
+                self.mx_call_async('mx_get_modellist',
+                                   callback=callback, errback=errback)
+                return
             mlist = self.call_kernel(
                 interrupt=True,
                 blocking=True,
@@ -473,6 +698,9 @@ class MxShellWidget(ShellWidget):
         else:
             code = "get_ipython().kernel.mx_get_modellist()"
             mlist = self._mx_wait_reply(code, self.sig_mxmodellist)
+            if callback:
+                callback(mlist)
+                return
 
         return mlist
 
@@ -483,7 +711,8 @@ class MxShellWidget(ShellWidget):
         else:
             arg = "None"
 
-        param = "'explorer', %s, ['_is_derived', '__len__', '_evalrepr'], recursive=True" % arg
+        param = "'explorer', %s, %r, recursive=True" % (
+            arg, self.mx_explorer_attrs)
 
         self.mx_silent_exec_method(
             "get_ipython().kernel.mx_get_object(" + param + ")",
@@ -716,12 +945,199 @@ class MxShellWidget(ShellWidget):
             elif self.kernel_client.comm_channel is None:
                 return
             if self.namespacebrowser and self.spyder_kernel_comm.is_open():
-                mlist = self.get_modellist()
-                name = self.mxmodelselector.get_selected_model(mlist)
-                self.update_modeltree(name)
-                self.reload_mxproperty()
-                self.update_datalist()
-                self.update_mxanalyzer_all()
+                if self._mx_kernelext is None:
+                    # The panes are refreshed after the extension is loaded
+                    self.load_mxkernelext()
+                else:
+                    self.refresh_mxpanes()
+
+    # ---- Kernel extension ----
+    def load_mxkernelext(self):
+        """Send the kernel extension to the kernel and register it
+
+        The code is executed silently, and the reply is handled
+        in _handle_execute_reply.
+        """
+        from spyder_modelx import mxkernelext
+
+        source = inspect.getsource(mxkernelext)
+        code = (
+            "(lambda ns: (exec(%r, ns), "
+            "ns['register'](get_ipython().kernel)))({})" % source
+        )
+        self.mx_silent_exec_method(code=code, msgtype='kernelext')
+
+    def refresh_mxpanes(self):
+        """Refresh all the modelx panes
+
+        If the kernel extension is loaded, the data for all the panes is
+        retrieved by a single call to the kernel.
+        """
+        if not self._mx_kernelext:
+            mlist = self.get_modellist()
+            name = self.mxmodelselector.get_selected_model(mlist)
+            self.update_modeltree(name)
+            self.reload_mxproperty()
+            self.update_datalist()
+            self.update_mxanalyzer_all()
+            return
+
+        self.mx_call_async(
+            'mx_refresh_bundle', self._get_bundle_request(),
+            callback=self._process_bundle,
+            errback=lambda msg: debug_print("mx_refresh_bundle: " + msg),
+            decode_in_worker=True
+        )
+
+    def mx_call_async(self, name, *args, callback=None, errback=None,
+                      decode_in_worker=False, **kwargs):
+        """Call a kernel method without blocking
+
+        ``callback`` is called with the returned value, and ``errback`` is
+        called with the error message if the method raises an error.
+        Calls from different panes can be in flight at the same time.
+        If ``decode_in_worker`` is True, the returned value is decoded
+        in the worker thread, and ``callback`` is called afterwards.
+
+        Without the kernel extension, errors are not reported back
+        from non-blocking calls, so the call blocks instead.
+        """
+        if name in self.mx_msgtype_methods and args:
+            msgtype = args[0]
+        else:
+            msgtype = None
+        start = time.perf_counter()
+
+        if self._mx_kernelext:
+
+            def decode(data):
+                decode_start = time.perf_counter()
+                value = cloudpickle.loads(data)
+                return value, time.perf_counter() - decode_start
+
+            def handle_reply(reply):
+                wall = time.perf_counter() - start
+                if reply["error"] is None:
+
+                    def handle_value(result):
+                        value, decode_time = result
+                        self.mx_rpc_stats.record(
+                            name, msgtype, wall=wall, kernel=reply["time"],
+                            nbytes=len(reply["data"]), decode=decode_time)
+                        if callback:
+                            callback(value)
+
+                    if decode_in_worker:
+                        self.mx_worker.submit(
+                            lambda: decode(reply["data"]),
+                            callback=handle_value)
+                    else:
+                        handle_value(decode(reply["data"]))
+                else:
+                    self.mx_rpc_stats.record(
+                        name, msgtype, wall=wall, kernel=reply["time"])
+                    if errback:
+                        errback(reply["error"])
+
+            self.call_kernel(
+                interrupt=True,
+                callback=handle_reply).mx_call(name, args, kwargs)
+
+        else:
+            try:
+                value = getattr(self.call_kernel(
+                    interrupt=True,
+                    blocking=True,
+                    timeout=CALL_KERNEL_TIMEOUT), name)(*args, **kwargs)
+            except Exception as e:
+                if errback:
+                    errback(e.__class__.__name__ + ": " + str(e))
+                return
+            finally:
+                self.mx_rpc_stats.record(
+                    name, msgtype, wall=time.perf_counter() - start)
+
+            if callback:
+                callback(value)
+
+    def _get_bundle_request(self):
+
+        selector = self.mxmodelselector
+        idx = selector.currentIndex()
+        request = {
+            "explorer": {
+                "model_id": selector.modellist[idx]["id"] if idx > 0 else None,
+                "attrs": self.mx_explorer_attrs,
+                "base": self.mxexplorer.revision,
+                "expanded": self.mxexplorer.expanded
+            },
+            "datalist": True,
+            "analyzer": {}
+        }
+
+        objid = self.mxproperty.objectId
+        if objid:
+            request["property"] = {
+                "fullname": objid,
+                "attrs": self.mx_property_attrs
+            }
+
+        for adjacency in ['precedents', 'succs']:
+            tab = self.mxanalyzer.tabs[adjacency]
+            if tab.object_radio.isChecked() and tab.attrdict:
+                argtxt = tab.argbox.get_expr()
+                if argtxt is None:  # Invalid expression
+                    continue
+                request["analyzer"][adjacency] = {
+                    "fullname": tab.attrdict['fullname'],
+                    "attrs": self.mx_property_attrs,
+                    "args": "(" + argtxt + ("," if argtxt else "") + ")"
+                }
+
+        return request
+
+    def _process_bundle(self, result):
+
+        errors = result["errors"]
+
+        self.mxmodelselector.update_modellist(result["modellist"])
+        name = self.mxmodelselector.get_selected_model()
+        if name == result["model"] and "explorer" not in errors:
+            self.mxexplorer.process_remote_tree(result["explorer"])
+        else:
+            self.update_modeltree(name)
+
+        if "property" in result:
+            self.sig_mxproperty.emit(result["property"])
+
+        if "datalist" in result:
+            self.mxdatalist.process_remote_view(result["datalist"])
+
+        for adjacency in ['precedents', 'succs']:
+            tab = self.mxanalyzer.tabs[adjacency]
+            if self.mx_scheduler.is_busy("analyzer_" + adjacency):
+                # Newer data is requested by the user
+                continue
+            elif tab.expr_radio.isChecked():
+                self._update_mxanalyzer_expr(adjacency)
+                continue
+            elif adjacency not in result["analyzer"]:
+                continue
+
+            data = result["analyzer"][adjacency]
+            if "attrdict" in data:
+                tab.attrdict = data["attrdict"]
+                if not tab.attrdict:
+                    tab.clear_obj()
+                    continue
+                tab.set_argbox()
+
+            if "analyzer_" + adjacency in errors:
+                self.mxanalyzer.update_status(
+                    adjacency, False, errors["analyzer_" + adjacency])
+            else:
+                self.mxanalyzer.update_status(adjacency, True)
+                self.sig_mxanalyzer.emit(adjacency, data["node"])
 
     # ---- Private API (defined by us) ------------------------------
     def mx_silent_exec_method(self, usrexp=None, code='', msgtype=None):
@@ -767,7 +1183,8 @@ class MxShellWidget(ShellWidget):
         )
         self._mx_exec[msg_id] = self._MxRequest(
             msgtype=msgtype, code=code, local_uuid=local_uuid,
-            usrexp=usrexp[local_uuid] if usrexp else usrexp)
+            usrexp=usrexp[local_uuid] if usrexp else usrexp,
+            start=time.perf_counter())
 
         if 'hidden' in self._ExecutionRequest._fields:  # depends on qtconsole version
             self._request_info['execute'][msg_id] = self._ExecutionRequest(
@@ -795,6 +1212,7 @@ class MxShellWidget(ShellWidget):
         # Refresh namespacebrowser after the kernel starts running
         exec_count = msg['content'].get('execution_count', '')
         if exec_count == 0 and self._kernel_is_starting:
+            self._mx_kernelext = None
             if self.namespacebrowser is not None:
                 self.set_namespace_view_settings()
                 self.refresh_namespacebrowser()
@@ -810,7 +1228,12 @@ class MxShellWidget(ShellWidget):
         if cond:
             msgtype = self._mx_exec[msg_id].msgtype
 
-            if msgtype and msgtype[:len("analyze_")] == "analyze_":
+            if msgtype == 'kernelext':
+                self._mx_kernelext = msg['content']['status'] == 'ok'
+                self.sig_mxkernelext.emit(self._mx_kernelext)
+                self.refresh_mxpanes()
+
+            elif msgtype and msgtype[:len("analyze_")] == "analyze_":
                 local_uuid = self._mx_exec[msg_id].local_uuid
                 result = msg['content']['user_expressions'][local_uuid]
                 adjacency = msgtype.split("_")[1]
@@ -823,8 +1246,21 @@ class MxShellWidget(ShellWidget):
             self._mx_exec.pop(msg_id)
             self._request_info['execute'].pop(msg_id)
         else:
+            # The code may have changed values without changing the tree
+            self.mx_value_cache.clear()
             super(MxShellWidget, self)._handle_execute_reply(msg)
 
+    def _handle_status(self, msg):
+        """Reimplemented to reload the kernel extension after restarts"""
+        state = msg['content'].get('execution_state', '')
+        if state == 'starting':
+            self._mx_kernelext = None
+            self._mx_value_requests.clear()
+            self._mx_streams.clear()
+            self.mx_value_cache.clear()
+            self.mx_scheduler.clear()
+        super(MxShellWidget, self)._handle_status(msg)
+
     def _handle_modelx_msg(self, msg):
         """
         Handle internal spyder messages
@@ -834,15 +1270,36 @@ class MxShellWidget(ShellWidget):
 
         msgtype = msg['content'].get('mx_msgtype')
 
+        if msgtype == 'value':
+            self._handle_value_msg(msg)
+            return
+        elif msgtype == 'chunk':
+            self._handle_chunk_msg(msg)
+            return
+        elif msgtype == 'counts':
+            self.mxexplorer.update_counts(msg['content']['counts'])
+            return
+
         if msgtype in self.mx_msgtypes:
             # Deserialize data
+            nbytes = len(msg['buffers'][0])
+            decode_start = time.perf_counter()
             try:
                 value = cloudpickle.loads(bytes(msg['buffers'][0]))
             except Exception as msg:
                 value = None
                 self._kernel_reply = repr(msg)
 
+            request = self._mx_exec.get(msg_id)
+            if request and request.msgtype == msgtype:
+                self.mx_rpc_stats.record(
+                    'mx_silent_exec_method', msgtype,
+                    wall=decode_start - request.start,
+                    nbytes=nbytes,
+                    decode=time.perf_counter() - decode_start)
+
             if msgtype == 'mxupdated':
+                self.mx_value_cache.clear()
                 self.sig_mxupdated.emit()
             elif msgtype == 'dataview':
                 self.sig_mxdataview_eval.emit(value)
@@ -895,3 +1352,215 @@ class MxShellWidget(ShellWidget):
         else:
             debug_print("No such modelx message type: %s" % msgtype)
 
+    def _handle_value_msg(self, msg):
+        """Handle a value sent by mx_send_value"""
+        content = msg['content']
+        request = self._mx_value_requests.pop(content['reqid'], None)
+        if request is None:
+            return
+
+        callback, errback, msgtype, start, handle_callback = request
+        stream = self._mx_streams.pop(content['reqid'], None)
+        decode_start = time.perf_counter()
+        stats = dict(wall=decode_start - start, kernel=content.get('time'))
+        if content['error']:
+            errmsg = content['error']
+        elif content.get('handle'):
+            self.mx_rpc_stats.record('mx_send_value', msgtype, **stats)
+            handle_callback([content['handle'], content['is_calculated']])
+            return
+        else:
+            try:
+                value = _decode_value(content['format'], msg['buffers'])
+            except Exception as e:
+                errmsg = e.__class__.__name__ + ": " + str(e)
+            else:
+                self.mx_rpc_stats.record(
+                    'mx_send_value', msgtype,
+                    nbytes=sum(memoryview(b).nbytes for b in msg['buffers']),
+                    decode=time.perf_counter() - decode_start,
+                    **stats)
+                if stream and content.get('nrows') is not None:
+                    self._start_stream(content, stream, value)
+                else:
+                    callback([value, content['is_calculated']])
+                return
+
+        self.mx_rpc_stats.record('mx_send_value', msgtype, **stats)
+
+        if errback:
+            errback(errmsg)
+
+    def _start_stream(self, content, stream, value):
+        reqid = content['reqid']
+        stream.is_calculated = content['is_calculated']
+        stream.nrows = content['nrows']
+        stream.received = len(value)
+        self._mx_streams[reqid] = stream
+
+        stream.callback([value, stream.is_calculated])
+        if reqid in self._mx_streams:
+            self._next_chunk(reqid, None)
+
+    def _next_chunk(self, reqid, chunk):
+        """Pass chunk to chunk_callback and request the next chunk"""
+        stream = self._mx_streams[reqid]
+        if stream.chunk_callback(
+                reqid, chunk, stream.received, stream.nrows) is False:
+            self.cancel_stream(reqid)
+        elif reqid not in self._mx_streams:
+            return  # Cancelled in chunk_callback
+        elif stream.received < stream.nrows:
+            size = min(max(stream.received, MX_FIRST_CHUNK_ROWS),
+                       MX_MAX_CHUNK_ROWS)
+            stream.start = time.perf_counter()
+            self.call_kernel(interrupt=True).mx_send_chunk(
+                reqid, stream.received,
+                min(stream.received + size, stream.nrows),
+                MX_VALUE_FORMATS)
+        else:
+            self.cancel_stream(reqid)
+
+    def put_stream_value(self, reqid, value):
+        """Save the whole value of a stream in mx_value_cache
+
+        ``value`` is the value built from the chunks by the receiver,
+        which is cached instead of another copy of the chunks.
+        """
+        stream = self._mx_streams.get(reqid)
+        if stream and stream.received == stream.nrows:
+            self.mx_value_cache.put_value(stream.key, value,
+                                          stream.generation)
+
+    def get_window(self, handle, row0, row1, col0, col1,
+                   callback, errback=None, slab=None):
+        """Get a window of a value kept in the kernel. See get_obj_value
+
+        See mx_get_window in mxkernelext for ``slab``.
+        """
+        self.mx_call_async('mx_get_window', handle, row0, row1, col0, col1,
+                           slab, callback=callback, errback=errback)
+
+    def get_max_min(self, handle, callback, errback=None):
+        """Get the maximums and minimums of the columns of a DataFrame
+        kept in the kernel. See mx_get_max_min in mxkernelext
+        """
+        self.mx_call_async('mx_get_max_min', handle,
+                           callback=callback, errback=errback)
+
+    def get_subtree(self, fullname, keys, expanded, callback, errback=None,
+                    page=None):
+        """Get the children of an object collapsed in MxExplorer
+
+        See mx_get_subtree in mxkernelext
+        """
+        self.mx_call_async('mx_get_subtree', fullname, keys,
+                           self.mx_explorer_attrs, expanded, page,
+                           callback=callback, errback=errback)
+
+    def find_names(self, model_id, query, mode, callback, errback=None):
+        """Find objects in a model by their names
+
+        See mx_find_names in mxkernelext
+        """
+        self.mx_call_async('mx_find_names', model_id, query, mode,
+                           callback=callback, errback=errback)
+
+    def watch_counts(self, fullnames):
+        """Have the kernel send the numbers of values in cells
+
+        ``fullnames`` maps the ids of the cells to their fullnames.
+        See mx_watch_counts in mxkernelext
+        """
+        if self._mx_kernelext:
+            self.mx_call_async('mx_watch_counts', fullnames,
+                               self.mx_count_interval)
+
+    def set_count_interval(self, interval):
+        """Change the interval of the updates by watch_counts"""
+        self.mx_count_interval = interval
+        self.watch_counts(self.mxexplorer.watched)
+
+    def set_memory_shown(self, shown):
+        """Show or hide the bytes of the values of objects in MxExplorer
+
+        The bytes are only computed in the kernel while they are shown.
+        See _set_memory in mxkernelext
+        """
+        attrs = [attr for attr in self.mx_explorer_attrs
+                 if attr != '_memory']
+        self.mx_explorer_attrs = attrs + ['_memory'] if shown else attrs
+        self.refresh_mxpanes()
+
+    def clear_caches(self, fullname):
+        """Clear the calculated values of the cells in an object
+
+        See mx_clear_caches in mxkernelext
+        """
+        self.mx_call_async(
+            'mx_clear_caches', fullname,
+            callback=lambda _: self.refresh_mxpanes(),
+            errback=lambda msg: debug_print("mx_clear_caches: " + msg))
+
+    def start_profile(self, callback=None):
+        """Start recording the calls and times of formulas
+
+        See mx_start_profile in mxkernelext
+        """
+        self.mx_call_async(
+            'mx_start_profile', callback=callback,
+            errback=lambda msg: debug_print("mx_start_profile: " + msg))
+
+    def stop_profile(self, callback=None):
+        """Stop recording the calls and times of formulas"""
+        self.mx_call_async(
+            'mx_stop_profile', callback=callback,
+            errback=lambda msg: debug_print("mx_stop_profile: " + msg))
+
+    def get_profile(self, limit, callback):
+        """Get the records of profiling. See mx_get_profile in mxkernelext"""
+        self.mx_call_async(
+            'mx_get_profile', limit, callback=callback,
+            errback=lambda msg: debug_print("mx_get_profile: " + msg))
+
+    def close_handle(self, handle):
+        """Release a value kept in the kernel. See get_obj_value"""
+        if self.kernel_client is not None:
+            self.call_kernel(interrupt=True).mx_close_handle(handle)
+
+    def cancel_stream(self, reqid):
+        """Stop streaming a value and release it in the kernel"""
+        self._mx_streams.pop(reqid, None)
+        self.call_kernel(interrupt=True).mx_close_stream(reqid)
+
+    def _handle_chunk_msg(self, msg):
+        """Handle a chunk of a value sent by mx_send_chunk"""
+        content = msg['content']
+        reqid = content['reqid']
+        stream = self._mx_streams.get(reqid)
+        if stream is None:  # Cancelled
+            return
+
+        decode_start = time.perf_counter()
+        errmsg = content['error']
+        if not errmsg:
+            try:
+                value = _decode_value(content['format'], msg['buffers'])
+            except Exception as e:
+                errmsg = e.__class__.__name__ + ": " + str(e)
+
+        if errmsg:
+            self.cancel_stream(reqid)
+            if stream.errback:
+                stream.errback(errmsg)
+            return
+
+        self.mx_rpc_stats.record(
+            'mx_send_chunk', stream.msgtype,
+            wall=decode_start - stream.start,
+            nbytes=sum(memoryview(b).nbytes for b in msg['buffers']),
+            decode=time.perf_counter() - decode_start)
+
+        stream.received = content['stop']
+        self._next_chunk(reqid, value)
+
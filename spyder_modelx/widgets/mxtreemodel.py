@@ -56,7 +56,7 @@
 ##
 #############################################################################
 
-import itertools
+import bisect
 import enum
 from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt
 
@@ -66,39 +66,342 @@ class TreeCol(enum.IntEnum):
     PARAM = 2
     IS_DERIVED = 3
     LEN = 4
-    VAL = 5
+    MEMORY = 5
+    CALLS = 6
+    SELF_TIME = 7
+    TOTAL_TIME = 8
+    VAL = 9
+
+
+# Columns of the records of profiling. See MxTreeModel.profile
+PROFILE_COLUMNS = {
+    TreeCol.CALLS: ("Calls", lambda s: str(s["calls"])),
+    TreeCol.SELF_TIME: ("Self (ms)", lambda s: "%.1f" % (s["self"] * 1000)),
+    TreeCol.TOTAL_TIME: ("Total (ms)", lambda s: "%.1f" % (s["total"] * 1000))
+}
+
+
+_shared_params = {}
+
+
+def format_bytes(nbytes):
+    """Returns a number of bytes as a string such as '1.5 MB'"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            break
+        nbytes /= 1024
+    return ("%d %s" if unit == "B" else "%.1f %s") % (nbytes, unit)
+
+
+def _is_container(value):
+    return isinstance(value, dict) and isinstance(value.get("items"), dict)
+
+
+def compact_node(node):
+    """Share or remove redundant attributes of an object in tree data
+
+    Parameter tuples are replaced with shared ones and ``_evalrepr``
+    with ``fullname`` if they are equal. ``keys`` of the containers is
+    removed as MxExplorer does not use it, and so is ``_digest`` of the
+    objects without containers, as their ``_subdigest`` changes only
+    when their own attributes change. This makes the objects of large
+    models take less memory. Returns the containers of node.
+    """
+    params = node.get("parameters")
+    if params:
+        params = tuple(params)
+        node["parameters"] = _shared_params.setdefault(params, params)
+    if "_evalrepr" in node and node["_evalrepr"] == node.get("fullname"):
+        node["_evalrepr"] = node["fullname"]
+
+    containers = [(key, val) for key, val in node.items()
+                  if val.__class__ is dict and "items" in val]
+    for _, val in containers:
+        val.pop("keys", None)
+    if not containers and "_subdigest" in node:
+        node.pop("_digest", None)
+    return containers
+
+
+def merge_tree(data, base, new=None):
+    """Replace unchanged subtrees in tree data with the ones in base
+
+    Subtrees unchanged since the base revision are sent from the kernel
+    as dicts of their ids and ``_unchanged``. They are replaced with
+    the subtrees with the same ids in ``base``, so that unchanged
+    subtrees are identical objects in the old and new data.
+    KeyError is raised if ``base`` does not have them.
+    Subtrees whose ``_subdigest`` is the same as the ones in ``base``
+    are also replaced, without comparing their contents.
+    The other objects are compacted by :func:`compact_node`, and
+    appended to ``new`` if it is given.
+    """
+    if data.get("_unchanged"):
+        if base is None or base["id"] != data["id"]:
+            raise KeyError(data["id"])
+        return base
+    elif (base is not None and "_subdigest" in data
+          and base.get("_subdigest") == data["_subdigest"]
+          and base["id"] == data["id"]):
+        return base
+
+    if new is not None:
+        new.append(data)
+    for key, val in compact_node(data):
+        if base and key in base:
+            baseitems = base[key]["items"]
+        else:
+            baseitems = {}
+        items = val["items"]
+        for name, child in items.items():
+            items[name] = merge_tree(child, baseitems.get(name), new)
+
+    return data
+
+
+def is_changed(olddata, newdata):
+    """Returns True if the subtrees of the tree data are different
+
+    Unchanged subtrees are identical objects after :func:`merge_tree`.
+    Data with ``_subdigest`` are compared by it, and other data by
+    their contents.
+    """
+    if olddata is newdata:
+        return False
+    elif "_subdigest" in newdata:
+        return olddata.get("_subdigest") != newdata["_subdigest"]
+    else:
+        return olddata != newdata
+
+
+def build_items(data, base=None):
+    """Merge tree data with base and create the items of the tree
+
+    Returns the root :class:`ModelItem`. The children of the items are
+    created for the objects not replaced by :func:`merge_tree`, as
+    the other items are not used to update :class:`MxTreeModel`.
+    ``base`` is only read, so this can be called outside the GUI thread
+    while ``base`` is shown.
+    """
+    new = []
+    data = merge_tree(data, base, new)
+    newids = set(id(node) for node in new)
+
+    root = ModelItem(data)
+    stack = [root] if id(data) in newids else []
+    while stack:
+        item = stack.pop()
+        stack.extend(child for child in item.childItems
+                     if isinstance(child, ViewItem)
+                     or id(child.itemData) in newids)
+    return root
+
+
+def _group_rows(rows):
+    """Returns pairs of the first and last rows of consecutive rows
+
+    Example: [2, 3, 4, 7, 8] -> [(2, 4), (7, 8)]
+    """
+    groups = []
+    for row in rows:
+        if groups and groups[-1][1] == row - 1:
+            groups[-1][1] = row
+        else:
+            groups.append([row, row])
+    return [tuple(g) for g in groups]
+
+
+def _increasing_subsequence(seq):
+    """Returns the set of the values of a longest increasing subsequence
+
+    The values in seq must be unique. O(n log n) by patience sorting.
+    """
+    tails = []      # Indexes in seq of the last values of subsequences
+    tailvalues = []
+    prevs = [None] * len(seq)
+    for i, value in enumerate(seq):
+        pos = bisect.bisect_left(tailvalues, value)
+        if pos > 0:
+            prevs[i] = tails[pos - 1]
+        if pos == len(tails):
+            tails.append(i)
+            tailvalues.append(value)
+        else:
+            tails[pos] = i
+            tailvalues[pos] = value
+
+    result = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        result.add(seq[i])
+        i = prevs[i]
+    return result
+
+
+def get_expanded(data):
+    """Returns the containers whose items are in tree data
+
+    The containers are returned as a list of pairs of the object ids and
+    the container keys, to be passed to the kernel as ``expanded``.
+    The containers of collapsed objects only have the numbers of their
+    items in ``_pruned``. The pages of the containers of item spaces
+    are added to their pairs.
+    """
+    result = []
+
+    def visit(node):
+        for key, val in node.items():
+            if _is_container(val) and "_pruned" not in val:
+                result.append((node["id"], key) + tuple(val.get("_page", ())))
+                for child in val["items"].values():
+                    visit(child)
+
+    if data:
+        visit(data)
+    return result
 
 
 class BaseItem(object):
-    """Base Item class for all tree item classes."""
+    """Base Item class for all tree item classes.
+
+    Each item keeps its row in the parent in ``_row``, and the children
+    by their keys in ``_childIndex``, so that rows and children are
+    looked up without scanning the children. The rows of the children
+    after a change are updated when a row is next looked up, so that
+    successive changes do not renumber the children every time.
+    The children must be changed through the methods of this class
+    after they are created.
+
+    Items have ``__slots__`` instead of ``__dict__`` to take less memory
+    for large models. Subclasses must define ``__slots__`` too.
+    """
+    __slots__ = ("parentItem", "itemData", "_childItems", "_childIndex",
+                 "_dirtyRow", "_row")
 
     def __init__(self, data, parent=None):
 
         self.parentItem = parent
-        self.itemData = None
-        self.childItems = []
-        self.updateData(data)
+        self.itemData = data
+        self._childItems = None
+        self._childIndex = None     # child keys -> children if any
+        self._dirtyRow = None   # First child whose _row is not updated
+        self._row = 0
 
-    def updateData(self, data):
-        if self.itemData != data:
-            self.itemData = data
+    @property
+    def key(self):
+        """Key to identify the item among its siblings"""
+        raise NotImplementedError
+
+    @property
+    def childItems(self):
+        """Child items, created from itemData when first accessed.
+
+        Items without children share an empty tuple as the children.
+        """
+        if self._childItems is None:
+            self._childItems = []
             self.updateChild()
-        else:
+            if self._childItems:
+                self._childIndex = {
+                    item.key: item for item in self._childItems}
+                self._renumberChildren(0)
+            else:
+                self._childItems = ()
+        return self._childItems
+
+    def isChildCreated(self):
+        return self._childItems is not None
+
+    def updateData(self, data):
+        if is_changed(self.itemData, data):
             self.itemData = data
+            self._childItems = None
+            self._childIndex = None
 
     def updateChild(self):
         raise NotImplementedError
 
+    # Keys of the containers in itemData whose items are the children
+    fetchKeys = ()
+
+    def canFetchMore(self):
+        """Returns True if the children are not retrieved from the kernel"""
+        return any("_pruned" in self.itemData[key] for key in self.fetchKeys)
+
+    def hasChildren(self):
+        return self.childCount() > 0 or any(
+            self.itemData[key].get("_pruned") for key in self.fetchKeys)
+
+    def getFetchTarget(self):
+        """Returns the fullname of the object and the keys to retrieve"""
+        return self.itemData['fullname'], list(self.fetchKeys)
+
+    def setFetchedData(self, containers):
+        self.itemData.update(containers)
+
+    def isPaged(self):
+        """Returns True if the children are retrieved in pages"""
+        return False
+
     def changeParent(self, parent):
         self.parentItem = parent
 
     def appendChild(self, item):
-        item.changeParent(self)
-        self.childItems.append(item)
+        self.insertChildren(self.childCount(), [item])
 
     def insertChild(self, index, item):
-        item.changeParent(self)
-        self.childItems.insert(index, item)
+        self.insertChildren(index, [item])
+
+    def insertChildren(self, position, items):
+        if not self.childItems:
+            self._childItems = []
+        self._childItems[position:position] = items
+        if self._childIndex is None:
+            self._childIndex = {}
+        for item in items:
+            item.changeParent(self)
+            self._childIndex[item.key] = item
+        self._renumberChildren(position)
+
+    def removeChildren(self, position, count):
+        removed = self.childItems[position:position + count]
+        del self.childItems[position:position + count]
+        for item in removed:
+            if self._childIndex.get(item.key) is item:
+                del self._childIndex[item.key]
+        self._renumberChildren(position)
+        return removed
+
+    def moveChildren(self, index_from, length, index_to):
+        """Move children before the child at index_to before the move"""
+        items = self.childItems[index_from:index_from + length]
+        del self.childItems[index_from:index_from + length]
+        if index_to > index_from:
+            index_to -= length
+        self.childItems[index_to:index_to] = items
+        self._renumberChildren(min(index_from, index_to))
+
+    def _renumberChildren(self, start):
+        """Mark the rows of the children from start to be updated"""
+        if self._dirtyRow is None or start < self._dirtyRow:
+            self._dirtyRow = start
+
+    def _updateRows(self):
+        if self._dirtyRow is not None:
+            children = self._childItems
+            for row in range(self._dirtyRow, len(children)):
+                children[row]._row = row
+            self._dirtyRow = None
+
+    def childByKey(self, key):
+        """Returns the child whose key is key or None"""
+        self.childItems     # Create children if not yet
+        return self._childIndex.get(key) if self._childIndex else None
+
+    def childRow(self, item):
+        """Returns the row of the child equal to item or -1"""
+        child = self.childByKey(item.key)
+        return child.row() if child is not None else -1
 
     def child(self, row):
         return self.childItems[row]
@@ -107,7 +410,7 @@ class BaseItem(object):
         return len(self.childItems)
 
     def columnCount(self):
-        return 5
+        return 9
 
     def data(self, column):
 
@@ -128,6 +431,11 @@ class BaseItem(object):
                 return str(l) if l else ""      # Hide 0
             else:
                 return None
+        elif column == TreeCol.MEMORY:
+            if '_memory' in self.itemData:
+                return format_bytes(self.itemData['_memory'])
+            else:
+                return None
         else:
             raise IndexError
 
@@ -136,7 +444,8 @@ class BaseItem(object):
 
     def row(self):
         if self.parentItem:
-            return self.parentItem.childItems.index(self)
+            self.parentItem._updateRows()
+            return self._row
         return 0
 
     def getType(self):
@@ -146,16 +455,23 @@ class BaseItem(object):
         raise NotImplementedError
 
     def __getattr__(self, item):
+        if item in BaseItem.__slots__:  # Not set yet
+            raise AttributeError(item)
         return self.itemData[item]
 
 
 class InterfaceItem(BaseItem):
     """Object item, such as Model, Space, Cells"""
+    __slots__ = ()
 
     @property
     def objid(self):
         return self.itemData['id']
 
+    @property
+    def key(self):
+        return self.objid
+
     def __eq__(self, other):
         if isinstance(other, InterfaceItem):
             return self.objid == other.objid
@@ -167,11 +483,16 @@ class InterfaceItem(BaseItem):
 
 
 class ViewItem(BaseItem):
+    __slots__ = ()
 
     @property
     def attrid(self):
         return self.getType()
 
+    @property
+    def key(self):
+        return ("view", self.attrid)
+
     def __eq__(self, other):
         if isinstance(other, ViewItem):
             return (self.parent() == other.parent()
@@ -183,6 +504,7 @@ class ViewItem(BaseItem):
 
 class SpaceContainerItem(InterfaceItem):
     """Base Item class for Models and Spaces which inherit SpaceContainer."""
+    __slots__ = ()
 
     def updateChild(self):
         raise NotImplementedError
@@ -206,9 +528,23 @@ class SpaceContainerItem(InterfaceItem):
 
 class ModelItem(SpaceContainerItem):
     """Item class for a Model (root item)"""
+    __slots__ = ()
+    fetchKeys = ('spaces', 'refs')
+
     def __init__(self, data):
         super(ModelItem, self).__init__(data, parent=None)
 
+    def getSpaceContainerList(self):
+        if '_namedspaces' in self.itemData:
+            return [self.itemData['fullname']] + [
+                fullname for fullname, _ in self.itemData['_namedspaces']]
+        return super(ModelItem, self).getSpaceContainerList()
+
+    def getChildSpaceList(self):
+        if '_namedspaces' in self.itemData:
+            return [namedid for _, namedid in self.itemData['_namedspaces']]
+        return super(ModelItem, self).getChildSpaceList()
+
     def updateChild(self):
         data = self.itemData
         self.childItems.clear()
@@ -223,10 +559,14 @@ class ModelItem(SpaceContainerItem):
 
 class SpaceItem(SpaceContainerItem):
     """Item class for Space objects."""
+    __slots__ = ()
+    fetchKeys = ('named_spaces', 'cells', 'refs')
+
     def updateChild(self):
         self.childItems.clear()
-        dynspaces = self.itemData['_named_itemspaces']['items']
-        if len(dynspaces) > 0:
+        dynspaces = self.itemData['_named_itemspaces']
+        if (dynspaces.get('_pruned') or len(dynspaces['items']) > 0
+                or '_page' in dynspaces):
             self.childItems.append(ItemSpaceMapItem(dynspaces, self))
 
         for space in self.itemData['named_spaces']['items'].values():
@@ -251,30 +591,87 @@ class SpaceItem(SpaceContainerItem):
         else:
             return ''
 
-class UserSpaceItem(SpaceItem): pass
+class UserSpaceItem(SpaceItem):
+    __slots__ = ()
 
-class ItemSpaceItem(SpaceItem): pass
+class ItemSpaceItem(SpaceItem):
+    __slots__ = ()
 
 
 class ItemSpaceMapItem(ViewItem):
-    """Item class for parent nodes of dynamic spaces of a space."""
+    """Item class for parent nodes of dynamic spaces of a space.
+
+    The item data is the container of the item spaces in the parent.
+    When the item spaces are paged in the kernel, the container
+    only has the item spaces in ``_page``, which is a list of the
+    start and stop of the range and a prefix of the arguments of the
+    item spaces. ``_total`` of the container is the number of the
+    item spaces whose arguments start with the prefix.
+    """
+    __slots__ = ()
+
+    def canFetchMore(self):
+        return '_pruned' in self.itemData
+
+    def hasChildren(self):
+        return self.childCount() > 0 or bool(self.itemData.get('_pruned'))
+
+    def getFetchTarget(self):
+        return self.parent().itemData['fullname'], ['_named_itemspaces']
+
+    def setFetchedData(self, containers):
+        self.parent().itemData.update(containers)
+        self.itemData = containers['_named_itemspaces']
+
+    def isPaged(self):
+        return '_page' in self.itemData
+
+    def getPage(self):
+        """Returns the start, stop and prefix of the page"""
+        return self.itemData['_page']
+
     def updateChild(self):
         self.childItems.clear()
-        for space in self.itemData.values():
+        for space in self.itemData['items'].values():
             self.childItems.append(ItemSpaceItem(space, self))
 
     def data(self, column):
         if column == 0:
-            return 'ItemSpaces'
+            return 'ItemSpaces' + self.getPageLabel()
         else:
             return BaseItem.data(self, column)
 
+    def getPageLabel(self):
+        """Returns the range of the item spaces shown such as
+        ' (first 500 of 100,000)'"""
+        if not self.isPaged():
+            return ''
+        start, _, prefix = self.getPage()
+        count, total = len(self.itemData['items']), self.itemData['_total']
+        if prefix:
+            total = '{:,} matching "{}"'.format(total, prefix)
+        elif start == 0 and count == total:
+            return ''
+        else:
+            total = '{:,}'.format(total)
+
+        if start == 0:
+            return ' (first {:,} of {})'.format(count, total)
+        else:
+            return ' ({:,}-{:,} of {})'.format(
+                start + 1, start + count, total)
+
+    def getType(self):
+        return ''
+
     def getParams(self):
         params = self.parent().itemData['parameters']
         return ", ".join(params) if params else ""
 
 class CellsItem(InterfaceItem):
     """Item class for cells objects."""
+    __slots__ = ()
+
     def updateChild(self):
         pass
 
@@ -285,6 +682,8 @@ class CellsItem(InterfaceItem):
 
 class RefItem(InterfaceItem):
     """Item class for references."""
+    __slots__ = ()
+
     def updateChild(self):
         pass
 
@@ -297,16 +696,27 @@ class RefItem(InterfaceItem):
 
 class MxTreeModel(QAbstractItemModel):
 
-    def __init__(self, item, parent=None):
+    def __init__(self, item, parent=None, fetcher=None):
         super(MxTreeModel, self).__init__(parent)
         self.rootItem = item
+        self.revision = None    # Revision of the tree data in the kernel
+
+        # Function to retrieve the children of collapsed items.
+        # Called with the model and the item, and the result must be
+        # passed to setFetchedData.
+        self.fetcher = fetcher
+        self.fetching = set()
+
+        # Items of the cells whose numbers of values are sent from the
+        # kernel by their object ids. See updateCounts.
+        self.watchedItems = {}
+
+        # Records of profiling by object ids. See mx_get_profile
+        self.profile = {}
 
     def updateRoot(self, item):
         newmodel = item
-        if self.updateItem(QModelIndex(), newmodel):
-            # Refresh view when data changed
-            # https://www.qtcentre.org/threads/48230-QTreeView-How-to-refresh-the-view?p=270537#post270537
-            self.dataChanged.emit(QModelIndex(), QModelIndex())
+        self.updateItem(QModelIndex(), newmodel)
 
     def getItem(self, index):
         if not index.isValid():
@@ -323,57 +733,90 @@ class MxTreeModel(QAbstractItemModel):
         else:
             item = index.internalPointer()
 
-        if item.itemData != newitem.itemData:
+        olddata, newdata = item.itemData, newitem.itemData
 
-            updated = True
-
-            item.itemData = newitem.itemData
-            # self.dataChanged.emit(index, index)
-            delItems = set(item.childItems) - set(newitem.childItems)
-
-            if delItems:
-                delRows = sorted([item.row() for item in delItems])
-                # https://stackoverflow.com/questions/10420464/group-list-of-ints-by-continuous-sequence
-                delRows = [list(g) for _, g in itertools.groupby(
-                    delRows, key=lambda n, c=itertools.count(): n-next(c))]
-
-                # Example:
-                # delRows = [2,3,4,7,8,9]
-                # key(n): delRows -> [2, 2, 2, 4, 4, 4]
-                # delRows = [[2,3,4],[7,8,9]]
+        if is_changed(olddata, newdata):
 
-                shift = 0
-                for rows in delRows:
-                    self.removeRows(rows[0]-shift, len(rows), index)
-                    shift += len(rows)
-
-            addItems = set(newitem.childItems) - set(item.childItems)
+            updated = True
+            item.itemData = newdata
+            if index.isValid() and (
+                    "_digest" not in newdata
+                    or olddata.get("_digest") != newdata["_digest"]):
+                # Refresh the row in views
+                self.dataChanged.emit(
+                    self.createIndex(index.row(), 0, item),
+                    self.createIndex(index.row(), item.columnCount() - 1,
+                                     item))
+
+            if not item.isChildCreated():
+                # The children are created from the new data when accessed
+                return updated
+
+            self.updateChildren(index, item, newitem, recursive)
 
-            if addItems:
-                addRows = sorted([item.row() for item in addItems])
-                addRows = [list(g) for _, g in itertools.groupby(
-                    addRows, key=lambda n, c=itertools.count(): n-next(c))]
+        return updated
 
-                for rows in addRows:
-                    self.insertRows(rows, newitem, index)
+    def updateChildren(self, index, item, newitem, recursive=True):
+        """Update the children of item with the children of newitem
 
-            self.reorderChild(index, newitem)
+        The children are matched by their keys. Children not in newitem
+        are removed, and then the children whose rows are not in the
+        longest increasing subsequence of their new rows are moved,
+        and the new children are inserted, from the last row, each
+        before its next sibling. Consecutive rows are removed, moved
+        and inserted at once.
+        """
+        newchildren = newitem.childItems
+        newrows = {child.key: row for row, child in enumerate(newchildren)}
 
-            if recursive:
-                for row, child in enumerate(item.childItems):
-                    child_index = self.index(row, 0, index)
-                    self.updateItem(child_index, newitem.childItems[row])
+        delrows = [row for row, child in enumerate(item.childItems)
+                   if child.key not in newrows]
+        for first, last in reversed(_group_rows(delrows)):
+            self.removeRows(first, last - first + 1, index)
 
-        return updated
+        stable = _increasing_subsequence(
+            [newrows[child.key] for child in item.childItems])
 
-    def insertRows(self, rows, newitem, parent):
+        j = len(newchildren) - 1
+        while j >= 0:
+            if j + 1 < len(newchildren):
+                anchor = item.childByKey(newchildren[j + 1].key).row()
+            else:
+                anchor = item.childCount()
+
+            child = item.childByKey(newchildren[j].key)
+            if child is None:
+                i = j
+                while (i > 0 and
+                       item.childByKey(newchildren[i - 1].key) is None):
+                    i -= 1
+                self.insertRows(anchor, newchildren[i:j + 1], index)
+            elif j in stable:
+                i = j
+            else:
+                i, row = j, child.row()
+                while i > 0 and i - 1 not in stable:
+                    prev = item.childByKey(newchildren[i - 1].key)
+                    if prev is None or prev.row() != row - (j - i + 1):
+                        break
+                    i -= 1
+                first = row - (j - i)
+                if anchor != row + 1:
+                    self.moveRows(index, anchor, first, j - i + 1)
+            j = i - 1
+
+        if recursive:
+            for row, child in enumerate(item.childItems):
+                newchild = newchildren[row]
+                if child.itemData is not newchild.itemData:
+                    self.updateItem(
+                        self.createIndex(row, 0, child), newchild)
+
+    def insertRows(self, position, items, parent):
         # Signature is different from the base method.
         item = self.getItem(parent)
-        self.beginInsertRows(parent, rows[0], rows[-1])
-
-        for row in rows:
-            item.insertChild(row, newitem.childItems[row])
-
+        self.beginInsertRows(parent, position, position + len(items) - 1)
+        item.insertChildren(position, items)
         self.endInsertRows()
 
     def removeRows(self, position, rows, parent=QModelIndex()):
@@ -381,56 +824,20 @@ class MxTreeModel(QAbstractItemModel):
         item = self.getItem(parent)
 
         self.beginRemoveRows(parent, position, position + rows - 1)
-
-        # for row in range(position, position + rows):
-        while rows > 0:
-            item.childItems.pop(position)
-            rows -= 1
-
+        item.removeChildren(position, rows)
         self.endRemoveRows()
 
-    def reorderChild(self, parent, newitem):
-        """Reorder a list to match target by moving a sequence at a time.
-
-        Written for QtAbstractItemModel.moveRows.
-        """
-        source = self.getItem(parent).childItems
-        target = newitem.childItems
-
-        i = 0
-        while i < len(source):
-
-            if source[i] == target[i]:
-                i += 1
-                continue
-            else:
-                i0 = i
-                j0 = source.index(target[i0])
-                j = j0 + 1
-                while j < len(source):
-                    if source[j] == target[j - j0 + i0]:
-                        j += 1
-                        continue
-                    else:
-                        break
-                self.moveRows(parent, i0, j0, j - j0)
-                i += j - j0
-
     def moveRows(self, parent, index_to, index_from, length):
         """Move a sub sequence in a list
 
-        index_to must be smaller than index_from
+        index_to is the row before which the rows are moved, counted
+        before the move as in beginMoveRows.
         """
-        source = self.getItem(parent).childItems
+        item = self.getItem(parent)
 
         self.beginMoveRows(parent, index_from, index_from + length - 1,
                            parent, index_to)
-
-        sublist = [source.pop(index_from) for _ in range(length)]
-
-        for _ in range(length):
-            source.insert(index_to, sublist.pop())
-
+        item.moveChildren(index_from, length, index_to)
         self.endMoveRows()
 
     @property
@@ -454,8 +861,14 @@ class MxTreeModel(QAbstractItemModel):
             return None
 
         item = index.internalPointer()
+        column = index.column()
 
-        return item.data(index.column())
+        if column in PROFILE_COLUMNS:
+            if isinstance(item, InterfaceItem) and item.objid in self.profile:
+                return PROFILE_COLUMNS[column][1](self.profile[item.objid])
+            return None
+
+        return item.data(column)
 
     def flags(self, index):
         if not index.isValid():
@@ -476,6 +889,10 @@ class MxTreeModel(QAbstractItemModel):
                 return 'Is Derived'
             elif section == 4:
                 return 'No. Data'
+            elif section == 5:
+                return 'Memory'
+            elif section in PROFILE_COLUMNS:
+                return PROFILE_COLUMNS[section][0]
 
         return None
 
@@ -501,7 +918,7 @@ class MxTreeModel(QAbstractItemModel):
         childItem = index.internalPointer()
         parentItem = childItem.parent()
 
-        if parentItem is None or parentItem == self.rootItem:
+        if parentItem is None or parentItem is self.rootItem:
             return QModelIndex()
 
         return self.createIndex(parentItem.row(), 0, parentItem)
@@ -517,6 +934,96 @@ class MxTreeModel(QAbstractItemModel):
 
         return parentItem.childCount()
 
+    def hasChildren(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return False
+        return self.getItem(parent).hasChildren()
 
+    def canFetchMore(self, parent):
+        if parent.column() > 0 or self.fetcher is None:
+            return False
+        item = self.getItem(parent)
+        return item not in self.fetching and item.canFetchMore()
 
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        item = self.getItem(parent)
+        self.fetching.add(item)
+        self.fetcher(self, item)
 
+    def getIndex(self, item):
+        """Returns the index of item or None if item is not in the tree"""
+        if item is self.rootItem:
+            return QModelIndex()
+        parent = item.parent()
+        if parent is None or self.getIndex(parent) is None:
+            return None
+        if parent.childByKey(item.key) is not item:
+            return None
+        return self.createIndex(item.row(), 0, item)
+
+    def fetchPage(self, parent, start, prefix=''):
+        """Retrieve the page of the children of parent from start
+
+        The children whose arguments start with prefix are counted.
+        The page has the same size as the current one.
+        """
+        item = self.getItem(parent)
+        if self.fetcher is None or item in self.fetching:
+            return
+        pagestart, pagestop, _ = item.getPage()
+        self.fetching.add(item)
+        self.fetcher(self, item,
+                     [start, start + pagestop - pagestart, prefix])
+
+    def setFetchedData(self, item, containers):
+        """Add the children of item retrieved by fetcher"""
+        self.fetching.discard(item)
+        index = self.getIndex(item)
+        if index is None or not (item.canFetchMore() or item.isPaged()):
+            return
+
+        for container in containers.values():
+            container.pop("keys", None)
+            for child in container["items"].values():
+                merge_tree(child, None)     # Compact the objects
+        item.setFetchedData(containers)
+        if index.isValid():
+            self.dataChanged.emit(
+                index, self.createIndex(
+                    index.row(), item.columnCount() - 1, item))
+        if item.isChildCreated():
+            newitem = type(item)(item.itemData, item.parent())
+            self.updateChildren(index, item, newitem, recursive=False)
+
+    def fetchFailed(self, item):
+        self.fetching.discard(item)
+
+    def getCreatedItems(self, itemtype):
+        """Returns the items of itemtype whose parents' children are created"""
+        result = []
+        stack = [self.rootItem]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, itemtype):
+                result.append(item)
+            if item.isChildCreated():
+                stack.extend(item.childItems)
+        return result
+
+    def updateCounts(self, counts):
+        """Set the numbers of values of cells sent from the kernel
+
+        ``counts`` is a list of pairs of object ids and the numbers.
+        Only the LEN column of the items in ``watchedItems`` is updated,
+        without updating the tree.
+        """
+        for objid, count in counts:
+            item = self.watchedItems.get(objid)
+            index = self.getIndex(item) if item else None
+            if index is None or item.itemData.get('__len__') == count:
+                continue
+            item.itemData['__len__'] = count
+            index = self.createIndex(index.row(), TreeCol.LEN, item)
+            self.dataChanged.emit(index, index)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2018-2022 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Worker thread to process data from the kernel off the GUI thread"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party imports
+from qtpy.QtCore import QObject, Signal
+
+
+class MxWorker(QObject):
+    """Run functions in a worker thread and call back in the GUI thread
+
+    Functions are run one at a time in the order submitted, and their
+    callbacks are called in the same order. The functions must not
+    touch Qt objects, and must not change data used in the GUI thread.
+    Because of the GIL, this keeps the GUI responsive while the
+    functions run, rather than running them in parallel.
+    """
+
+    # Emitted in the worker thread, received in the GUI thread
+    sig_done = Signal(object)
+
+    # Emitted with True when functions are submitted while idle, and
+    # with False when all of them and their callbacks are done
+    sig_busy = Signal(bool)
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+        self._executor = executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="MxWorker")
+        self.sig_done.connect(self._done)
+        # Stop the thread when deleted with the parent. The lambda must
+        # not refer to self, which is deleted.
+        self.destroyed.connect(lambda *args: executor.shutdown(wait=False))
+        self.pending = 0
+
+    def submit(self, func, callback=None, errback=None):
+        """Call func in the worker thread
+
+        ``callback`` is called in the GUI thread with the returned value,
+        and ``errback`` is called with the exception if func raises one.
+        Without ``errback``, the exception is raised in the GUI thread.
+        """
+        self.pending += 1
+        if self.pending == 1:
+            self.sig_busy.emit(True)
+
+        def run():
+            try:
+                result = (callback, func(), None)
+            except Exception as error:
+                result = (errback, error, error)
+            self.sig_done.emit(result)
+
+        self._executor.submit(run)
+
+    def _done(self, result):
+        func, value, error = result
+        try:
+            if func:
+                func(value)
+            elif error is not None:
+                raise error
+        finally:
+            # Decremented after func, which may submit more functions
+            self.pending -= 1
+            if self.pending == 0:
+                self.sig_busy.emit(False)